@@ -0,0 +1,208 @@
+"""
+Admission Control Overload Benchmark
+
+Offers more analyze_azure_resources_with_ai calls (fake ARM plus a slow
+local OpenAI stub with fixed capacity) than the server can finish, next to
+a steady stream of cheap interactive calls and standard NSG evaluations,
+first without and then with admission control. Arrivals are open-loop, so
+an overloaded server builds a backlog instead of slowing the load down.
+Reported per lane: calls completed and shed, latency percentiles of
+completed calls, and how fast shed calls were answered.
+
+Usage: python benchmarks/bench_admission.py [--duration 15] [--heavy-rate 6] [--cheap-rate 20]
+                                            [--standard-rate 4] [--llm-first-token-ms 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_backends import (  # noqa: E402
+    SUBSCRIPTION_ID,
+    TARGET_GROUP,
+    ArmRouter,
+    AsyncFakeArmTransport,
+    AsyncFakeCredential,
+    FakeArmTransport,
+    FakeCredential,
+    OpenAIStub,
+    SyntheticEstate,
+)
+
+LANE_OF = {
+    "hello_world": "interactive",
+    "get_azure_resource_groups": "interactive",
+    "evaluate_nsg_flows": "standard",
+    "analyze_azure_resources_with_ai": "heavy",
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+
+
+def summarize(outcomes: List[Tuple[str, str, float]]) -> Dict[str, Any]:
+    lanes: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    for tool, outcome, elapsed in outcomes:
+        lanes[LANE_OF[tool]][outcome].append(elapsed)
+    summary = {}
+    for lane, by_outcome in sorted(lanes.items()):
+        completed, shed = by_outcome.get("ok", []), by_outcome.get("shed", [])
+        summary[lane] = {
+            "completed": len(completed),
+            "shed": len(shed),
+            "failed": len(by_outcome.get("error", [])),
+            "p50_ms": percentile(completed, 0.5) if completed else None,
+            "p99_ms": percentile(completed, 0.99) if completed else None,
+            "max_ms": round(max(completed) * 1000, 1) if completed else None,
+            "shed_p99_ms": percentile(shed, 0.99) if shed else None,
+        }
+    return summary
+
+
+async def run_worker(args) -> Dict[str, Any]:
+    import logging
+
+    from src import azure_clients, mcp_server
+    from src.azure_clients import AzureClientPool
+
+    logging.getLogger().setLevel(logging.ERROR)
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    estate = SyntheticEstate(args.resources)
+    router = ArmRouter(estate, latency_s=args.arm_latency_ms / 1000)
+    pool = AzureClientPool(
+        FakeCredential(), AsyncFakeCredential(),
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    azure_clients._client_pool = pool
+    server = mcp_server.mcp_server
+    flows = estate.sample_flows(args.flows)
+
+    # Distinct groups keep single-flight from folding the heavy calls together
+    heavy_calls = [("analyze_azure_resources_with_ai",
+                    {"resource_group": group, "include_network_analysis": network})
+                   for group in estate.groups for network in (True, False)]
+    streams = [
+        (args.heavy_rate, heavy_calls),
+        (args.standard_rate, [("evaluate_nsg_flows",
+                               {"resource_group": TARGET_GROUP, "nsg_name": "nsg-0000", "flows": flows})]),
+        (args.cheap_rate, [("hello_world", {"name": "bench"}), ("get_azure_resource_groups", {})]),
+    ]
+
+    # Prime the inventory cache so the interactive calls measure admission, not a first ARM read
+    await server.call_tool("get_azure_resource_groups", {})
+    outcomes: List[Tuple[str, str, float]] = []
+
+    async def call(tool: str, arguments: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            result = await server.call_tool(tool, arguments)
+            # Dict results come back with a structured copy; the tools report failures as {"error": ...}
+            structured = result[1] if isinstance(result, tuple) else {}
+            outcome = "error" if "error" in structured else "ok"
+        except Exception as e:
+            outcome = "shed" if "Server busy" in str(e) else "error"
+        outcomes.append((tool, outcome, time.perf_counter() - started))
+
+    async def arrivals(rate: float, calls: List[Tuple[str, Dict[str, Any]]]):
+        tasks = []
+        for index in range(int(rate * args.duration)):
+            tool, arguments = calls[index % len(calls)]
+            tasks.append(asyncio.ensure_future(call(tool, arguments)))
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(arrivals(rate, calls) for rate, calls in streams if rate > 0))
+    elapsed = time.perf_counter() - started
+    admission = mcp_server._admission.stats()
+    await mcp_server._shutdown()
+    return {
+        "admission": admission["enabled"],
+        "elapsed_s": round(elapsed, 1),
+        "lanes": summarize(outcomes),
+        "peak_queued": {name: tool["peak_queued"] for name, tool in admission["tools"].items()
+                        if tool["peak_queued"]},
+    }
+
+
+def worker(args) -> int:
+    stub = OpenAIStub(first_token_ms=args.llm_first_token_ms, chunk_interval_ms=args.llm_chunk_interval_ms,
+                      chunks=args.llm_chunks, max_concurrency=args.llm_capacity).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-admission-") as directory:
+            # Configuration is read at import time, so the environment is set before src is imported
+            os.environ.update({
+                **stub.environment(),
+                "AZURE_SUBSCRIPTION_ID": SUBSCRIPTION_ID,
+                "ADMISSION_ENABLED": "true" if args.mode == "on" else "false",
+                "INVENTORY_STORE_PATH": str(Path(directory) / "inventory.sqlite3"),
+                "LLM_CACHE_ENABLED": "false",
+                "STARTUP_WARMUP": "false",
+            })
+            report = asyncio.run(run_worker(args))
+    finally:
+        stub.stop()
+    print(json.dumps(report))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=15, help="seconds of offered load")
+    parser.add_argument("--heavy-rate", type=float, default=6, help="analyze_azure_resources_with_ai calls/s")
+    parser.add_argument("--standard-rate", type=float, default=4, help="evaluate_nsg_flows calls/s")
+    parser.add_argument("--cheap-rate", type=float, default=20,
+                        help="hello_world/get_azure_resource_groups calls/s")
+    parser.add_argument("--flows", type=int, default=500, help="flows per NSG evaluation")
+    parser.add_argument("--resources", type=int, default=10000, help="synthetic estate size")
+    parser.add_argument("--arm-latency-ms", type=float, default=20, help="added to every fake ARM request")
+    parser.add_argument("--llm-first-token-ms", type=float, default=2000)
+    parser.add_argument("--llm-chunk-interval-ms", type=float, default=15)
+    parser.add_argument("--llm-chunks", type=int, default=40)
+    parser.add_argument("--llm-capacity", type=int, default=4, help="completions the stub serves at once")
+    parser.add_argument("--mode", choices=["off", "on"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return worker(args)
+
+    runs = []
+    for mode in ("off", "on"):
+        command = [sys.executable, __file__, "--mode", mode] + [
+            f"--{option.replace('_', '-')}={getattr(args, option)}"
+            for option in ("duration", "heavy_rate", "standard_rate", "cheap_rate", "flows", "resources",
+                           "arm_latency_ms", "llm_first_token_ms", "llm_chunk_interval_ms", "llm_chunks",
+                           "llm_capacity")
+        ]
+        completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                                   env={**os.environ, "PYTHONWARNINGS": "ignore"})
+        if completed.returncode != 0:
+            print(f"Run with admission {mode} failed", file=sys.stderr)
+            return 1
+        run = json.loads(completed.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        for lane, stats in run["lanes"].items():
+            print(f"  admission {mode:<3} {lane:<11} {stats['completed']:>4} done {stats['shed']:>4} shed "
+                  f"{stats['failed']:>4} failed  "
+                  f"p50 {stats['p50_ms']} ms  p99 {stats['p99_ms']} ms  max {stats['max_ms']} ms", file=sys.stderr)
+    print(json.dumps({"cpu_count": os.cpu_count(), "settings": vars(args), "runs": runs}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+ARM Throttling Benchmark
+
+Drives network snapshot reads (seven ARM list calls each) through the real
+async management clients against a fake ARM that enforces a per-subscription
+read quota: a token bucket answering 429 with Retry-After once it is empty,
+and reporting the remaining reads on every other response.
+
+Each scheduler mode gets a fresh quota and runs interactive and background
+callers side by side for a fixed time. Reported per mode: sustained
+throughput (successful ARM responses and snapshots per second), 429s,
+the concurrency window the scheduler settled on, and interactive versus
+background snapshot latency.
+
+Usage: python benchmarks/bench_arm_throttling.py [--duration S] [--read-rate R] [--modes fixed-8,fixed-32,adaptive]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_backends import (  # noqa: E402
+    TARGET_GROUP,
+    ArmRouter,
+    AsyncFakeArmTransport,
+    AsyncFakeCredential,
+    FakeArmTransport,
+    FakeCredential,
+    SyntheticEstate,
+)
+
+SUBSCRIPTION_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+
+async def run_mode(mode: str, args) -> Dict[str, Any]:
+    from src.arm_scheduler import background_priority
+    from src.azure_clients import AzureClientPool
+    from src.azure_manager import AsyncAzureManager
+
+    adaptive = mode == "adaptive"
+    window = args.initial_window if adaptive else int(mode.split("-")[1])
+    router = ArmRouter(SyntheticEstate(args.resources, seed=1), latency_s=args.latency_ms / 1000,
+                       read_rate=args.read_rate, read_burst=args.read_burst)
+    pool = AzureClientPool(
+        FakeCredential(), AsyncFakeCredential(), max_concurrency=window,
+        adaptive_concurrency=adaptive, max_adaptive_concurrency=args.max_window,
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    manager = AsyncAzureManager(SUBSCRIPTION_ID, client_pool=pool)
+    latencies: Dict[str, List[float]] = {"interactive": [], "background": []}
+    failed = {"interactive": 0, "background": 0}
+    windows: List[int] = []
+    deadline = time.monotonic() + args.duration
+
+    async def caller(kind: str):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            snapshot = await manager.get_network_snapshot(TARGET_GROUP)
+            if snapshot.errors:
+                failed[kind] += 1
+            else:
+                latencies[kind].append(time.perf_counter() - started)
+
+    async def background_caller():
+        with background_priority():
+            await caller("background")
+
+    async def sample_window():
+        while time.monotonic() < deadline:
+            windows.append(manager.scheduler.window)
+            await asyncio.sleep(0.1)
+
+    started = time.monotonic()
+    await asyncio.gather(
+        *(caller("interactive") for _ in range(args.interactive)),
+        *(background_caller() for _ in range(args.background)),
+        sample_window(),
+    )
+    elapsed = time.monotonic() - started
+    stats = manager.scheduler.stats()
+    await pool.aclose()
+
+    served = sum(router.requests.values()) - router.throttled
+    snapshots = len(latencies["interactive"]) + len(latencies["background"])
+    return {
+        "mode": mode,
+        "elapsed_s": round(elapsed, 2),
+        "arm_responses_per_s": round(served / elapsed, 1),
+        "snapshots_per_s": round(snapshots / elapsed, 2),
+        "throttled_429": router.throttled,
+        "failed_snapshots": failed,
+        "window_median": statistics.median(windows) if windows else window,
+        "window_peak": stats["peak_window"],
+        "window_decreases": stats["window_decreases"],
+        "interactive_p50_ms": percentile(latencies["interactive"], 0.5),
+        "interactive_p95_ms": percentile(latencies["interactive"], 0.95),
+        "background_p50_ms": percentile(latencies["background"], 0.5),
+        "background_p95_ms": percentile(latencies["background"], 0.95),
+        "queue_wait_s": stats["queue_wait_s"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", default="fixed-8,fixed-32,adaptive",
+                        help="fixed-N (static window of N, the previous behaviour at 8) or adaptive")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per mode")
+    parser.add_argument("--read-rate", type=float, default=400, help="quota refill, reads per second")
+    parser.add_argument("--read-burst", type=int, default=250, help="quota bucket size")
+    parser.add_argument("--latency-ms", type=float, default=25, help="fake ARM response time")
+    parser.add_argument("--resources", type=int, default=200, help="synthetic estate size")
+    parser.add_argument("--interactive", type=int, default=8, help="concurrent interactive callers")
+    parser.add_argument("--background", type=int, default=8, help="concurrent background callers")
+    parser.add_argument("--initial-window", type=int, default=8)
+    parser.add_argument("--max-window", type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.setdefault("STARTUP_WARMUP", "false")
+    logging.basicConfig(level=logging.WARNING)
+    results = []
+    for mode in args.modes.split(","):
+        result = asyncio.run(run_mode(mode.strip(), args))
+        print(f"  {result['mode']:<10} {result['arm_responses_per_s']:>8} ARM responses/s  "
+              f"{result['throttled_429']:>5} x 429  window ~{result['window_median']}  "
+              f"interactive p50 {result['interactive_p50_ms']} ms  background p50 {result['background_p50_ms']} ms",
+              file=sys.stderr)
+        results.append(result)
+    print(json.dumps({"read_rate": args.read_rate, "latency_ms": args.latency_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
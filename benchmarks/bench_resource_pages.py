@@ -0,0 +1,152 @@
+"""
+Resource Listing Pages Benchmark
+
+Lists a large resource group through the MCP tool layer against the fake ARM
+transport, comparing the previous single response (every resource as a dict,
+serialized by FastMCP as indented text plus a structured copy) with the
+cursor-paginated, field-projected tool: first page only, and walking every
+page. Reported per variant: wall time, response bytes and peak traced memory.
+
+Usage: python benchmarks/bench_resource_pages.py [--resources N] [--page-size N] [--fields id,type]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_backends import (  # noqa: E402
+    SUBSCRIPTION_ID,
+    TARGET_GROUP,
+    ArmRouter,
+    AsyncFakeArmTransport,
+    AsyncFakeCredential,
+    FakeArmTransport,
+    FakeCredential,
+    SyntheticEstate,
+)
+
+
+def response_bytes(content) -> int:
+    if isinstance(content, tuple):
+        # Unstructured text plus the structured copy the client also receives
+        text, structured = content
+        return sum(len(block.text.encode("utf-8")) for block in text) + len(json.dumps(structured).encode("utf-8"))
+    return sum(len(block.text.encode("utf-8")) for block in content)
+
+
+async def measure(name: str, call: Callable[[], Awaitable[Dict[str, Any]]], reset: Callable[[], None],
+                  iterations: int) -> Dict[str, Any]:
+    samples = []
+    outcome: Dict[str, Any] = {}
+    for _ in range(iterations):
+        reset()
+        started = time.perf_counter()
+        outcome = await call()
+        samples.append(time.perf_counter() - started)
+    reset()
+    tracemalloc.start()
+    await call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "variant": name,
+        "p50_ms": round(sorted(samples)[len(samples) // 2] * 1000, 1),
+        "alloc_peak_kib": round(peak / 1024, 1),
+        **outcome,
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    from mcp.server import FastMCP
+
+    from src import azure_clients, mcp_server
+    from src.azure_clients import AzureClientPool
+    from src.azure_manager import AsyncAzureManager
+    from src.inventory_cache import get_inventory_cache
+    from src.resource_records import resource_dicts
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    estate = SyntheticEstate(args.resources, seed=args.seed)
+    router = ArmRouter(estate)
+    pool = AzureClientPool(
+        FakeCredential(), AsyncFakeCredential(),
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    azure_clients._client_pool = pool
+    cache = get_inventory_cache()
+    server = mcp_server.mcp_server
+    fields = args.fields.split(",") if args.fields else None
+
+    # The tool as it was: one response holding the whole group, serialized by FastMCP
+    previous = FastMCP("previous")
+
+    @previous.tool()
+    async def list_azure_resources_in_group(resource_group: str) -> Dict[str, Any]:
+        listing = await AsyncAzureManager(SUBSCRIPTION_ID).list_resources_in_group(resource_group)
+        return {**listing, "resources": resource_dicts(listing["resources"])}
+
+    async def whole_group():
+        content = await previous.call_tool("list_azure_resources_in_group", {"resource_group": TARGET_GROUP})
+        return {"responses": 1, "response_bytes": response_bytes(content)}
+
+    def paged(all_pages: bool):
+        async def call():
+            arguments = {"resource_group": TARGET_GROUP, "page_size": args.page_size, "fields": fields}
+            responses = total = 0
+            while True:
+                content = await server.call_tool("list_azure_resources_in_group", arguments)
+                responses += 1
+                total += response_bytes(content)
+                cursor = json.loads(content[0].text)["next_cursor"]
+                if not (all_pages and cursor):
+                    return {"responses": responses, "response_bytes": total}
+                arguments["cursor"] = cursor
+        return call
+
+    results = [
+        await measure("whole_group", whole_group, cache.invalidate, args.iterations),
+        await measure("first_page", paged(False), cache.invalidate, args.iterations),
+        await measure("all_pages", paged(True), cache.invalidate, args.iterations),
+    ]
+    await pool.aclose()
+    return {"resources_in_group": len(estate.resources[TARGET_GROUP]), "page_size": args.page_size,
+            "fields": fields, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--resources", type=int, default=20000, help="synthetic estate size")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--fields", default="id,name,type", help="comma-separated projection, empty for all")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Configuration is read at import time, so the environment is set before src is imported
+    os.environ.update({
+        "AZURE_SUBSCRIPTION_ID": SUBSCRIPTION_ID,
+        "INVENTORY_STORE_ENABLED": "false",
+        "STARTUP_WARMUP": "false",
+    })
+    report = asyncio.run(run(args))
+    for result in report["results"]:
+        print(f"  {result['variant']:<12} p50 {result['p50_ms']:>8} ms  {result['responses']:>4} responses  "
+              f"{result['response_bytes']:>10} bytes  peak {result['alloc_peak_kib']:>9} KiB", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
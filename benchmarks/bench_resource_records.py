@@ -0,0 +1,167 @@
+"""
+Resource Record Memory Benchmark
+
+Lists every resource of a large synthetic subscription through the real
+management SDK client and the fake ARM transport (as a full inventory sync
+does) and reads the same resources back from inventory store JSON (as a
+cached resource group listing does), holding them either as the dicts the
+tools used to keep or as compact ResourceRecords. Each variant runs in a
+fresh interpreter; reported are the bytes retained per resource, the peak
+while listing, the listing time and, for records, how long converting all
+of them to dicts at the MCP boundary takes and whether the dicts match.
+
+Usage: python benchmarks/bench_resource_records.py [--resources 100000]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_backends import (  # noqa: E402
+    SUBSCRIPTION_ID,
+    ArmRouter,
+    AsyncFakeArmTransport,
+    AsyncFakeCredential,
+    FakeArmTransport,
+    FakeCredential,
+    SyntheticEstate,
+)
+
+VARIANTS = ("arm_dicts", "arm_records", "store_dicts", "store_records")
+
+
+def previous_resource_to_dict(resource) -> Dict[str, Any]:
+    """The conversion the inventory reads used before ResourceRecord (with $expand fields)"""
+    resource_info = {"name": resource.name, "type": resource.type, "location": resource.location, "id": resource.id}
+    if resource.kind:
+        resource_info["kind"] = resource.kind
+    if resource.sku:
+        resource_info["sku"] = resource.sku.name if hasattr(resource.sku, "name") else str(resource.sku)
+    for field in ("created_time", "changed_time"):
+        value = getattr(resource, field, None)
+        if value:
+            resource_info[field] = value.astimezone(timezone.utc).isoformat()
+    if resource.provisioning_state:
+        resource_info["provisioning_state"] = resource.provisioning_state
+    return resource_info
+
+
+async def retained(build: Callable[[], Awaitable[List[Any]]]):
+    """Run build under tracemalloc; returns (items, bytes still held once it returned, peak bytes)"""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    items = await build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, current - baseline, peak - baseline
+
+
+async def run_variant(args) -> Dict[str, Any]:
+    import logging
+
+    from src import azure_clients
+    from src.azure_clients import AzureClientPool
+    from src.azure_manager import INVENTORY_EXPAND, AsyncAzureManager
+    from src.resource_records import ResourceRecord, resource_dicts
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    estate = SyntheticEstate(args.resources)
+    router = ArmRouter(estate)
+    pool = AzureClientPool(
+        FakeCredential(), AsyncFakeCredential(),
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    azure_clients._client_pool = pool
+    manager = AsyncAzureManager(SUBSCRIPTION_ID)
+
+    async def arm(convert):
+        return await manager._collect(manager.resource_client.resources.list(expand=INVENTORY_EXPAND), convert)
+
+    # What the inventory store keeps per resource: the dict form as JSON
+    stored = [json.dumps(record) for record in await arm(previous_resource_to_dict)]
+    del estate
+
+    async def store(convert):
+        return [convert(json.loads(text)) for text in stored]
+
+    build = {
+        "arm_dicts": lambda: arm(previous_resource_to_dict),
+        "arm_records": lambda: arm(ResourceRecord.from_sdk),
+        "store_dicts": lambda: store(lambda record: record),
+        "store_records": lambda: store(ResourceRecord.from_dict),
+    }[args.variant]
+
+    items, held, peak = await retained(build)
+    started = time.perf_counter()
+    await build()
+    elapsed = time.perf_counter() - started
+    report = {
+        "variant": args.variant,
+        "resources": len(items),
+        "bytes_per_resource": round(held / len(items), 1),
+        "retained_mib": round(held / 2**20, 1),
+        "peak_mib": round(peak / 2**20, 1),
+        "list_ms": round(elapsed * 1000, 1),
+    }
+    if args.variant.endswith("records"):
+        started = time.perf_counter()
+        dicts = resource_dicts(items)
+        report["to_dicts_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        report["matches_dicts"] = dicts == [json.loads(text) for text in stored]
+    await pool.aclose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--resources", type=int, default=100000, help="synthetic estate size")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        # Configuration is read at import time, so the environment is set before src is imported
+        os.environ.update({
+            "AZURE_SUBSCRIPTION_ID": SUBSCRIPTION_ID,
+            "INVENTORY_STORE_ENABLED": "false",
+            "STARTUP_WARMUP": "false",
+        })
+        print(json.dumps(asyncio.run(run_variant(args))))
+        return 0
+
+    results = []
+    for variant in VARIANTS:
+        completed = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, f"--resources={args.resources}"],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True, env={**os.environ, "PYTHONWARNINGS": "ignore"}
+        )
+        if completed.returncode != 0:
+            print(f"Variant {variant} failed", file=sys.stderr)
+            return 1
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"  {variant:<14} {result['bytes_per_resource']:>7} bytes/resource  "
+              f"retained {result['retained_mib']:>7} MiB  peak {result['peak_mib']:>7} MiB  "
+              f"list {result['list_ms']:>8} ms", file=sys.stderr)
+    print(json.dumps({"resources": args.resources, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
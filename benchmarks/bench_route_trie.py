@@ -0,0 +1,97 @@
+"""
+Route Trie Benchmark
+
+Builds an effective route table with 10k user-defined routes and resolves
+100k destinations through it, comparing the bulk trie lookup against a
+linear longest-prefix scan on a sample.
+
+Usage: python benchmarks/bench_route_trie.py [--routes N] [--lookups N]
+"""
+
+import argparse
+import ipaddress
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.route_trie import EffectiveRouteTable, Route  # noqa: E402
+
+
+def build_routes(count: int, rng: random.Random):
+    routes = [Route("10.0.0.0/8", "VnetLocal"), Route("0.0.0.0/0", "Internet"), Route("::/0", "Internet")]
+    for index in range(count):
+        if index % 10 == 0:
+            network = ipaddress.IPv6Network((rng.getrandbits(128), rng.randint(16, 64)), strict=False)
+        else:
+            network = ipaddress.IPv4Network((rng.getrandbits(32), rng.randint(8, 30)), strict=False)
+        routes.append(Route(str(network), "VirtualAppliance", "10.0.0.4", source="User", name=f"r{index}"))
+    return routes
+
+
+def build_destinations(count: int, rng: random.Random):
+    destinations = []
+    for index in range(count):
+        if index % 10 == 0:
+            destinations.append(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+        else:
+            destinations.append(str(ipaddress.IPv4Address(rng.getrandbits(32))))
+    return destinations
+
+
+def linear_lookup(routes, destination):
+    address = ipaddress.ip_address(destination)
+    best = None
+    for route in routes:
+        network = ipaddress.ip_network(route.prefix)
+        if network.version == address.version and address in network:
+            if best is None or network.prefixlen >= ipaddress.ip_network(best.prefix).prefixlen:
+                best = route
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--routes", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--verify", type=int, default=200, help="destinations cross-checked against a linear scan")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    routes = build_routes(args.routes, rng)
+    destinations = build_destinations(args.lookups, rng)
+
+    start = time.perf_counter()
+    table = EffectiveRouteTable(routes)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = table.lookup_many(destinations)
+    lookup_s = time.perf_counter() - start
+
+    sample = destinations[:args.verify]
+    start = time.perf_counter()
+    expected = [linear_lookup(table.routes, destination) for destination in sample]
+    linear_s = time.perf_counter() - start
+    mismatches = sum(1 for got, want in zip(results, expected) if got is not want)
+
+    print(json.dumps({
+        "routes": len(table.routes),
+        "lookups": len(destinations),
+        "build_ms": round(build_s * 1000, 2),
+        "lookup_ms": round(lookup_s * 1000, 2),
+        "lookups_per_second": round(len(destinations) / lookup_s),
+        "linear_scan_us_per_lookup": round(linear_s / len(sample) * 1e6, 1),
+        "trie_us_per_lookup": round(lookup_s / len(destinations) * 1e6, 2),
+        "verified": len(sample),
+        "mismatches": mismatches,
+    }, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Startup Benchmark
+
+Measures, in fresh interpreters, what it costs to start the MCP server and
+the CLI: an import-time breakdown of src.mcp_server (python -X importtime),
+the time until the first tool call returns, and `main.py --help`.
+
+It fails (exit code 1) when a dependency that the tools load lazily is
+imported at startup again, or when importing the server exceeds a budget.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--max-import-ms MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Must not be imported until a tool needs them
+DEFERRED_MODULES = (
+    "semantic_kernel",
+    "openai",
+    "azure.identity",
+    "azure.mgmt.resource",
+    "azure.mgmt.network",
+    "aiohttp",
+    "numpy",
+)
+
+FIRST_TOOL_SCRIPT = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from src.mcp_server import mcp_server
+imported = time.perf_counter()
+asyncio.run(mcp_server.call_tool("hello_world", {"name": "bench"}))
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_tool_ms": (answered - started) * 1000,
+    "deferred_loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def run(args, env=None):
+    started = time.perf_counter()
+    result = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, env=env)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr}")
+    return result, elapsed_ms
+
+
+def import_breakdown(top: int):
+    """Cumulative import time (ms) of the top-level packages pulled in by src.mcp_server"""
+    result, _ = run([sys.executable, "-X", "importtime", "-c", "import src.mcp_server"])
+    packages = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            cumulative_ms = int(cumulative) / 1000
+        except ValueError:
+            continue  # header line
+        name = name.strip()
+        if name == "src.mcp_server":
+            total = cumulative_ms
+        package = name.split(".")[0] if not name.startswith("src.") else name
+        # The first (outermost) import of a package carries its cost
+        packages[package] = max(packages.get(package, 0.0), cumulative_ms)
+    ranked = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return total, {name: round(ms, 1) for name, ms in ranked}
+
+
+def median(values):
+    return round(statistics.median(values), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=12, help="packages listed in the import breakdown")
+    parser.add_argument("--max-import-ms", type=float, default=2000,
+                        help="fail when importing src.mcp_server takes longer (median)")
+    args = parser.parse_args()
+
+    env = {**os.environ, "PYTHONWARNINGS": "ignore"}
+    script = FIRST_TOOL_SCRIPT % (DEFERRED_MODULES,)
+    samples = [json.loads(run([sys.executable, "-c", script], env)[0].stdout.strip().splitlines()[-1])
+               for _ in range(args.runs)]
+    process_ms = [run([sys.executable, "-c", script], env)[1] for _ in range(args.runs)]
+    cli_help_ms = [run([sys.executable, "main.py", "--help"], env)[1] for _ in range(args.runs)]
+    importtime_total_ms, breakdown = import_breakdown(args.top)
+
+    deferred_loaded = sorted({name for sample in samples for name in sample["deferred_loaded"]})
+    import_ms = median([sample["import_ms"] for sample in samples])
+    report = {
+        "runs": args.runs,
+        "mcp_server_import_ms": import_ms,
+        "first_tool_response_ms": median([sample["first_tool_ms"] for sample in samples]),
+        "process_to_first_tool_ms": median(process_ms),
+        "cli_help_ms": median(cli_help_ms),
+        "importtime_total_ms": round(importtime_total_ms, 1),
+        "import_breakdown_ms": breakdown,
+        "deferred_modules_loaded_at_startup": deferred_loaded,
+        "max_import_ms": args.max_import_ms,
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if deferred_loaded or import_ms > args.max_import_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
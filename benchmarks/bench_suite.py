@@ -0,0 +1,438 @@
+"""
+Benchmark Suite
+
+Runs every MCP tool and the AsyncAzureManager, AzureManager and
+NetworkTroubleshootingAgent methods against fake backends (real Azure SDK
+clients over a recorded-response transport, and a local OpenAI-compatible
+stub) at synthetic estate sizes, and reports latency percentiles, Python
+allocations and peak RSS as JSON.
+
+Each scale runs in a fresh worker process so peak RSS is per scale. In the
+default "cold" cache mode the inventory/LLM caches are bypassed so every call
+reaches the backends; "warm" keeps them, measuring steady-state hits (the
+first call of each case is reported separately either way).
+
+Usage: python benchmarks/bench_suite.py [--scales 10,1000,10000,50000] [--output results.json]
+                                        [--compare baseline.json] [--only PATTERN]
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fake_backends import (  # noqa: E402
+    SUBSCRIPTION_ID,
+    TARGET_GROUP,
+    ArmRouter,
+    AsyncFakeArmTransport,
+    AsyncFakeCredential,
+    FakeArmTransport,
+    FakeCredential,
+    OpenAIStub,
+    SyntheticEstate,
+)
+
+ERROR_DETAILS = ("Deployment failed: InUseSubnetCannotBeDeleted - Subnet snet-1 is in use by "
+                 "/subscriptions/x/resourceGroups/rg/providers/Microsoft.Network/networkInterfaces/nic-1")
+
+
+class Case:
+    """One benchmarked call; `call` returns an awaitable or (for sync methods) a plain value"""
+
+    def __init__(self, kind: str, name: str, call: Callable[[], Any], llm: bool = False,
+                 needs_store: bool = False, check: Callable[[Any], Optional[str]] = None):
+        self.kind = kind
+        self.name = name
+        self.call = call
+        self.llm = llm
+        self.needs_store = needs_store
+        self.check = check or _error_of
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+
+def _error_of(result: Any) -> Optional[str]:
+    """The error a tool or method reported instead of raising, if any"""
+    if isinstance(result, dict) and result.get("error"):
+        return str(result["error"])
+    return None
+
+
+def _diagnosis_error(result: Any) -> Optional[str]:
+    """A diagnosis carries the deployment's own `error`; only a missing state means the call failed"""
+    if isinstance(result, dict) and "deployment_state" not in result:
+        return str(result.get("error"))
+    return None
+
+
+def _tool_check(check: Callable[[Any], Optional[str]]) -> Callable[[Any], Optional[str]]:
+    """call_tool results are content blocks holding the JSON the tool returned"""
+    def tool_error(result: Any) -> Optional[str]:
+        if isinstance(result, tuple):
+            result = result[0]
+        for block in result if isinstance(result, list) else []:
+            text = getattr(block, "text", "")
+            if text.startswith("Error:"):
+                return text
+            try:
+                error = check(json.loads(text))
+            except ValueError:
+                continue
+            if error:
+                return error
+        return None
+    return tool_error
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+async def _invoke(call: Callable[[], Any]) -> Any:
+    result = call()
+    if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+        result = await result
+    return result
+
+
+async def measure(case: Case, iterations: int, max_seconds: float, reset: Callable[[], None]) -> Dict[str, Any]:
+    rss_before = peak_rss_mib()
+    reset()
+    started = time.perf_counter()
+    result = await _invoke(case.call)
+    first_ms = (time.perf_counter() - started) * 1000
+    error = case.check(result)
+
+    samples: List[float] = []
+    budget_end = time.perf_counter() + max_seconds
+    for _ in range(iterations):
+        reset()
+        started = time.perf_counter()
+        await _invoke(case.call)
+        samples.append((time.perf_counter() - started) * 1000)
+        if len(samples) >= 3 and time.perf_counter() > budget_end:
+            break
+
+    # Allocations are traced on a separate run: tracemalloc slows the code it watches
+    reset()
+    tracemalloc.start()
+    await _invoke(case.call)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report = {
+        "iterations": len(samples),
+        "first_ms": round(first_ms, 2),
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p90_ms": round(percentile(samples, 0.90), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+        "max_ms": round(max(samples), 2),
+        "mean_ms": round(sum(samples) / len(samples), 2),
+        "alloc_peak_kib": round(peak / 1024, 1),
+        "alloc_retained_kib": round(retained / 1024, 1),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+        "peak_rss_growth_mib": round(peak_rss_mib() - rss_before, 1),
+    }
+    if error:
+        report["error"] = error[:300]
+    return report
+
+
+def build_cases(estate: SyntheticEstate, pool, mcp_server_module) -> List[Case]:
+    from src.ai_agent import get_troubleshooting_agent
+    from src.azure_manager import AsyncAzureManager, AzureManager
+    from src.config import get_config
+
+    server = mcp_server_module.mcp_server
+    config = get_config()
+    flows = estate.sample_flows(200)
+    hop_queries = estate.sample_hop_queries(200)
+    since = estate.now - timedelta(hours=24)
+    group_resources = {"target_resource_group": TARGET_GROUP,
+                       "resources": [{"id": record["id"], "name": record["name"], "type": record["type"],
+                                      "location": record["location"]}
+                                     for record in estate.resources[TARGET_GROUP]]}
+
+    def tool(name: str, arguments: Dict[str, Any] = None, check=_error_of, **options) -> Case:
+        return Case("tool", name, lambda: server.call_tool(name, arguments or {}), check=_tool_check(check),
+                    **options)
+
+    def manager() -> AsyncAzureManager:
+        # Built per call, as the tools do
+        return AsyncAzureManager(SUBSCRIPTION_ID, client_pool=pool)
+
+    def agent():
+        return get_troubleshooting_agent(config.openai_api_key, config.openai_model)
+
+    async def streamed_analysis():
+        async def discard(chunk: str):
+            pass
+        return await agent().analyze_deployment_error_with_cache_info(
+            {"deployment_name": "deploy-failed-00", "resource_group": TARGET_GROUP, "error": ERROR_DETAILS},
+            on_chunk=discard
+        )
+
+    sync_manager = AzureManager(SUBSCRIPTION_ID, client_pool=pool)
+    deployment = {"deployment_name": "deploy-failed-00", "resource_group": TARGET_GROUP}
+
+    return [
+        tool("hello_world"),
+        tool("get_azure_resource_groups"),
+        tool("list_azure_resources_in_group", {"resource_group": TARGET_GROUP}),
+        tool("aggregate_inventory", {"group_by": "type"}, needs_store=True),
+        tool("analyze_deployment_error", deployment, check=_diagnosis_error),
+        tool("get_ai_troubleshooting_advice", {"error_details": ERROR_DETAILS}, llm=True),
+        tool("analyze_failed_deployments", {"resource_groups": [TARGET_GROUP], "window_hours": 24}, llm=True),
+        tool("get_network_issues", {"resource_group": TARGET_GROUP}),
+        tool("evaluate_nsg_flows", {"resource_group": TARGET_GROUP, "nsg_name": "nsg-0000", "flows": flows}),
+        tool("get_effective_next_hops", {"resource_group": TARGET_GROUP, "queries": hop_queries}),
+        tool("find_address_space_conflicts"),
+        tool("analyze_azure_resources_with_ai", {"resource_group": TARGET_GROUP}, llm=True),
+        tool("list_azure_subscriptions"),
+        tool("find_azure_resources", {"resource_type": "Microsoft.Network/virtualNetworks",
+                                      "subscriptions": ["all"]}),
+        tool("find_deployment", {"deployment_name": "deploy-failed-00", "subscriptions": ["all"]}),
+        tool("get_server_diagnostics"),
+        tool("invalidate_inventory_cache", {"resource_group": TARGET_GROUP}),
+
+        Case("manager", "list_resource_groups", lambda: manager().list_resource_groups()),
+        Case("manager", "list_resources_in_group", lambda: manager().list_resources_in_group(TARGET_GROUP)),
+        Case("manager", "sync_inventory_full", lambda: manager().sync_inventory(full=True), needs_store=True),
+        Case("manager", "aggregate_inventory", lambda: manager().aggregate_inventory("location"), needs_store=True),
+        Case("manager", "get_network_issues", lambda: manager().get_network_issues(TARGET_GROUP)),
+        Case("manager", "evaluate_nsg_flows", lambda: manager().evaluate_nsg_flows(TARGET_GROUP, "nsg-0000", flows)),
+        Case("manager", "get_effective_next_hops",
+             lambda: manager().get_effective_next_hops(TARGET_GROUP, hop_queries)),
+        Case("manager", "list_virtual_networks", lambda: manager().list_virtual_networks()),
+        Case("manager", "get_address_conflicts", lambda: manager().get_address_conflicts()),
+        Case("manager", "check_address_prefix", lambda: manager().check_address_prefix("10.0.0.0/25", "vnet-0000")),
+        Case("manager", "list_failed_deployments", lambda: manager().list_failed_deployments(TARGET_GROUP, since)),
+        Case("manager", "diagnose_deployment_error",
+             lambda: manager().diagnose_deployment_error("deploy-failed-00", TARGET_GROUP),
+             check=_diagnosis_error),
+        Case("manager", "get_deployment_failure_tree",
+             lambda: manager().get_deployment_failure_tree("deploy-failed-00", TARGET_GROUP)),
+
+        Case("sync_manager", "list_resource_groups", sync_manager.list_resource_groups,
+             check=lambda result: None if result else "no resource groups"),
+        Case("sync_manager", "list_resources_in_group", lambda: sync_manager.list_resources_in_group(TARGET_GROUP)),
+        Case("sync_manager", "get_network_issues", lambda: sync_manager.get_network_issues(TARGET_GROUP)),
+        Case("sync_manager", "diagnose_deployment_error",
+             lambda: sync_manager.diagnose_deployment_error("deploy-failed-00", TARGET_GROUP),
+             check=_diagnosis_error),
+
+        Case("agent", "analyze_deployment_error",
+             lambda: agent().analyze_deployment_error_with_cache_info({**deployment, "error": ERROR_DETAILS}),
+             llm=True),
+        Case("agent", "analyze_deployment_error_streamed", streamed_analysis, llm=True),
+        Case("agent", "analyze_azure_resources", lambda: agent().analyze_azure_resources(group_resources), llm=True),
+        Case("agent", "suggest_next_steps", lambda: agent().suggest_next_steps(ERROR_DETAILS), llm=True,
+             check=lambda result: None),
+    ]
+
+
+async def run_worker(args) -> Dict[str, Any]:
+    from src import azure_clients, mcp_server
+    from src.azure_clients import AzureClientPool
+    from src.inventory_cache import get_inventory_cache
+
+    # Per-request INFO logs (and the SDK's header dumps) would drown the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("azure").setLevel(logging.WARNING)
+
+    started = time.perf_counter()
+    estate = SyntheticEstate(args.scale, seed=args.seed)
+    generate_ms = (time.perf_counter() - started) * 1000
+    router = ArmRouter(estate, latency_s=args.arm_latency_ms / 1000,
+                       subscriptions=[SUBSCRIPTION_ID] + [f"{SUBSCRIPTION_ID[:-5]}{index:05d}"
+                                                          for index in range(1, args.subscriptions)])
+    pool = AzureClientPool(
+        FakeCredential(), AsyncFakeCredential(),
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    # The tools resolve their clients through the process-wide pool
+    azure_clients._client_pool = pool
+
+    cold = args.cache_mode == "cold"
+    cache = get_inventory_cache()
+    reset = (lambda: cache.invalidate()) if cold else (lambda: None)
+
+    cases = build_cases(estate, pool, mcp_server)
+    registered = {tool.name for tool in await mcp_server.mcp_server.list_tools()}
+    covered = {case.name for case in cases if case.kind == "tool"}
+
+    results = []
+    for case in cases:
+        if args.only and not fnmatch.fnmatch(case.key, args.only):
+            continue
+        entry: Dict[str, Any] = {"scale": args.scale, "kind": case.kind, "name": case.name}
+        if case.needs_store and cold:
+            results.append({**entry, "skipped": "needs the inventory store (use --cache-mode warm)"})
+            continue
+        iterations = args.llm_iterations if case.llm else args.iterations
+        arm_before = sum(router.requests.values())
+        try:
+            entry.update(await measure(case, iterations, args.max_seconds, reset))
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"[:300]
+        entry["arm_requests"] = sum(router.requests.values()) - arm_before
+        results.append(entry)
+        print(f"  {args.scale:>6} {case.key:<50} p50 {entry.get('p50_ms', '-'):>9} ms"
+              f"{'  ERROR ' + entry['error'][:60] if 'error' in entry else ''}", file=sys.stderr)
+
+    await mcp_server._shutdown()
+    return {
+        "scale": args.scale,
+        "estate": estate.summary(),
+        "generate_ms": round(generate_ms, 1),
+        "tools_not_covered": sorted(registered - covered),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+        "results": results,
+    }
+
+
+def worker(args) -> int:
+    stub = OpenAIStub(first_token_ms=args.llm_first_token_ms, chunk_interval_ms=args.llm_chunk_interval_ms,
+                      chunks=args.llm_chunks).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-suite-") as directory:
+            # Configuration is read at import time, so the environment is set before src is imported
+            cold = args.cache_mode == "cold"
+            os.environ.update({
+                **stub.environment(),
+                "AZURE_SUBSCRIPTION_ID": SUBSCRIPTION_ID,
+                "INVENTORY_STORE_ENABLED": "false" if cold else "true",
+                "INVENTORY_STORE_PATH": str(Path(directory) / "inventory.sqlite3"),
+                "LLM_CACHE_ENABLED": "false" if cold else "true",
+                "LLM_CACHE_PATH": str(Path(directory) / "llm_results.sqlite3"),
+                "STARTUP_WARMUP": "false",
+            })
+            report = asyncio.run(run_worker(args))
+        report["llm_stub"] = stub.stats()
+    finally:
+        stub.stop()
+    print(json.dumps(report))
+    return 0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> List[Dict[str, Any]]:
+    """p50 ratios against a previous run (ratio > 1 means slower now)"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {(entry["scale"], entry["kind"], entry["name"]): entry
+                for scale in baseline["scales"] for entry in scale["results"]}
+    changes = []
+    for entry in results:
+        before = previous.get((entry["scale"], entry["kind"], entry["name"]))
+        if not before or "p50_ms" not in entry or not before.get("p50_ms"):
+            continue
+        changes.append({
+            "scale": entry["scale"], "kind": entry["kind"], "name": entry["name"],
+            "p50_ms": entry["p50_ms"], "baseline_p50_ms": before["p50_ms"],
+            "p50_ratio": round(entry["p50_ms"] / before["p50_ms"], 3),
+            "alloc_peak_ratio": round(entry["alloc_peak_kib"] / before["alloc_peak_kib"], 3)
+            if before.get("alloc_peak_kib") else None,
+        })
+    return sorted(changes, key=lambda change: -change["p50_ratio"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="10,1000,10000,50000", help="comma-separated estate sizes (resources)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--llm-iterations", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=10, help="time budget per case (at least 3 samples)")
+    parser.add_argument("--cache-mode", choices=["cold", "warm"], default="cold")
+    parser.add_argument("--arm-latency-ms", type=float, default=0, help="added to every fake ARM request")
+    parser.add_argument("--subscriptions", type=int, default=4,
+                        help="fake subscriptions (all serving the estate) for the fan-out tools")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300)
+    parser.add_argument("--llm-chunk-interval-ms", type=float, default=15)
+    parser.add_argument("--llm-chunks", type=int, default=40)
+    parser.add_argument("--only", help="glob over kind:name, e.g. 'tool:*' or '*network*'")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON report to compare p50 latencies against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    scales = []
+    for scale in (int(value) for value in args.scales.split(",")):
+        print(f"Scale {scale}:", file=sys.stderr)
+        command = [sys.executable, __file__, "--worker", "--scale", str(scale)]
+        for option in ("iterations", "llm_iterations", "max_seconds", "cache_mode", "arm_latency_ms",
+                       "subscriptions", "llm_first_token_ms", "llm_chunk_interval_ms", "llm_chunks", "only", "seed"):
+            value = getattr(args, option)
+            if value is not None:
+                command += [f"--{option.replace('_', '-')}", str(value)]
+        completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                                   env={**os.environ, "PYTHONWARNINGS": "ignore"})
+        if completed.returncode != 0:
+            print(f"Worker for scale {scale} failed", file=sys.stderr)
+            return 1
+        scales.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "settings": {key: value for key, value in vars(args).items()
+                         if key not in ("worker", "scale", "output", "compare")},
+        },
+        "scales": scales,
+    }
+    if args.compare:
+        report["comparison"] = compare([entry for scale in scales for entry in scale["results"]], args.compare)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    failed = [entry for scale in scales for entry in scale["results"] if "error" in entry]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
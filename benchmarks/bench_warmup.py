@@ -0,0 +1,206 @@
+"""
+Startup Warmup Benchmark
+
+Starts the streamable-http server in a fresh interpreter (fake ARM transport,
+a credential whose first token takes a while to acquire, local OpenAI stub),
+waits for /ready and then compares the latency of the first call of each
+tool with its steady state, once without and once with the startup warmup
+(WARMUP_RESOURCE_GROUPS set to the benchmark's target group). With warmup,
+the first calls should cost what later calls do.
+
+Usage: python benchmarks/bench_warmup.py [--calls 5] [--token-ms 400] [--llm-first-token-ms 300]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_backends import (  # noqa: E402
+    SUBSCRIPTION_ID,
+    TARGET_GROUP,
+    ArmRouter,
+    AsyncFakeArmTransport,
+    AsyncFakeCredential,
+    FakeArmTransport,
+    FakeCredential,
+    OpenAIStub,
+    SyntheticEstate,
+)
+
+ACCEPT = "application/json, text/event-stream"
+
+TOOL_CALLS = [
+    ("get_azure_resource_groups", {}),
+    ("list_azure_resources_in_group", {"resource_group": TARGET_GROUP, "page_size": 200}),
+    ("get_ai_troubleshooting_advice", {"error_details": "Subnet is in use and cannot be deleted"}),
+]
+
+
+class CachingSlowCredential(AsyncFakeCredential):
+    """The first token takes token_s to acquire, later ones come from the cache, like a real credential"""
+
+    def __init__(self, token_s: float):
+        self.token_s = token_s
+        self._token = None
+
+    async def get_token(self, *scopes, **kwargs):
+        if self._token is None:
+            await asyncio.sleep(self.token_s)
+            self._token = await super().get_token(*scopes, **kwargs)
+        return self._token
+
+
+async def call_tool(client, headers: Dict[str, str], number: int, tool: str, arguments: Dict[str, Any]) -> float:
+    started = time.perf_counter()
+    response = await client.post("/mcp/", headers=headers, json={
+        "jsonrpc": "2.0", "id": number, "method": "tools/call", "params": {"name": tool, "arguments": arguments}})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    if '"isError":true' in response.text or '\\"error\\"' in response.text:
+        raise RuntimeError(f"{tool} failed: {response.text[:300]}")
+    return round(elapsed * 1000, 1)
+
+
+async def run_server(args) -> Dict[str, Any]:
+    import logging
+
+    import httpx
+    import uvicorn
+
+    from src import azure_clients, mcp_server
+    from src.azure_clients import AzureClientPool
+
+    estate = SyntheticEstate(args.resources)
+    router = ArmRouter(estate, latency_s=args.arm_latency_ms / 1000)
+    azure_clients._client_pool = AzureClientPool(
+        FakeCredential(), CachingSlowCredential(args.token_ms / 1000),
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    logging.getLogger().setLevel(logging.ERROR)
+
+    started = time.perf_counter()
+    server = uvicorn.Server(uvicorn.Config(mcp_server.build_http_app(), host="127.0.0.1", port=args.port,
+                                           log_level="warning", lifespan="on"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    accepting_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=120) as client:
+        while (ready := await client.get("/ready")).status_code != 200:
+            await asyncio.sleep(0.02)
+        ready_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        headers = {"Accept": ACCEPT}
+        response = await client.post("/mcp/", headers=headers, json={
+            "jsonrpc": "2.0", "id": 0, "method": "initialize",
+            "params": {"protocolVersion": "2025-03-26", "capabilities": {},
+                       "clientInfo": {"name": "bench", "version": "1"}},
+        })
+        response.raise_for_status()
+        headers["mcp-session-id"] = response.headers["mcp-session-id"]
+        await client.post("/mcp/", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+        tools = {}
+        number = 1
+        for tool, arguments in TOOL_CALLS:
+            samples = []
+            for _ in range(args.calls + 1):
+                samples.append(await call_tool(client, headers, number, tool, arguments))
+                number += 1
+            steady = statistics.median(samples[1:])
+            tools[tool] = {"first_ms": samples[0], "steady_ms": round(steady, 1),
+                           "first_over_steady": round(samples[0] / steady, 2)}
+        await client.delete("/mcp/", headers=headers)
+
+    server.should_exit = True
+    await serving
+    return {
+        "accepting_ms": accepting_ms,
+        "ready_ms": ready_ms,
+        "warm": ready.json()["warm"],
+        "tools": tools,
+        "arm_requests": sum(router.requests.values()),
+    }
+
+
+def serve_once(args) -> int:
+    stub = OpenAIStub(first_token_ms=args.llm_first_token_ms, chunks=args.llm_chunks).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-warmup-") as directory:
+            # Configuration is read at import time, so the environment is set before src is imported
+            os.environ.update({
+                **stub.environment(),
+                "AZURE_SUBSCRIPTION_ID": SUBSCRIPTION_ID,
+                "STARTUP_WARMUP": "true" if args.mode == "on" else "false",
+                "WARMUP_RESOURCE_GROUPS": TARGET_GROUP,
+                "INVENTORY_STORE_PATH": str(Path(directory) / "inventory.sqlite3"),
+                "LLM_CACHE_ENABLED": "false",
+                "LOG_LEVEL": "ERROR",
+                "FASTMCP_LOG_LEVEL": "ERROR",
+            })
+            report = asyncio.run(run_server(args))
+    finally:
+        stub.stop()
+    print(json.dumps(report))
+    return 0
+
+
+def free_port() -> int:
+    import socket
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=5, help="steady-state calls per tool after the first")
+    parser.add_argument("--resources", type=int, default=5000, help="synthetic estate size")
+    parser.add_argument("--arm-latency-ms", type=float, default=20, help="added to every fake ARM request")
+    parser.add_argument("--token-ms", type=float, default=400, help="time to acquire the first ARM token")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300)
+    parser.add_argument("--llm-chunks", type=int, default=20)
+    parser.add_argument("--mode", choices=["off", "on"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return serve_once(args)
+
+    runs = {}
+    for mode in ("off", "on"):
+        command = [sys.executable, __file__, "--mode", mode, f"--port={free_port()}"] + [
+            f"--{option.replace('_', '-')}={getattr(args, option)}"
+            for option in ("calls", "resources", "arm_latency_ms", "token_ms", "llm_first_token_ms", "llm_chunks")
+        ]
+        completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                                   env={**os.environ, "PYTHONWARNINGS": "ignore"})
+        if completed.returncode != 0:
+            print(f"Run with warmup {mode} failed", file=sys.stderr)
+            return 1
+        runs[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"  warmup {mode:<3} ready after {runs[mode]['ready_ms']} ms", file=sys.stderr)
+        for tool, stats in runs[mode]["tools"].items():
+            print(f"    {tool:<32} first {stats['first_ms']:>8} ms  steady {stats['steady_ms']:>8} ms  "
+                  f"x{stats['first_over_steady']}", file=sys.stderr)
+    print(json.dumps({"settings": vars(args), "runs": runs}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
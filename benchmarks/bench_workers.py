@@ -0,0 +1,223 @@
+"""
+Worker Scaling Benchmark
+
+Serves the MCP app over streamable-http from 1, 2, 4 and 8 worker processes
+behind the supervisor, each worker talking to the fake ARM transport, and
+drives it with concurrent MCP sessions calling a mix of read tools. Reported
+per worker count: tool calls per second, latency percentiles, ARM requests
+summed over the workers (the shared cache should keep this flat as workers
+are added) and how the supervisor spread the sessions.
+
+Usage: python benchmarks/bench_workers.py [--workers 1,2,4,8] [--sessions 16] [--calls 20]
+                                          [--resources N] [--arm-latency-ms N] [--no-shared-cache]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_backends import SUBSCRIPTION_ID, TARGET_GROUP, SyntheticEstate  # noqa: E402
+
+ACCEPT = "application/json, text/event-stream"
+
+
+def bench_worker(index: int, socket_path: str):
+    """Worker entry point: the regular worker with the fake ARM transport installed"""
+    from fake_backends import ArmRouter, AsyncFakeArmTransport, AsyncFakeCredential, FakeArmTransport, FakeCredential
+
+    from src import azure_clients
+    from src.azure_clients import AzureClientPool
+    from src.workers import serve_worker
+
+    estate = SyntheticEstate(int(os.environ["BENCH_RESOURCES"]))
+    router = ArmRouter(estate, latency_s=float(os.environ["BENCH_ARM_LATENCY_MS"]) / 1000)
+    azure_clients._client_pool = AzureClientPool(
+        FakeCredential(), AsyncFakeCredential(),
+        transport_factory=lambda: FakeArmTransport(router),
+        async_transport_factory=lambda: AsyncFakeArmTransport(router),
+    )
+    # uvicorn re-raises SIGTERM once it has shut down; exit normally so the counts get written
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        serve_worker(index, socket_path)
+    finally:
+        output = Path(os.environ["BENCH_OUTPUT_DIR"]) / f"arm-{index}-{os.getpid()}.json"
+        output.write_text(json.dumps(router.requests))
+
+
+def serve(args):
+    from src.workers import serve_workers
+
+    asyncio.run(serve_workers(args.serve_workers, "127.0.0.1", args.port, "warning", target=bench_worker))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def tool_calls(estate: SyntheticEstate) -> List[Dict[str, Any]]:
+    return [
+        {"name": "get_azure_resource_groups", "arguments": {}},
+        {"name": "find_address_space_conflicts", "arguments": {}},
+        {"name": "evaluate_nsg_flows", "arguments": {
+            "resource_group": TARGET_GROUP, "nsg_name": "nsg-0000", "flows": estate.sample_flows(20)}},
+        {"name": "list_azure_resources_in_group", "arguments": {
+            "resource_group": TARGET_GROUP, "page_size": 200, "fields": ["id", "name", "type"]}},
+    ]
+
+
+def sse_result(response) -> Dict[str, Any]:
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                return json.loads(line[5:])
+        raise ValueError("No data in event stream")
+    return response.json()
+
+
+async def session(client, calls: List[Dict[str, Any]], count: int, offset: int, latencies: List[float],
+                  errors: Counter):
+    import httpx
+
+    headers = {"Accept": ACCEPT}
+    response = await client.post("/mcp/", headers=headers, json={
+        "jsonrpc": "2.0", "id": 0, "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {},
+                   "clientInfo": {"name": "bench", "version": "1"}},
+    })
+    response.raise_for_status()
+    headers["mcp-session-id"] = response.headers["mcp-session-id"]
+    await client.post("/mcp/", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    for number in range(count):
+        call = calls[(offset + number) % len(calls)]
+        started = time.perf_counter()
+        try:
+            response = await client.post("/mcp/", headers=headers, json={
+                "jsonrpc": "2.0", "id": number + 1, "method": "tools/call", "params": call})
+            result = sse_result(response)
+            if "error" in result or result["result"].get("isError"):
+                errors[call["name"]] += 1
+        except (httpx.HTTPError, ValueError):
+            errors[call["name"]] += 1
+        latencies.append(time.perf_counter() - started)
+    await client.delete("/mcp/", headers=headers)
+
+
+async def drive(port: int, args, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    limits = httpx.Limits(max_connections=args.sessions)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(session(client, calls, args.calls, index, latencies, errors)
+                               for index in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+        workers = (await client.get("/workers")).json()
+    latencies.sort()
+    return {
+        "tool_calls": len(latencies),
+        "errors": dict(errors),
+        "calls_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "requests_per_worker": [worker["requests"] for worker in workers["workers"]],
+    }
+
+
+async def wait_for(port: int, process: subprocess.Popen, timeout: float = 120):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Supervisor exited with code {process.returncode}")
+            try:
+                await client.get("/workers")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError("Supervisor did not start")
+
+
+def run_once(workers: int, args, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="bench-workers-") as directory:
+        port = free_port()
+        env = {
+            **os.environ,
+            "PYTHONWARNINGS": "ignore",
+            "LOG_LEVEL": "WARNING",
+            "FASTMCP_LOG_LEVEL": "WARNING",
+            "AZURE_SUBSCRIPTION_ID": SUBSCRIPTION_ID,
+            "STARTUP_WARMUP": "false",
+            "INVENTORY_STORE_PATH": os.path.join(directory, "inventory.sqlite3"),
+            "SHARED_CACHE_PATH": os.path.join(directory, "shared_cache.sqlite3"),
+            "SHARED_CACHE_ENABLED": "false" if args.no_shared_cache else "true",
+            "BENCH_RESOURCES": str(args.resources),
+            "BENCH_ARM_LATENCY_MS": str(args.arm_latency_ms),
+            "BENCH_OUTPUT_DIR": directory,
+        }
+        process = subprocess.Popen(
+            [sys.executable, __file__, "--serve-workers", str(workers), "--port", str(port)], env=env, cwd=ROOT
+        )
+        try:
+            asyncio.run(wait_for(port, process))
+            result = asyncio.run(drive(port, args, calls))
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+        arm = Counter()
+        for output in Path(directory).glob("arm-*.json"):
+            arm.update(json.loads(output.read_text()))
+    # Each worker builds the estate once at startup; that is not ARM traffic
+    return {"workers": workers, **result, "arm_requests": sum(arm.values()), "arm_routes": dict(arm)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent MCP sessions")
+    parser.add_argument("--calls", type=int, default=20, help="tool calls per session")
+    parser.add_argument("--resources", type=int, default=5000, help="synthetic estate size")
+    parser.add_argument("--arm-latency-ms", type=float, default=20, help="added to every fake ARM request")
+    parser.add_argument("--no-shared-cache", action="store_true", help="give every worker its own caches")
+    parser.add_argument("--serve-workers", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_workers:
+        serve(args)
+        return
+
+    calls = tool_calls(SyntheticEstate(args.resources))
+    results = []
+    for workers in [int(value) for value in args.workers.split(",")]:
+        result = run_once(workers, args, calls)
+        results.append(result)
+        print(f"  {workers} workers  {result['calls_per_s']:>7} calls/s  p50 {result['p50_ms']:>7} ms  "
+              f"p95 {result['p95_ms']:>7} ms  {result['arm_requests']:>5} ARM requests  "
+              f"errors {sum(result['errors'].values())}", file=sys.stderr)
+    print(json.dumps({"cpu_count": os.cpu_count(), "sessions": args.sessions, "calls_per_session": args.calls,
+                      "shared_cache": not args.no_shared_cache, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,780 @@
+"""
+Fake Backends for Benchmarks
+
+Recorded-response stand-ins for the services the tools talk to, so their cost
+can be measured without Azure or OpenAI:
+
+- SyntheticEstate: a generated subscription (resource groups, resources, a
+  network topology with NSGs, route tables and overlaps, failed nested
+  deployments) in ARM REST JSON, at any scale.
+- FakeArmTransport / AsyncFakeArmTransport: azure-core transports that serve
+  that estate to the real management SDK clients, with nextLink paging, a
+  configurable per-request latency and optional ARM-style read throttling
+  (a token bucket answering 429 with Retry-After and remaining-reads
+  headers). Plug them in through AzureClientPool's transport factories.
+- OpenAIStub: a local Azure OpenAI compatible chat completions server with
+  configurable time to first token, chunking and SSE streaming. It serves
+  HTTPS with a throwaway self-signed certificate, since Semantic Kernel only
+  accepts https endpoints (the agent's HTTP client does not verify TLS).
+"""
+
+import asyncio
+import contextlib
+import json
+import math
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from azure.core.credentials import AccessToken
+from azure.core.pipeline.transport import AsyncHttpTransport, HttpTransport
+from azure.core.rest._http_response_impl import RestHttpClientTransportResponse
+from azure.core.rest._http_response_impl_async import RestAsyncHttpClientTransportResponse
+
+ARM_HOST = "https://management.azure.com"
+SUBSCRIPTION_ID = "00000000-0000-0000-0000-00000000bench"
+TENANT_ID = "00000000-0000-0000-0000-0000000tenant"
+TARGET_GROUP = "rg-bench-000"
+PAGE_SIZE = 1000
+
+# Filler resource types (type, kind, sku) for everything that isn't networking
+_FILLER_TYPES = [
+    ("Microsoft.Compute/virtualMachines", None, "Standard_D4s_v5"),
+    ("Microsoft.Compute/disks", None, "Premium_LRS"),
+    ("Microsoft.Storage/storageAccounts", "StorageV2", "Standard_LRS"),
+    ("Microsoft.Web/sites", "app", None),
+    ("Microsoft.KeyVault/vaults", None, "standard"),
+    ("Microsoft.Insights/components", "web", None),
+    ("Microsoft.Sql/servers/databases", "v12.0,user", "S1"),
+]
+
+_ERROR_SIGNATURES = [
+    ("InUseSubnetCannotBeDeleted", "Subnet {name} is in use by {resource} and cannot be deleted."),
+    ("QuotaExceeded", "Operation could not be completed as it results in exceeding approved Total Regional Cores quota."),
+]
+
+
+class FakeCredential:
+    """Token credential that never leaves the process"""
+
+    def get_token(self, *scopes, **kwargs) -> AccessToken:
+        return AccessToken("fake-token", int(time.time()) + 3600)
+
+    def close(self):
+        pass
+
+
+class AsyncFakeCredential:
+    async def get_token(self, *scopes, **kwargs) -> AccessToken:
+        return AccessToken("fake-token", int(time.time()) + 3600)
+
+    async def close(self):
+        pass
+
+
+def _iso(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class SyntheticEstate:
+    """A generated subscription of `resource_count` resources in ARM REST JSON
+
+    About half of the resources, and all networking, live in TARGET_GROUP so the
+    per-group tools scale with the estate.
+    """
+
+    def __init__(self, resource_count: int, seed: int = 7, subscription_id: str = SUBSCRIPTION_ID,
+                 failed_deployments: int = 6, nested_fanout: int = 3):
+        self.resource_count = resource_count
+        self.subscription_id = subscription_id
+        self.rng = random.Random(seed)
+        self.now = datetime.now(timezone.utc)
+        group_count = max(2, min(100, resource_count // 500))
+        self.groups = [f"rg-bench-{index:03d}" for index in range(group_count)]
+        self.resources: Dict[str, List[Dict[str, Any]]] = {group: [] for group in self.groups}
+        self.network: Dict[str, List[Dict[str, Any]]] = {}
+        self.deployments: Dict[str, Dict[str, Any]] = {}
+        self.operations: Dict[str, List[Dict[str, Any]]] = {}
+        self._operation_count = 0
+
+        self._build_network(max(1, resource_count // 250))
+        self._build_filler()
+        self._build_deployments(failed_deployments, nested_fanout)
+
+    # ----- generation -----
+
+    def _id(self, group: str, provider_path: str) -> str:
+        return f"/subscriptions/{self.subscription_id}/resourceGroups/{group}/providers/{provider_path}"
+
+    def _resource(self, group: str, resource_type: str, name: str, kind: str = None, sku: str = None,
+                  properties: Dict[str, Any] = None) -> Dict[str, Any]:
+        created = self.now - timedelta(days=self.rng.randint(1, 400))
+        record = {
+            "id": self._id(group, f"{resource_type}/{name}"),
+            "name": name,
+            "type": resource_type,
+            "location": self.rng.choice(["westeurope", "northeurope", "eastus2"]),
+            "createdTime": _iso(created),
+            "changedTime": _iso(created + timedelta(hours=self.rng.randint(0, 2000))),
+            "provisioningState": "Succeeded",
+        }
+        if kind:
+            record["kind"] = kind
+        if sku:
+            record["sku"] = {"name": sku}
+        self.resources[group].append(record)
+        if properties is not None:
+            full = {key: record[key] for key in ("id", "name", "type", "location")}
+            full["properties"] = {"provisioningState": "Succeeded", **properties}
+            return full
+        return record
+
+    def _build_network(self, vnet_count: int):
+        group = TARGET_GROUP
+        vnets, nsgs, route_tables, nics, public_ips, load_balancers = [], [], [], [], [], []
+        for index in range(vnet_count):
+            name = f"vnet-{index:04d}"
+            vnet_id = self._id(group, f"Microsoft.Network/virtualNetworks/{name}")
+            # Every 50th VNet reuses its predecessor's space: realistic overlap findings
+            space_index = index - 1 if index and index % 50 == 0 else index
+            space = f"10.{space_index // 256}.{space_index % 256}.0/24"
+            nsg_id = self._id(group, f"Microsoft.Network/networkSecurityGroups/nsg-{index:04d}")
+            route_table_id = self._id(group, f"Microsoft.Network/routeTables/rt-{index:04d}")
+            subnets = []
+            for subnet_index in range(4):
+                subnet_props = {"addressPrefix": f"10.{space_index // 256}.{space_index % 256}.{subnet_index * 64}/26"}
+                # The last subnet has no NSG so the issue checks have something to report
+                if subnet_index < 3:
+                    subnet_props["networkSecurityGroup"] = {"id": nsg_id}
+                if subnet_index == 0:
+                    subnet_props["routeTable"] = {"id": route_table_id}
+                subnets.append({
+                    "id": f"{vnet_id}/subnets/snet-{subnet_index}",
+                    "name": f"snet-{subnet_index}",
+                    "properties": subnet_props,
+                })
+            peerings = []
+            if index + 1 < vnet_count and index % 3 == 0:
+                remote = self._id(group, f"Microsoft.Network/virtualNetworks/vnet-{index + 1:04d}")
+                peerings.append({
+                    "id": f"{vnet_id}/virtualNetworkPeerings/peer-{index + 1:04d}",
+                    "name": f"peer-{index + 1:04d}",
+                    "properties": {"remoteVirtualNetwork": {"id": remote}, "peeringState": "Connected"},
+                })
+            vnets.append(self._resource(group, "Microsoft.Network/virtualNetworks", name, properties={
+                "addressSpace": {"addressPrefixes": [space]},
+                "subnets": subnets,
+                "virtualNetworkPeerings": peerings,
+            }))
+            nsgs.append(self._resource(group, "Microsoft.Network/networkSecurityGroups", f"nsg-{index:04d}", properties={
+                "securityRules": [self._security_rule(nsg_id, rule) for rule in range(20)],
+                "subnets": [{"id": subnet["id"]} for subnet in subnets[:3]],
+            }))
+            route_tables.append(self._resource(group, "Microsoft.Network/routeTables", f"rt-{index:04d}", properties={
+                "routes": [
+                    {"name": f"route-{route}", "properties": {
+                        "addressPrefix": f"172.{16 + route}.{index % 256}.0/24",
+                        "nextHopType": "VirtualAppliance", "nextHopIpAddress": "10.255.0.4"}}
+                    for route in range(10)
+                ] + [{"name": "default", "properties": {"addressPrefix": "0.0.0.0/0", "nextHopType": "VirtualAppliance",
+                                                         "nextHopIpAddress": "10.255.0.4"}}],
+                "subnets": [{"id": subnets[0]["id"]}],
+            }))
+            if index % 4 == 0:
+                load_balancers.append(self._resource(
+                    group, "Microsoft.Network/loadBalancers", f"lb-{index:04d}", sku="Standard",
+                    properties={"backendAddressPools": [], "frontendIPConfigurations": []}
+                ))
+
+        vnet_subnets = [subnet["id"] for vnet in vnets for subnet in vnet["properties"]["subnets"]]
+        for index in range(max(1, self.resource_count // 25)):
+            nics.append(self._resource(group, "Microsoft.Network/networkInterfaces", f"nic-{index:05d}", properties={
+                "ipConfigurations": [{"name": "ipconfig1", "properties": {
+                    "subnet": {"id": self.rng.choice(vnet_subnets)},
+                    "privateIPAddress": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+                    "privateIPAllocationMethod": "Dynamic"}}],
+            }))
+        for index in range(max(1, self.resource_count // 100)):
+            public_ips.append(self._resource(
+                group, "Microsoft.Network/publicIPAddresses", f"pip-{index:05d}", sku="Standard",
+                properties={"ipAddress": f"20.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+                            "publicIPAllocationMethod": "Static"}
+            ))
+
+        self.network = {
+            "virtualnetworks": vnets,
+            "networksecuritygroups": nsgs,
+            "routetables": route_tables,
+            "networkinterfaces": nics,
+            "publicipaddresses": public_ips,
+            "loadbalancers": load_balancers,
+            "applicationgateways": [],
+        }
+
+    def _security_rule(self, nsg_id: str, index: int) -> Dict[str, Any]:
+        return {
+            "id": f"{nsg_id}/securityRules/rule-{index}",
+            "name": f"rule-{index}",
+            "properties": {
+                "priority": 100 + index * 10,
+                "direction": "Inbound" if index % 2 == 0 else "Outbound",
+                "access": "Allow" if index % 3 else "Deny",
+                "protocol": ["Tcp", "Udp", "*"][index % 3],
+                "sourceAddressPrefix": "VirtualNetwork" if index % 4 == 0 else f"10.{index}.0.0/16",
+                "sourcePortRange": "*",
+                "destinationAddressPrefix": "*",
+                "destinationPortRange": str(1000 + index * 7),
+            },
+        }
+
+    def _build_filler(self):
+        remaining = max(0, self.resource_count - sum(len(records) for records in self.resources.values()))
+        target_share = max(0, self.resource_count // 2 - len(self.resources[TARGET_GROUP]))
+        for index in range(remaining):
+            group = TARGET_GROUP if index < target_share else self.groups[1 + index % (len(self.groups) - 1)]
+            resource_type, kind, sku = _FILLER_TYPES[index % len(_FILLER_TYPES)]
+            self._resource(group, resource_type, f"res-{index:06d}", kind, sku)
+
+    def _build_deployments(self, failed: int, fanout: int):
+        for index in range(failed):
+            self._deployment(f"deploy-failed-{index:02d}", depth=0, fanout=fanout, signature=index % 2,
+                             timestamp=self.now - timedelta(minutes=5 + index))
+        for index in range(2):
+            name = f"deploy-ok-{index:02d}"
+            self.deployments[name.lower()] = self._deployment_record(name, "Succeeded", None,
+                                                                     self.now - timedelta(hours=2))
+            self.operations[name.lower()] = []
+
+    def _deployment_record(self, name: str, state: str, error: Optional[Dict[str, Any]],
+                           timestamp: datetime) -> Dict[str, Any]:
+        properties = {"provisioningState": state, "timestamp": _iso(timestamp), "mode": "Incremental"}
+        if error:
+            properties["error"] = error
+        return {
+            "id": self._id(TARGET_GROUP, f"Microsoft.Resources/deployments/{name}"),
+            "name": name,
+            "type": "Microsoft.Resources/deployments",
+            "properties": properties,
+        }
+
+    def _deployment(self, name: str, depth: int, fanout: int, signature: int, timestamp: datetime):
+        code, template = _ERROR_SIGNATURES[signature]
+        operations = []
+        if depth < 2:
+            for child in range(fanout):
+                child_name = f"{name}-n{child}"
+                self._deployment(child_name, depth + 1, fanout, signature, timestamp)
+                operations.append(self._operation(name, len(operations), "Microsoft.Resources/deployments",
+                                                  child_name, "DeploymentFailed",
+                                                  "At least one resource deployment operation failed."))
+        else:
+            operations.append(self._operation(
+                name, 0, "Microsoft.Network/virtualNetworks/subnets", f"vnet-0000/snet-{depth}", code,
+                template.format(name=f"snet-{depth}", resource=f"nic-{self.rng.randint(0, 99):05d}")
+            ))
+        operations.append(self._operation(name, len(operations), "Microsoft.Storage/storageAccounts",
+                                          f"st{name.replace('-', '')[:18]}", None, None))
+        error = {"code": "DeploymentFailed", "message": "At least one resource deployment operation failed.",
+                 "details": [{"code": code, "message": template.format(name="snet", resource="nic")}]}
+        self.deployments[name.lower()] = self._deployment_record(name, "Failed", error, timestamp)
+        self.operations[name.lower()] = operations
+
+    def _operation(self, deployment: str, index: int, resource_type: str, resource_name: str,
+                   code: Optional[str], message: Optional[str]) -> Dict[str, Any]:
+        self._operation_count += 1
+        operation_id = f"{self._operation_count:016X}"
+        if resource_type == "Microsoft.Resources/deployments":
+            target_id = self._id(TARGET_GROUP, f"Microsoft.Resources/deployments/{resource_name}")
+        else:
+            target_id = self._id(TARGET_GROUP, f"{resource_type}/{resource_name}")
+        properties = {
+            "provisioningState": "Failed" if code else "Succeeded",
+            "timestamp": _iso(self.now),
+            "statusCode": "Conflict" if code else "OK",
+            "targetResource": {"id": target_id, "resourceType": resource_type, "resourceName": resource_name},
+        }
+        if code:
+            properties["statusMessage"] = {"status": "Failed", "error": {"code": code, "message": message}}
+        return {
+            "id": self._id(TARGET_GROUP, f"Microsoft.Resources/deployments/{deployment}/operations/{operation_id}"),
+            "operationId": operation_id,
+            "properties": properties,
+        }
+
+    # ----- queries used by the router -----
+
+    def all_resources(self) -> List[Dict[str, Any]]:
+        return [record for records in self.resources.values() for record in records]
+
+    def resource_groups(self) -> List[Dict[str, Any]]:
+        return [{"id": f"/subscriptions/{self.subscription_id}/resourceGroups/{group}", "name": group,
+                 "location": "westeurope", "properties": {"provisioningState": "Succeeded"}}
+                for group in self.groups]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "resources": sum(len(records) for records in self.resources.values()),
+            "resource_groups": len(self.groups),
+            "target_group_resources": len(self.resources[TARGET_GROUP]),
+            "network": {name: len(items) for name, items in self.network.items()},
+            "deployments": len(self.deployments),
+        }
+
+    def sample_flows(self, count: int) -> List[Dict[str, Any]]:
+        """NSG evaluation inputs against nsg-0000"""
+        return [{
+            "direction": "Inbound" if index % 2 == 0 else "Outbound",
+            "protocol": "Tcp" if index % 3 else "Udp",
+            "source_ip": f"10.{index % 20}.{index % 256}.{(index * 7) % 256}",
+            "source_port": 40000 + index % 1000,
+            "destination_ip": "10.0.0.10",
+            "destination_port": 1000 + (index % 20) * 7,
+        } for index in range(count)]
+
+    def sample_hop_queries(self, count: int) -> List[Dict[str, str]]:
+        """Effective next hop queries from the first subnet of vnet-0000"""
+        return [{"subnet": "vnet-0000/snet-0",
+                 "destination": f"{self.rng.choice([10, 172, 20])}.{self.rng.randint(0, 40)}.{index % 256}.5"}
+                for index in range(count)]
+
+
+class ArmRouter:
+    """Maps ARM REST requests onto a SyntheticEstate, with nextLink paging and pre-serialized pages"""
+
+    _ROUTES = [
+        ("subscriptions", re.compile(r"^/subscriptions$")),
+        ("resource_groups", re.compile(r"^/subscriptions/[^/]+/resourcegroups$")),
+        ("group_resources", re.compile(r"^/subscriptions/[^/]+/resourcegroups/(?P<group>[^/]+)/resources$")),
+        ("resources", re.compile(r"^/subscriptions/[^/]+/resources$")),
+        ("deployments", re.compile(
+            r"^/subscriptions/[^/]+/resourcegroups/(?P<group>[^/]+)/providers/microsoft\.resources/deployments/?$")),
+        ("deployment", re.compile(
+            r"^/subscriptions/[^/]+/resourcegroups/(?P<group>[^/]+)/providers/microsoft\.resources"
+            r"/deployments/(?P<name>[^/]+)$")),
+        # The SDK lists operations without the provider segment
+        ("operations", re.compile(
+            r"^/subscriptions/[^/]+/resourcegroups/(?P<group>[^/]+)(?:/providers/microsoft\.resources)?"
+            r"/deployments/(?P<name>[^/]+)/operations$")),
+        ("network", re.compile(
+            r"^/subscriptions/[^/]+/resourcegroups/(?P<group>[^/]+)/providers/microsoft\.network/(?P<collection>[^/]+)$")),
+        ("all_vnets", re.compile(r"^/subscriptions/[^/]+/providers/microsoft\.network/virtualnetworks$")),
+    ]
+
+    def __init__(self, estate: SyntheticEstate, latency_s: float = 0.0, page_size: int = PAGE_SIZE,
+                 read_rate: Optional[float] = None, read_burst: int = 250,
+                 subscriptions: Optional[List[str]] = None, subscription_latency: Dict[str, float] = None):
+        self.estate = estate
+        self.latency_s = latency_s
+        # Every listed subscription serves the same estate; subscription_latency adds per-subscription delay
+        self.subscriptions = subscriptions or [estate.subscription_id]
+        self.subscription_latency = subscription_latency or {}
+        self.page_size = page_size
+        self.requests: Counter = Counter()
+        self._pages: Dict[Tuple, Tuple[int, bytes]] = {}
+        self._lock = threading.Lock()
+        # Subscription read quota as a token bucket (ARM refills continuously); None disables throttling
+        self.read_rate = read_rate
+        self.read_burst = read_burst
+        self._tokens = float(read_burst)
+        self._refilled = time.monotonic()
+        self.throttled = 0
+
+    def _take_read_token(self) -> Tuple[bool, int, float]:
+        """(allowed, remaining reads, seconds until a token is available)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.read_burst, self._tokens + (now - self._refilled) * self.read_rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True, int(self._tokens), 0.0
+            self.throttled += 1
+            return False, 0, (1 - self._tokens) / self.read_rate
+
+    def latency_for(self, url: str) -> float:
+        """Response time for a request, including any per-subscription delay"""
+        if not self.subscription_latency:
+            return self.latency_s
+        match = re.search(r"/subscriptions/([^/?]+)", url)
+        return self.latency_s + (self.subscription_latency.get(match.group(1), 0.0) if match else 0.0)
+
+    def handle(self, method: str, url: str) -> Tuple[int, bytes, Dict[str, str]]:
+        """respond() behind the read quota, with the headers ARM sends about it"""
+        if self.read_rate is None:
+            return (*self.respond(method, url), {})
+        allowed, remaining, wait = self._take_read_token()
+        if not allowed:
+            status, body = self._error(429, "TooManyRequests", "The request is being throttled.")
+            # ARM sends whole seconds
+            return status, body, {"Retry-After": str(max(1, math.ceil(wait)))}
+        return (*self.respond(method, url), {"x-ms-ratelimit-remaining-subscription-global-reads": str(remaining)})
+
+    def respond(self, method: str, url: str) -> Tuple[int, bytes]:
+        parsed = urlparse(url)
+        path = parsed.path.lower().rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        key = (method, path, query.get("$filter"), query.get("$skiptoken"), query.get("$top"), query.get("$expand"))
+        cached = self._pages.get(key)
+        for route, pattern in self._ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            route, match = "unknown", None
+        with self._lock:
+            self.requests[route] += 1
+        if cached is not None:
+            return cached
+        if match is None:
+            response = self._error(404, "NotFound", f"No fake for {method} {parsed.path}")
+        else:
+            response = getattr(self, f"_{route}")(match, query, parsed)
+        self._pages[key] = response
+        return response
+
+    @staticmethod
+    def _json(status: int, body: Dict[str, Any]) -> Tuple[int, bytes]:
+        return status, json.dumps(body).encode("utf-8")
+
+    def _error(self, status: int, code: str, message: str) -> Tuple[int, bytes]:
+        return self._json(status, {"error": {"code": code, "message": message}})
+
+    def _page(self, items: List[Dict[str, Any]], query: Dict[str, str], parsed) -> Tuple[int, bytes]:
+        start = int(query.get("$skiptoken", 0))
+        page_size = min(self.page_size, int(query.get("$top", self.page_size)))
+        body: Dict[str, Any] = {"value": items[start:start + page_size]}
+        if start + page_size < len(items):
+            next_query = {**query, "$skiptoken": str(start + page_size)}
+            body["nextLink"] = f"{ARM_HOST}{parsed.path}?{urlencode(next_query)}"
+        return self._json(200, body)
+
+    def _group_known(self, group: str) -> bool:
+        return group in self.estate.resources
+
+    def _subscriptions(self, match, query, parsed):
+        return self._page([{"id": f"/subscriptions/{subscription_id}", "subscriptionId": subscription_id,
+                            "tenantId": TENANT_ID, "displayName": f"Synthetic subscription {index}",
+                            "state": "Enabled"}
+                           for index, subscription_id in enumerate(self.subscriptions)], query, parsed)
+
+    def _resource_groups(self, match, query, parsed):
+        return self._page(self.estate.resource_groups(), query, parsed)
+
+    def _group_resources(self, match, query, parsed):
+        if not self._group_known(match["group"]):
+            return self._error(404, "ResourceGroupNotFound", f"Resource group '{match['group']}' could not be found.")
+        records = self.estate.resources[match["group"]]
+        resource_type = re.search(r"resourceType eq '([^']+)'", query.get("$filter") or "")
+        if resource_type:
+            records = [record for record in records if record["type"].lower() == resource_type.group(1).lower()]
+        if not query.get("$expand"):
+            records = [{key: value for key, value in record.items()
+                        if key not in ("createdTime", "changedTime", "provisioningState")}
+                       for record in records]
+        return self._page(records, query, parsed)
+
+    def _resources(self, match, query, parsed):
+        records = self.estate.all_resources()
+        changed = re.search(r"changedTime ge '([^']+)'", query.get("$filter") or "")
+        if changed:
+            since = changed.group(1).replace("Z", "+00:00")
+            records = [record for record in records
+                       if datetime.fromisoformat(record["changedTime"].replace("Z", "+00:00"))
+                       >= datetime.fromisoformat(since)]
+        name = re.search(r"substringof\('((?:[^']|'')*)',\s*name\)", query.get("$filter") or "")
+        if name:
+            needle = name.group(1).replace("''", "'").lower()
+            records = [record for record in records if needle in record["name"].lower()]
+        resource_type = re.search(r"resourceType eq '([^']+)'", query.get("$filter") or "")
+        if resource_type:
+            records = [record for record in records if record["type"].lower() == resource_type.group(1).lower()]
+        return self._page(records, query, parsed)
+
+    def _deployments(self, match, query, parsed):
+        records = list(self.estate.deployments.values()) if match["group"] == TARGET_GROUP else []
+        if "provisioningState eq 'Failed'" in (query.get("$filter") or ""):
+            records = [record for record in records if record["properties"]["provisioningState"] == "Failed"]
+        return self._page(records, query, parsed)
+
+    def _deployment(self, match, query, parsed):
+        record = self.estate.deployments.get(match["name"]) if match["group"] == TARGET_GROUP else None
+        if record is None:
+            return self._error(404, "DeploymentNotFound", f"Deployment '{match['name']}' could not be found.")
+        return self._json(200, record)
+
+    def _operations(self, match, query, parsed):
+        if match["name"] not in self.estate.operations:
+            return self._error(404, "DeploymentNotFound", f"Deployment '{match['name']}' could not be found.")
+        return self._page(self.estate.operations[match["name"]], query, parsed)
+
+    def _network(self, match, query, parsed):
+        items = self.estate.network.get(match["collection"], []) if match["group"] == TARGET_GROUP else []
+        return self._page(items, query, parsed)
+
+    def _all_vnets(self, match, query, parsed):
+        return self._page(self.estate.network["virtualnetworks"], query, parsed)
+
+
+class _RawResponse:
+    """The http.client-like object the azure-core REST transport responses wrap"""
+
+    def __init__(self, status: int, body: bytes, headers: Dict[str, str] = None):
+        self.status = status
+        self.reason = "OK" if status < 400 else "Error"
+        self._body = body
+        self._headers = headers or {}
+
+    def getheaders(self):
+        return [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(self._body))),
+                *self._headers.items()]
+
+    def read(self) -> bytes:
+        return self._body
+
+
+class FakeArmTransport(HttpTransport):
+    """Sync azure-core transport answering from an ArmRouter"""
+
+    def __init__(self, router: ArmRouter):
+        self.router = router
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, request, **kwargs):
+        latency = self.router.latency_for(request.url)
+        if latency:
+            time.sleep(latency)
+        status, body, headers = self.router.handle(request.method, request.url)
+        response = RestHttpClientTransportResponse(request=request,
+                                                   internal_response=_RawResponse(status, body, headers))
+        response.read()
+        return response
+
+
+class AsyncFakeArmTransport(AsyncHttpTransport):
+    """Async azure-core transport answering from an ArmRouter"""
+
+    def __init__(self, router: ArmRouter):
+        self.router = router
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def send(self, request, **kwargs):
+        latency = self.router.latency_for(request.url)
+        if latency:
+            await asyncio.sleep(latency)
+        status, body, headers = self.router.handle(request.method, request.url)
+        response = RestAsyncHttpClientTransportResponse(request=request,
+                                                        internal_response=_RawResponse(status, body, headers))
+        await response.read()
+        return response
+
+
+def _self_signed_certificate(directory: Path) -> Tuple[str, str]:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(minutes=5)).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_file, key_file = directory / "stub.crt", directory / "stub.key"
+    cert_file.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    return str(cert_file), str(key_file)
+
+
+def _reply_pieces(chunks: int) -> List[str]:
+    """The canned reply split into `chunks` streamed pieces"""
+    reply = ("Root cause: the subnet is still referenced by a network interface.\n"
+             "1. Detach the network interface from the subnet\n"
+             "2. Add a dependsOn between the NIC and subnet resources\n"
+             "3. Retry the deployment\n") * 4
+    size = max(1, len(reply) // chunks)
+    return [reply[index * size:(index + 1) * size if index < chunks - 1 else None] for index in range(chunks)]
+
+
+def _stub_app(first_token_s: float, chunk_interval_s: float, chunks: int, deployment: str,
+              max_concurrency: int = 0):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    counters = {"requests": 0, "streamed_requests": 0, "prompt_chars": 0}
+    pieces = _reply_pieces(chunks)
+    # A deployment with fixed capacity: completions beyond max_concurrency wait for a free slot
+    capacity = asyncio.Semaphore(max_concurrency) if max_concurrency else contextlib.nullcontext()
+
+    async def completions(request):
+        payload = await request.json()
+        counters["requests"] += 1
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in payload.get("messages", []))
+        counters["prompt_chars"] += prompt_chars
+        response_id = f"chatcmpl-{counters['requests']}"
+        created = int(time.time())
+        model = payload.get("model") or deployment
+        if not payload.get("stream"):
+            async with capacity:
+                await asyncio.sleep(first_token_s + chunk_interval_s * len(pieces))
+            return JSONResponse({
+                "id": response_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(pieces)}}],
+                "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(pieces) * 2,
+                          "total_tokens": prompt_chars // 4 + len(pieces) * 2},
+            })
+        counters["streamed_requests"] += 1
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str]) -> str:
+            return "data: " + json.dumps({
+                "id": response_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        async def events():
+            async with capacity:
+                await asyncio.sleep(first_token_s)
+                for index, piece in enumerate(pieces):
+                    if index:
+                        await asyncio.sleep(chunk_interval_s)
+                    yield chunk({"content": piece, **({"role": "assistant"} if index == 0 else {})}, None)
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def stats(request):
+        return JSONResponse(counters)
+
+    return Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", completions, methods=["POST"]),
+        Route("/stats", stats),
+    ])
+
+
+def _serve_stub(port: int, first_token_s: float, chunk_interval_s: float, chunks: int, deployment: str,
+                max_concurrency: int = 0):
+    import uvicorn
+
+    with tempfile.TemporaryDirectory(prefix="openai-stub-") as directory:
+        cert_file, key_file = _self_signed_certificate(Path(directory))
+        uvicorn.run(
+            _stub_app(first_token_s, chunk_interval_s, chunks, deployment, max_concurrency),
+            host="127.0.0.1", port=port, log_level="warning", lifespan="off", ssl_certfile=cert_file, ssl_keyfile=key_file
+        )
+
+
+class OpenAIStub:
+    """Local Azure OpenAI compatible chat completions endpoint, served from a separate process
+
+    Each completion waits first_token_ms, then emits `chunks` pieces of text
+    chunk_interval_ms apart (as SSE when the request asks to stream). With
+    max_concurrency, completions beyond it wait for a slot, like a deployment
+    with fixed capacity. Running out of process keeps its CPU and allocations
+    out of the measurements.
+    """
+
+    def __init__(self, first_token_ms: float = 300, chunk_interval_ms: float = 15, chunks: int = 40,
+                 deployment: str = "bench-gpt", max_concurrency: int = 0):
+        self.first_token_s = first_token_ms / 1000
+        self.chunk_interval_s = chunk_interval_ms / 1000
+        self.chunks = chunks
+        self.deployment = deployment
+        self.max_concurrency = max_concurrency
+        self.port = self._free_port()
+        self._process = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"https://127.0.0.1:{self.port}"
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            return probe.getsockname()[1]
+
+    def start(self) -> "OpenAIStub":
+        settings = [self.port, self.first_token_s, self.chunk_interval_s, self.chunks, self.deployment,
+                    self.max_concurrency]
+        self._process = subprocess.Popen([sys.executable, __file__, "openai-stub", json.dumps(settings)])
+        deadline = time.time() + 20
+        while True:
+            try:
+                self.stats()
+                return self
+            except OSError:
+                if time.time() > deadline or self._process.poll() is not None:
+                    self.stop()
+                    raise RuntimeError("OpenAI stub did not start")
+                time.sleep(0.05)
+
+    def stats(self) -> Dict[str, int]:
+        """Requests served so far"""
+        import ssl
+        import urllib.request
+
+        context = ssl._create_unverified_context()
+        with urllib.request.urlopen(f"{self.endpoint}/stats", context=context, timeout=2) as response:
+            return json.loads(response.read())
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=5)
+            self._process = None
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables pointing the troubleshooting agent at this stub"""
+        return {
+            "AZURE_OPENAI_ENDPOINT": self.endpoint,
+            "AZURE_OPENAI_API_KEY": "stub-key",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": self.deployment,
+            "OPENAI_API_KEY": "stub-key",
+        }
+
+
+if __name__ == "__main__":
+    # OpenAIStub.start() runs the stub server in a child process through this entry point
+    if sys.argv[1:2] == ["openai-stub"]:
+        _serve_stub(*json.loads(sys.argv[2]))
@@ -0,0 +1,327 @@
+"""
+Address Overlap Module
+
+Finds overlapping VNet address spaces and subnet prefixes with a sorted sweep
+and answers incremental "would this prefix conflict?" checks. An AddressSpace
+holds the VNets of one or more subscriptions and grows its index as each
+subscription's listing arrives.
+
+CIDR blocks are either nested or disjoint, so two blocks overlap exactly when
+one contains the other. Sorting by (start, -end) turns the sweep into a stack
+of enclosing blocks: O(n log n) plus the number of overlapping pairs.
+"""
+
+import bisect
+import logging
+import re
+import socket
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Deployment error codes/messages that point at address space conflicts
+_CONFLICT_ERROR_RE = re.compile(
+    r"overlap|address ?space|addressprefix|NetcfgInvalidSubnet|InUseSubnetCannotBeUpdated|"
+    r"VnetAddressSpace|RemoteVnetAddressSpace|PeeringAddressSpace",
+    re.IGNORECASE,
+)
+
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+_FAMILIES = {4: (socket.AF_INET, 32, 4), 6: (socket.AF_INET6, 128, 16)}
+
+
+def parse_cidr(prefix: str) -> Tuple[int, int, int, str]:
+    """(version, start, end, normalized prefix) of a CIDR, with host bits cleared
+
+    Uses inet_pton rather than ipaddress: inventories hold tens of thousands of prefixes.
+    """
+    text = prefix.strip()
+    address, _, length_text = text.partition("/")
+    version = 6 if ":" in address else 4
+    family, bits, size = _FAMILIES[version]
+    try:
+        value = int.from_bytes(socket.inet_pton(family, address), "big")
+        length = int(length_text) if length_text else bits
+    except (OSError, ValueError):
+        raise ValueError(f"Invalid address prefix: {prefix!r}")
+    if not 0 <= length <= bits:
+        raise ValueError(f"Invalid prefix length: {prefix!r}")
+    host_mask = (1 << (bits - length)) - 1
+    start = value & ~host_mask
+    normalized = f"{socket.inet_ntop(family, start.to_bytes(size, 'big'))}/{length}"
+    return version, start, start | host_mask, normalized
+
+
+@dataclass(frozen=True)
+class AddressBlock:
+    """One CIDR block and the VNet/subnet (or peering) it belongs to"""
+
+    prefix: str
+    version: int
+    start: int
+    end: int
+    kind: str  # "vnet", "subnet" or "peering"
+    vnet_id: str
+    resource_id: str
+    name: str
+
+    @classmethod
+    def create(cls, prefix: str, kind: str, vnet_id: str, resource_id: str, name: str) -> "AddressBlock":
+        version, start, end, normalized = parse_cidr(prefix)
+        return cls(
+            prefix=normalized,
+            version=version,
+            start=start,
+            end=end,
+            kind=kind,
+            vnet_id=vnet_id.lower(),
+            resource_id=resource_id,
+            name=name,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"prefix": self.prefix, "kind": self.kind, "name": self.name, "id": self.resource_id}
+
+
+def _props(resource: Dict[str, Any]) -> Dict[str, Any]:
+    return resource.get("properties") or {}
+
+
+def _vnet_ids(vnets: Iterable[Dict[str, Any]]) -> set:
+    return {str(vnet.get("id", "")).lower() for vnet in vnets}
+
+
+def blocks_from_vnets(vnets: Iterable[Dict[str, Any]],
+                      known: Optional[set] = None) -> Tuple[List[AddressBlock], List[str]]:
+    """Extract address blocks from VNets (ARM REST JSON); returns (blocks, unparseable prefixes)
+
+    Peerings to a VNet in known (default: the given VNets) are skipped, as its own blocks are indexed.
+    """
+    blocks: List[AddressBlock] = []
+    invalid: List[str] = []
+    vnets = list(vnets)
+    known = _vnet_ids(vnets) if known is None else known
+
+    def add(prefix: str, *args):
+        try:
+            blocks.append(AddressBlock.create(prefix, *args))
+        except ValueError:
+            invalid.append(prefix)
+
+    for vnet in vnets:
+        vnet_id = vnet.get("id", "")
+        props = _props(vnet)
+        for prefix in (props.get("addressSpace") or {}).get("addressPrefixes") or []:
+            add(prefix, "vnet", vnet_id, vnet_id, vnet.get("name"))
+        for subnet in props.get("subnets") or []:
+            subnet_props = _props(subnet)
+            prefixes = [subnet_props.get("addressPrefix")] + list(subnet_props.get("addressPrefixes") or [])
+            for prefix in filter(None, dict.fromkeys(prefixes)):
+                add(prefix, "subnet", vnet_id, subnet.get("id"), f"{vnet.get('name')}/{subnet.get('name')}")
+        for peering in props.get("virtualNetworkPeerings") or []:
+            remote_id = ((_props(peering).get("remoteVirtualNetwork") or {}).get("id") or "").lower()
+            if remote_id in known:
+                # The remote VNet's own blocks are already indexed
+                continue
+            remote_space = (_props(peering).get("remoteAddressSpace") or {}).get("addressPrefixes") or []
+            for prefix in remote_space:
+                add(prefix, "peering", vnet_id, remote_id or peering.get("id"),
+                    f"{vnet.get('name')} peer {peering.get('name')}")
+    return blocks, invalid
+
+
+def _peerings(vnets: Iterable[Dict[str, Any]]) -> set:
+    pairs = set()
+    for vnet in vnets:
+        vnet_id = str(vnet.get("id", "")).lower()
+        for peering in _props(vnet).get("virtualNetworkPeerings") or []:
+            remote_id = ((_props(peering).get("remoteVirtualNetwork") or {}).get("id") or "").lower()
+            if remote_id:
+                pairs.add(frozenset((vnet_id, remote_id)))
+    return pairs
+
+
+class AddressSpaceIndex:
+    """Sorted index of address blocks supporting a full sweep and incremental conflict checks"""
+
+    def __init__(self, blocks: Iterable[AddressBlock] = ()):
+        self._keys: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+        self._by_range: Dict[Tuple[int, int, int], List[int]] = {}
+        self.blocks: List[AddressBlock] = []
+        # Bulk load sorts once; add() keeps the order incrementally afterwards
+        for block in blocks:
+            self._keys[block.version].append(self._append(block))
+        for keys in self._keys.values():
+            keys.sort()
+
+    def _append(self, block: AddressBlock) -> Tuple[int, int, int]:
+        index = len(self.blocks)
+        self.blocks.append(block)
+        self._by_range.setdefault((block.version, block.start, block.end), []).append(index)
+        return block.start, -block.end, index
+
+    def add(self, block: AddressBlock):
+        """Insert a block, keeping the per-family (start, -end) order"""
+        bisect.insort(self._keys[block.version], self._append(block))
+
+    def overlapping(self, prefix: str) -> List[AddressBlock]:
+        """Blocks that overlap the given prefix (contain it or are contained by it)"""
+        version, start, end, _ = parse_cidr(prefix)
+        bits = _FAMILIES[version][1]
+        found = set()
+        # Enclosing blocks are the prefix's supernets: one dict probe per prefix length
+        for host_bits in range((end - start).bit_length(), bits + 1):
+            host_mask = (1 << host_bits) - 1
+            supernet_start = start & ~host_mask
+            found.update(self._by_range.get((version, supernet_start, supernet_start | host_mask), ()))
+        # Contained blocks start inside [start, end]
+        keys = self._keys[version]
+        lower = bisect.bisect_left(keys, (start, -end, -1))
+        upper = bisect.bisect_right(keys, (end, 1, len(self.blocks)))
+        found.update(index for _, _, index in keys[lower:upper])
+        return [self.blocks[index] for index in sorted(found)]
+
+    def overlapping_pairs(self) -> Iterable[Tuple[AddressBlock, AddressBlock]]:
+        """Yield every (enclosing, enclosed) pair of overlapping blocks"""
+        for keys in self._keys.values():
+            stack: List[AddressBlock] = []
+            for _, _, index in keys:
+                block = self.blocks[index]
+                while stack and stack[-1].end < block.start:
+                    stack.pop()
+                for enclosing in stack:
+                    yield enclosing, block
+                stack.append(block)
+
+
+class AddressSpace:
+    """VNets of one or more subscriptions and one index of their blocks, grown with add_vnets()"""
+
+    def __init__(self, vnets: Iterable[Dict[str, Any]] = ()):
+        self.vnets: List[Dict[str, Any]] = list(vnets)
+        self.vnet_ids = _vnet_ids(self.vnets)
+        blocks, self.invalid = blocks_from_vnets(self.vnets, self.vnet_ids)
+        self.index = AddressSpaceIndex(blocks)
+        self.peered = _peerings(self.vnets)
+
+    def add_vnets(self, vnets: Iterable[Dict[str, Any]]):
+        """Index more VNets (e.g. another subscription's) without rebuilding the index"""
+        vnets = list(vnets)
+        vnet_ids = self.vnet_ids | _vnet_ids(vnets)
+        # Extract first: malformed VNets fail before anything is indexed
+        blocks, invalid = blocks_from_vnets(vnets, vnet_ids)
+        peered = _peerings(vnets)
+        self.vnets.extend(vnets)
+        self.vnet_ids = vnet_ids
+        for block in blocks:
+            self.index.add(block)
+        self.invalid.extend(invalid)
+        self.peered.update(peered)
+
+    def current(self, block: AddressBlock) -> bool:
+        """False for a peering's copy of a remote VNet that was indexed itself after the peering"""
+        return block.kind != "peering" or block.resource_id not in self.vnet_ids
+
+    def overlapping(self, prefix: str) -> List[AddressBlock]:
+        return [block for block in self.index.overlapping(prefix) if self.current(block)]
+
+    def overlapping_pairs(self) -> Iterable[Tuple[AddressBlock, AddressBlock]]:
+        for outer, inner in self.index.overlapping_pairs():
+            if self.current(outer) and self.current(inner):
+                yield outer, inner
+
+    def find_vnet(self, vnet_name: str) -> List[Dict[str, Any]]:
+        """VNets with this name (or resource id); names can repeat across subscriptions"""
+        wanted = vnet_name.lower()
+        return [vnet for vnet in self.vnets
+                if str(vnet.get("name", "")).lower() == wanted or str(vnet.get("id", "")).lower() == wanted]
+
+
+def classify_overlap(outer: AddressBlock, inner: AddressBlock, peered: set) -> Optional[Tuple[str, str]]:
+    """(conflict type, severity) for an overlapping pair, or None when the overlap is expected"""
+    same_vnet = outer.vnet_id == inner.vnet_id
+    kinds = {outer.kind, inner.kind}
+    if kinds == {"subnet"}:
+        return ("subnet_overlap", "high") if same_vnet else None
+    if kinds == {"vnet"}:
+        if same_vnet:
+            return "vnet_address_space_overlap", "high"
+        if frozenset((outer.vnet_id, inner.vnet_id)) in peered:
+            return "peered_vnet_overlap", "high"
+        return "vnet_overlap", "medium"
+    if kinds == {"vnet", "peering"} and same_vnet:
+        return "peered_vnet_overlap", "high"
+    # Subnets inside their own VNet, and cross-VNet subnet overlaps already reported at VNet level
+    return None
+
+
+def _touches(block: AddressBlock, resource_group: Optional[str]) -> bool:
+    return resource_group is None or f"/resourcegroups/{resource_group.lower()}/" in block.vnet_id
+
+
+def find_address_conflicts(space: AddressSpace, resource_group: str = None,
+                           max_conflicts: int = 500) -> Dict[str, Any]:
+    """Every conflicting VNet/subnet overlap, optionally limited to pairs touching one resource group"""
+    conflicts = []
+    for outer, inner in space.overlapping_pairs():
+        if not (_touches(outer, resource_group) or _touches(inner, resource_group)):
+            continue
+        classified = classify_overlap(outer, inner, space.peered)
+        if classified is None:
+            continue
+        conflict_type, severity = classified
+        conflicts.append({
+            "type": conflict_type,
+            "severity": severity,
+            "enclosing": outer.as_dict(),
+            "enclosed": inner.as_dict(),
+        })
+    conflicts.sort(key=lambda conflict: SEVERITY_ORDER.get(conflict["severity"], 9))
+
+    return {
+        "resource_group": resource_group,
+        "vnet_count": len(space.vnets),
+        "block_count": sum(space.current(block) for block in space.index.blocks),
+        "conflict_count": len(conflicts),
+        "conflicts": conflicts[:max_conflicts],
+        "conflicts_truncated": len(conflicts) > max_conflicts,
+        "invalid_prefixes": space.invalid,
+    }
+
+
+def check_prefix(space: AddressSpace, prefix: str, vnet_name: str = None) -> Dict[str, Any]:
+    """Would adding prefix conflict? As a subnet of vnet_name if given, else as a new VNet address space"""
+    overlapping = space.overlapping(prefix)
+    result: Dict[str, Any] = {"prefix": prefix, "vnet": vnet_name}
+
+    if vnet_name:
+        matches = space.find_vnet(vnet_name)
+        if not matches:
+            return {**result, "error": f"VNet '{vnet_name}' not found"}
+        if len(matches) > 1:
+            ids = [vnet.get("id") for vnet in matches]
+            return {**result, "error": f"VNet name '{vnet_name}' is ambiguous; pass one of its ids", "matches": ids}
+        vnet = matches[0]
+        vnet_id = str(vnet.get("id", "")).lower()
+        _, start, end, _ = parse_cidr(prefix)
+        within = [b for b in overlapping if b.kind == "vnet" and b.vnet_id == vnet_id
+                  and b.start <= start and b.end >= end]
+        conflicts = [b for b in overlapping if b.kind == "subnet" and b.vnet_id == vnet_id]
+        result["within_vnet_address_space"] = bool(within)
+    else:
+        conflicts = [b for b in overlapping if b.kind in ("vnet", "peering")]
+
+    result["conflicts"] = [block.as_dict() for block in conflicts]
+    result["conflicting"] = bool(conflicts) or result.get("within_vnet_address_space") is False
+    return result
+
+
+def mentions_address_conflict(error: Any) -> bool:
+    """Whether a deployment error looks like an address space or peering conflict"""
+    if not error:
+        return False
+    # SDK error models only include nested details in their dict form
+    text = str(error.as_dict()) if hasattr(error, "as_dict") else str(error)
+    return bool(_CONFLICT_ERROR_RE.search(text))
@@ -0,0 +1,327 @@
+"""
+Admission Control Module
+
+Per-tool concurrency limits and bounded wait queues for MCP tool calls. Each
+tool belongs to a lane: interactive tools (greetings, listings, diagnostics)
+only answer to their own limits, while ARM-heavy and LLM-backed tools also
+share the server's capacity, queued standard calls being admitted ahead of
+queued heavy ones. A call that finds its tool's queue full, or would wait
+longer than the queue time allows, is rejected right away with a retry-after
+hint instead of timing out. Tools that coalesce identical calls check for an
+execution in flight first, so only its leader takes a slot.
+"""
+
+import asyncio
+import functools
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .single_flight import SingleFlight
+from .telemetry import start_span
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+STANDARD = "standard"
+HEAVY = "heavy"
+
+# Weight of the latest call in a tool's moving average service time
+SERVICE_TIME_SMOOTHING = 0.2
+# A queued call may wait at least this many average calls of its tool, however short max_wait is
+MIN_QUEUED_SERVICE_TIMES = 2
+
+
+@dataclass(frozen=True)
+class Lane:
+    """Admission defaults for a class of tools"""
+
+    # Lower values are admitted first
+    priority: int
+    # Concurrent calls per tool
+    limit: int
+    # Calls per tool allowed to wait for a slot
+    queue: int
+    # Whether calls also take a slot of the server-wide capacity
+    shared: bool
+
+
+LANES = {
+    INTERACTIVE: Lane(priority=0, limit=32, queue=128, shared=False),
+    STANDARD: Lane(priority=1, limit=8, queue=32, shared=True),
+    HEAVY: Lane(priority=2, limit=2, queue=4, shared=True),
+}
+
+
+class ToolOverloadedError(RuntimeError):
+    """A tool call was shed; retry_after is a hint in seconds"""
+
+    def __init__(self, tool: str, reason: str, retry_after: float):
+        super().__init__(f"Server busy: {tool} {reason}; retry after {retry_after:.1f}s")
+        self.tool = tool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_tool_limits(spec: str) -> Dict[str, Tuple[int, Optional[int]]]:
+    """Per-tool overrides from "tool=limit[:queue],..." """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limit, _, queue = value.partition(":")
+        try:
+            limits[name.strip()] = (int(limit), int(queue) if queue else None)
+        except ValueError:
+            raise ValueError(f"Invalid tool limit {item!r}; expected tool=limit[:queue]") from None
+    return limits
+
+
+class _ToolGate:
+    """Limits, current load and counters of one tool"""
+
+    def __init__(self, name: str, lane_name: str, lane: Lane, limit: int, queue_limit: int):
+        self.name = name
+        self.lane_name = lane_name
+        self.lane = lane
+        self.limit = max(1, limit)
+        self.queue_limit = max(0, queue_limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.service_s: Optional[float] = None
+
+    def expected_wait(self) -> float:
+        """Rough wait for a call joining the queue now, from the average service time"""
+        if self.service_s is None:
+            return 0.0
+        return self.service_s * (self.waiting + 1) / self.limit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lane": self.lane_name,
+            "limit": self.limit,
+            "queue_limit": self.queue_limit,
+            "in_flight": self.in_flight,
+            "queued_now": self.waiting,
+            "peak_queued": self.peak_waiting,
+            "admitted": self.admitted,
+            "queued_total": self.queued,
+            "shed": self.shed,
+            "mean_wait_ms": round(self.wait_s / self.queued * 1000, 1) if self.queued else 0.0,
+            "max_wait_ms": round(self.max_wait_s * 1000, 1),
+            "mean_service_ms": round(self.service_s * 1000, 1) if self.service_s is not None else None,
+        }
+
+
+class AdmissionController:
+    """Per-tool gates plus server-wide capacity for the standard and heavy lanes
+
+    Tool calls all run on the server's event loop, so the state needs no lock.
+    """
+
+    def __init__(self, capacity: int = 16, max_wait: float = 10, tool_limits: Dict[str, Tuple] = None,
+                 enabled: bool = True):
+        self.capacity = max(1, capacity)
+        self.max_wait = max_wait
+        self.tool_limits = tool_limits or {}
+        self.enabled = enabled
+        self.shared_in_flight = 0
+        self._gates: Dict[str, _ToolGate] = {}
+        self._waiters: List = []
+        self._sequence = itertools.count()
+
+    def register(self, tool: str, lane_name: str) -> _ToolGate:
+        lane = LANES[lane_name]
+        limit, queue = self.tool_limits.get(tool, (lane.limit, None))
+        gate = _ToolGate(tool, lane_name, lane, limit, lane.queue if queue is None else queue)
+        self._gates[tool] = gate
+        return gate
+
+    def _admissible(self, gate: _ToolGate) -> bool:
+        return gate.in_flight < gate.limit and (not gate.lane.shared or self.shared_in_flight < self.capacity)
+
+    def _take(self, gate: _ToolGate):
+        gate.in_flight += 1
+        gate.admitted += 1
+        if gate.lane.shared:
+            self.shared_in_flight += 1
+
+    def _release(self, gate: _ToolGate, elapsed: Optional[float]):
+        gate.in_flight -= 1
+        if gate.lane.shared:
+            self.shared_in_flight -= 1
+        if elapsed is not None:
+            gate.service_s = elapsed if gate.service_s is None else (
+                gate.service_s + SERVICE_TIME_SMOOTHING * (elapsed - gate.service_s))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to queued calls in lane priority order"""
+        blocked = []
+        while self._waiters:
+            entry = heapq.heappop(self._waiters)
+            _, _, gate, future = entry
+            if future.done():
+                # Timed out or cancelled while queued
+                continue
+            if self._admissible(gate):
+                self._take(gate)
+                future.set_result(None)
+            else:
+                blocked.append(entry)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+    def _wait_limit(self, gate: _ToolGate) -> float:
+        """Longest a call may queue: max_wait, or a couple of average calls of the tool if that is longer
+
+        Otherwise a tool whose calls normally outlast max_wait (LLM-backed ones)
+        would shed every call that finds its slots busy and never use its queue.
+        """
+        return max(self.max_wait, MIN_QUEUED_SERVICE_TIMES * (gate.service_s or 0.0))
+
+    def _shed(self, gate: _ToolGate, reason: str, retry_after: float, queued=None) -> ToolOverloadedError:
+        gate.shed += 1
+        if queued is None:
+            queued = start_span("queue", gate.name, lane=gate.lane_name)
+        queued.end("shed")
+        logger.warning(f"Shedding {gate.name} call: {reason}")
+        return ToolOverloadedError(gate.name, reason, round(max(1.0, retry_after), 1))
+
+    async def _acquire(self, gate: _ToolGate):
+        if not gate.waiting and self._admissible(gate):
+            self._take(gate)
+            return
+        if gate.waiting >= gate.queue_limit:
+            raise self._shed(gate, f"has {gate.waiting} calls queued", gate.expected_wait())
+        expected = gate.expected_wait()
+        wait_limit = self._wait_limit(gate)
+        if expected > wait_limit:
+            raise self._shed(gate, f"would queue for about {expected:.1f}s", expected)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (gate.lane.priority, next(self._sequence), gate, future))
+        gate.waiting += 1
+        gate.queued += 1
+        gate.peak_waiting = max(gate.peak_waiting, gate.waiting)
+
+        queued = start_span("queue", gate.name, lane=gate.lane_name)
+
+        def expire():
+            if not future.done():
+                future.set_exception(
+                    self._shed(gate, f"queued for {wait_limit:.1f}s", gate.expected_wait(), queued)
+                )
+
+        timer = loop.call_later(wait_limit, expire)
+        started = time.monotonic()
+        status = "ok"
+        try:
+            await future
+        except asyncio.CancelledError:
+            status = "cancelled"
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Granted just as the caller went away
+                self._release(gate, None)
+            raise
+        except ToolOverloadedError:
+            # The queue span was ended as shed when the wait expired
+            status = None
+            raise
+        finally:
+            timer.cancel()
+            gate.waiting -= 1
+            waited = time.monotonic() - started
+            gate.wait_s += waited
+            gate.max_wait_s = max(gate.max_wait_s, waited)
+            if status is not None:
+                queued.end(status)
+
+    @asynccontextmanager
+    async def slot(self, gate: _ToolGate) -> AsyncIterator[None]:
+        """Hold one of the tool's slots for the block, waiting in its queue if needed"""
+        await self._acquire(gate)
+        started = time.monotonic()
+        elapsed = None
+        try:
+            yield
+            elapsed = time.monotonic() - started
+        finally:
+            self._release(gate, elapsed)
+
+    @contextmanager
+    def slot_now(self, gate: _ToolGate) -> Iterator[None]:
+        """Hold a slot for a synchronous tool, which can't wait on the event loop"""
+        if gate.waiting or not self._admissible(gate):
+            raise self._shed(gate, "has no free slot", gate.expected_wait())
+        self._take(gate)
+        started = time.monotonic()
+        elapsed = None
+        try:
+            yield
+            elapsed = time.monotonic() - started
+        finally:
+            self._release(gate, elapsed)
+
+    def admitted(self, lane: str, flights: Optional[SingleFlight] = None,
+                 flight_key: Optional[Callable[[Dict[str, Any]], Tuple]] = None) -> Callable[[Callable], Callable]:
+        """Decorator putting a tool function behind a gate in the given lane
+
+        With flights and flight_key (mapping the call's arguments to a key),
+        identical concurrent calls share one execution: callers joining one
+        already in flight wait for its result without taking a slot or a
+        place in the queue.
+        """
+        def decorator(function: Callable) -> Callable:
+            gate = self.register(function.__name__, lane)
+
+            if inspect.iscoroutinefunction(function):
+                signature = inspect.signature(function)
+
+                async def admit(*args, **kwargs):
+                    if not self.enabled:
+                        return await function(*args, **kwargs)
+                    async with self.slot(gate):
+                        return await function(*args, **kwargs)
+
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    if flights is None:
+                        return await admit(*args, **kwargs)
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    return await flights.run(flight_key(bound.arguments), lambda: admit(*args, **kwargs))
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.slot_now(gate):
+                    return function(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Return capacity use and per-tool queue depth, wait times and shed calls"""
+        return {
+            "enabled": self.enabled,
+            "capacity": self.capacity,
+            "shared_in_flight": self.shared_in_flight,
+            "max_wait_s": self.max_wait,
+            "queued_now": sum(gate.waiting for gate in self._gates.values()),
+            "shed_total": sum(gate.shed for gate in self._gates.values()),
+            "tools": {name: gate.stats() for name, gate in self._gates.items()},
+        }
@@ -5,34 +5,119 @@ This module implements the AI reasoning component for network troubleshooting.
 """
 
 import asyncio
+import hashlib
+import importlib.util
 import os
 import ssl
-from typing import Dict, List, Any
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Any, Optional, Tuple
 import logging
 from pathlib import Path
 import httpx
-from openai import AsyncAzureOpenAI
-from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
-from semantic_kernel.core_plugins.text_plugin import TextPlugin
-from semantic_kernel.functions import KernelArguments
-from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
-from semantic_kernel.functions import KernelFunctionFromPrompt
+from .config import get_config
+from .context_builder import build_context
+from .llm_cache import cache_key, get_llm_cache
+from .shared_cache import get_shared_cache
+from .telemetry import span
+
+# Semantic Kernel and openai take seconds to import; they are loaded when the first agent is built
+if TYPE_CHECKING:
+    from semantic_kernel.functions import KernelArguments, KernelFunctionFromPrompt
 
 logger = logging.getLogger(__name__)
 
+
+def _record_usage(llm_span, message: Any):
+    """Copy token usage reported in a chat message's metadata onto the span"""
+    usage = (getattr(message, "metadata", None) or {}).get("usage")
+    if usage is not None:
+        llm_span.add("prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        llm_span.add("completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
+# Receives each piece of streamed completion text as it arrives
+ChunkCallback = Callable[[str], Awaitable[None]]
+
+DEPLOYMENT_ERROR_PROMPT_FILES = ["network_troubleshooting_system.md", "deployment_error_analysis_template.md"]
+
 # Disable SSL verification globally for traffic intercept scenarios
 # This affects all HTTP requests made by the OpenAI client and other components
 ssl._create_default_https_context = ssl._create_unverified_context
 
+class PromptLibrary:
+    """Compiles prompt functions once and recompiles them only when a source file's mtime changes"""
+    
+    def __init__(self, prompts_dir: Path):
+        self.prompts_dir = prompts_dir
+        self._texts: Dict[str, Tuple[float, str]] = {}
+        self._functions: Dict[str, Tuple[Tuple[float, ...], "KernelFunctionFromPrompt"]] = {}
+    
+    def _mtime(self, file_name: str) -> float:
+        return (self.prompts_dir / file_name).stat().st_mtime
+    
+    def read(self, file_name: str) -> str:
+        """Read a prompt file, served from memory until the file changes on disk"""
+        mtime = self._mtime(file_name)
+        cached = self._texts.get(file_name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(self.prompts_dir / file_name, 'r', encoding='utf-8') as f:
+            text = f.read()
+        self._texts[file_name] = (mtime, text)
+        return text
+    
+    def function(self, name: str, files: List[str],
+                 build: Callable[..., "KernelFunctionFromPrompt"]) -> Optional["KernelFunctionFromPrompt"]:
+        """Get a compiled prompt function built from the given files, or None if any is missing"""
+        try:
+            mtimes = tuple(self._mtime(file_name) for file_name in files)
+        except FileNotFoundError:
+            return None
+        cached = self._functions.get(name)
+        if cached and cached[0] == mtimes:
+            return cached[1]
+        if cached:
+            logger.info(f"Prompt files for {name} changed, recompiling")
+        function = build(*(self.read(file_name) for file_name in files))
+        self._functions[name] = (mtimes, function)
+        return function
+    
+    def version(self, files: List[str]) -> str:
+        """Content hash of the given prompt files, used to key cached LLM results"""
+        digest = hashlib.sha256()
+        for file_name in files:
+            digest.update(self.read(file_name).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client shared by every LLM request of an agent"""
+    config = get_config()
+    limits = httpx.Limits(
+        max_connections=config.llm_http_max_connections,
+        max_keepalive_connections=config.llm_http_max_keepalive,
+        keepalive_expiry=config.llm_http_keepalive_expiry
+    )
+    # HTTP/2 needs the optional h2 package (httpx[http2])
+    http2 = config.llm_http2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(verify=False, limits=limits, http2=http2)
+
+
 class NetworkTroubleshootingAgent:
     """AI Agent for network troubleshooting using Semantic Kernel"""
     
     def __init__(self, openai_api_key: str = None, model: str = "gpt-4"):
+        from semantic_kernel import Kernel
+        
         self.kernel = Kernel()
         self.model = model
         self.prompts_dir = Path(__file__).parent.parent / "prompts"
-        self.deployment_analyzer = None  # Initialize as None
+        self.prompts = PromptLibrary(self.prompts_dir)
+        self._http_client = None
+        self.deployment_name = os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
+        # Recent time-to-first-token samples (seconds) for streamed calls
+        self.ttft_samples = deque(maxlen=512)
         
         # Check for Azure OpenAI configuration
         azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
@@ -42,8 +127,12 @@ class NetworkTroubleshootingAgent:
         
         if azure_endpoint and azure_api_key and azure_deployment:
             try:
-                # Create HTTP client with SSL verification disabled
-                http_client = httpx.AsyncClient(verify=False)
+                from openai import AsyncAzureOpenAI
+                from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+                from semantic_kernel.core_plugins.text_plugin import TextPlugin
+                
+                # Pooled HTTP client with SSL verification disabled, reused for the agent's lifetime
+                self._http_client = _create_http_client()
                 
                 # Create Azure OpenAI client with SSL verification disabled
                 azure_client = AsyncAzureOpenAI(
@@ -51,7 +140,7 @@ class NetworkTroubleshootingAgent:
                     api_key=azure_api_key,
                     api_version=azure_api_version or "2024-02-01",
                     azure_deployment=azure_deployment,
-                    http_client=http_client
+                    http_client=self._http_client
                 )
 
                 chat_completion = AzureChatCompletion(
@@ -63,7 +152,7 @@ class NetworkTroubleshootingAgent:
                 # Add text plugin for basic text operations
                 self.kernel.add_plugin(TextPlugin(), plugin_name="TextPlugin")
                 
-                # Load and register prompt functions
+                # Compile prompt functions up front so the first request doesn't pay for it
                 self._load_prompt_functions()
                 
                 logger.info("Azure OpenAI service configured successfully")
@@ -75,73 +164,271 @@ class NetworkTroubleshootingAgent:
             logger.warning("Azure OpenAI configuration not found (missing AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_KEY, or AZURE_OPENAI_DEPLOYMENT_NAME), AI agent will use fallback responses")
     
     def _load_prompt_functions(self):
-        """Load prompt templates from external markdown files"""
+        """Compile all prompt functions from the external markdown files"""
+        logger.debug(f"Compiled {self.compiled_prompt_functions()} prompt functions")
+    
+    def compiled_prompt_functions(self) -> int:
+        """Number of prompt functions available (compiling any that aren't yet)"""
+        compiled = [self.deployment_analyzer, self.resource_analyzer, self.next_steps_function]
+        return sum(1 for function in compiled if function)
+    
+    async def open_connection(self) -> Optional[str]:
+        """Open a pooled connection to the Azure OpenAI endpoint ahead of the first request
+        
+        Any response will do; the TLS (and HTTP/2) connection stays in the pool.
+        Returns the HTTP version used, or None without an Azure OpenAI endpoint.
+        """
+        endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
+        if self._http_client is None or not endpoint:
+            return None
+        response = await self._http_client.get(endpoint)
+        return response.http_version
+    
+    @property
+    def deployment_analyzer(self) -> Optional["KernelFunctionFromPrompt"]:
+        """Deployment error analysis function (system prompt + error template)"""
         try:
-            # Load network troubleshooting system prompt
-            system_prompt_path = self.prompts_dir / "network_troubleshooting_system.md"
-            if system_prompt_path.exists():
-                with open(system_prompt_path, 'r', encoding='utf-8') as f:
-                    system_prompt = f.read()
-                
-                # Load deployment error analysis template
-                error_template_path = self.prompts_dir / "deployment_error_analysis_template.md"
-                if error_template_path.exists():
-                    with open(error_template_path, 'r', encoding='utf-8') as f:
-                        error_template = f.read()
-                    
-                    # Combine system prompt with error analysis template
-                    combined_prompt = f"{system_prompt}\n\n{error_template}"
-                    
-                    # Create prompt template configuration
-                    prompt_config = PromptTemplateConfig(
-                        template=combined_prompt,
-                        name="analyze_deployment_error",
-                        description="Analyze Azure deployment errors with expert troubleshooting guidance",
-                        input_variables=[
-                            InputVariable(name="deployment_name", description="Name of the failed deployment"),
-                            InputVariable(name="resource_group", description="Resource group name"),
-                            InputVariable(name="deployment_state", description="Current deployment state"),
-                            InputVariable(name="timestamp", description="Deployment timestamp"),
-                            InputVariable(name="error_message", description="Error message details"),
-                        ]
-                    )
-                    
-                    # Register the function with the kernel
-                    self.deployment_analyzer = KernelFunctionFromPrompt(
-                        function_name="analyze_deployment_error",
-                        prompt_template_config=prompt_config
-                    )
-                    
+            return self.prompts.function(
+                "analyze_deployment_error",
+                DEPLOYMENT_ERROR_PROMPT_FILES,
+                self._build_deployment_analyzer
+            )
         except Exception as e:
             logger.error(f"Error loading prompt functions: {e}")
             # Fallback to basic functionality if prompt loading fails
-            self.deployment_analyzer = None
+            return None
+    
+    def _build_deployment_analyzer(self, system_prompt: str, error_template: str) -> "KernelFunctionFromPrompt":
+        from semantic_kernel.functions import KernelFunctionFromPrompt
+        from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
+        
+        # Combine system prompt with error analysis template
+        combined_prompt = f"{system_prompt}\n\n{error_template}"
+        
+        # Create prompt template configuration
+        prompt_config = PromptTemplateConfig(
+            template=combined_prompt,
+            name="analyze_deployment_error",
+            description="Analyze Azure deployment errors with expert troubleshooting guidance",
+            input_variables=[
+                InputVariable(name="deployment_name", description="Name of the failed deployment"),
+                InputVariable(name="resource_group", description="Resource group name"),
+                InputVariable(name="deployment_state", description="Current deployment state"),
+                InputVariable(name="timestamp", description="Deployment timestamp"),
+                # Already made markup-safe by build_context; template escaping would bloat JSON quotes
+                InputVariable(name="error_message", description="Error message details",
+                              allow_dangerously_set_content=True),
+            ]
+        )
+        
+        return KernelFunctionFromPrompt(
+            function_name="analyze_deployment_error",
+            prompt_template_config=prompt_config
+        )
+    
+    @property
+    def resource_analyzer(self) -> Optional["KernelFunctionFromPrompt"]:
+        """Azure resource analysis function; resource data is passed as a template variable"""
+        try:
+            return self.prompts.function(
+                "analyze_azure_resources",
+                ["azure_resource_analysis.md"],
+                self._build_resource_analyzer
+            )
+        except Exception as e:
+            logger.error(f"Error loading resource analysis prompt: {e}")
+            return None
+    
+    def _build_resource_analyzer(self, system_prompt: str) -> "KernelFunctionFromPrompt":
+        from semantic_kernel.functions import KernelFunctionFromPrompt
+        from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
+        
+        # The static system prompt is the exact leading prefix so provider-side prompt caching applies;
+        # everything that varies per call comes after it
+        combined_prompt = (
+            f"{system_prompt}\n\n"
+            "## Resource Data to Analyze\n"
+            "{{$resource_data}}\n\n"
+            "Please provide a comprehensive analysis following the framework outlined above."
+        )
+        
+        # Create prompt template configuration
+        config = PromptTemplateConfig(
+            template=combined_prompt,
+            name="analyze_azure_resources",
+            description="Analyze Azure resources and provide insights",
+            input_variables=[
+                InputVariable(name="resource_data", description="Azure resource data to analyze",
+                              allow_dangerously_set_content=True),
+            ]
+        )
+        
+        return KernelFunctionFromPrompt(
+            function_name="analyze_azure_resources",
+            prompt_template_config=config
+        )
+    
+    @property
+    def next_steps_function(self) -> "KernelFunctionFromPrompt":
+        """Next-step suggestion function; it has no prompt file, so it is compiled once"""
+        return self.prompts.function("suggest_next_steps", [], self._build_next_steps_function)
+    
+    def _build_next_steps_function(self) -> "KernelFunctionFromPrompt":
+        from semantic_kernel.functions import KernelFunctionFromPrompt
+        from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
+        
+        prompt = """
+                Based on the following network troubleshooting analysis, suggest 5 specific next steps:
+                
+                Analysis: {{$analysis}}
+                
+                Provide only the steps as a numbered list, each step should be actionable and specific.
+                """
+        
+        config = PromptTemplateConfig(
+            template=prompt,
+            name="suggest_next_steps",
+            description="Suggest next troubleshooting steps",
+            input_variables=[
+                InputVariable(name="analysis", description="Troubleshooting analysis to follow up on"),
+            ]
+        )
+        
+        return KernelFunctionFromPrompt(
+            function_name="suggest_next_steps",
+            prompt_template_config=config
+        )
+    
+    async def _invoke(self, function: "KernelFunctionFromPrompt", arguments: "KernelArguments",
+                      on_chunk: Optional[ChunkCallback] = None) -> str:
+        """Invoke a prompt function, streaming partial text to on_chunk when given"""
+        with span("llm", function.name, streamed=on_chunk is not None) as llm_span:
+            if on_chunk is None:
+                result = await self.kernel.invoke(function, arguments)
+                for message in (result.value if result and isinstance(result.value, list) else []):
+                    _record_usage(llm_span, message)
+                return str(result) if result else ""
+            
+            chunks = []
+            started = time.perf_counter()
+            async for messages in self.kernel.invoke_stream(function, arguments):
+                for message in messages:
+                    _record_usage(llm_span, message)
+                    text = str(message)
+                    if not text:
+                        continue
+                    if not chunks:
+                        self.ttft_samples.append(time.perf_counter() - started)
+                        llm_span.set_attribute("ttft_ms", round((time.perf_counter() - started) * 1000, 1))
+                    chunks.append(text)
+                    try:
+                        await on_chunk(text)
+                    except Exception as e:
+                        # A client that stops listening must not abort the analysis
+                        logger.debug(f"Dropping streamed chunk: {e}")
+            return "".join(chunks)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return time-to-first-token statistics for streamed calls"""
+        samples = sorted(self.ttft_samples)
+        if not samples:
+            return {"model": self.model, "deployment": self.deployment_name, "streamed_calls": 0}
+        return {
+            "model": self.model,
+            "deployment": self.deployment_name,
+            "streamed_calls": len(samples),
+            "ttft_p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+            "ttft_p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+            "ttft_last_ms": round(self.ttft_samples[-1] * 1000, 1),
+        }
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
     async def analyze_deployment_error(self, error_details: Dict[str, Any]) -> str:
         """Analyze deployment error and provide recommendations"""
+        result = await self.analyze_deployment_error_with_cache_info(error_details)
+        return result["analysis"]
+    
+    async def analyze_deployment_error_with_cache_info(self, error_details: Dict[str, Any],
+                                                       on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
+        """Analyze deployment error, serving equivalent errors from the LLM result cache
         
+        When on_chunk is given the completion is streamed and each partial text
+        is passed to it as it arrives. Returns a dict with the analysis text,
+        whether it came from the cache and whether the model was called for it
+        (False for cached and fallback answers).
+        """
+        
+        generated = False
         try:
             # Use Semantic Kernel function if available
-            if self.deployment_analyzer and hasattr(self.kernel, 'services') and self.kernel.services:
+            deployment_analyzer = self.deployment_analyzer
+            if deployment_analyzer and hasattr(self.kernel, 'services') and self.kernel.services:
                 # Prepare arguments for the semantic kernel function
+                error = error_details.get('error', error_details.get('description', 'No error message provided'))
+                if hasattr(error, 'as_dict'):
+                    error = error.as_dict()
+                from semantic_kernel.functions import KernelArguments
                 arguments = KernelArguments(
                     deployment_name=error_details.get('deployment_name', 'Unknown'),
                     resource_group=error_details.get('resource_group', 'Unknown'),
                     deployment_state=error_details.get('deployment_state', 'Unknown'),
                     timestamp=str(error_details.get('timestamp', 'Unknown')),
-                    error_message=str(error_details.get('error', error_details.get('description', 'No error message provided')))
+                    error_message=build_context(
+                        error, "analyze_deployment_error", self.model,
+                        focus=str(error_details.get('resource_group', ''))
+                    )
                 )
                 
-                # Execute the semantic kernel function
-                result = await self.kernel.invoke(self.deployment_analyzer, arguments)
-                return str(result) if result else self._generate_mock_analysis(error_details)
+                llm_cache = get_llm_cache()
+                key = None
+                if llm_cache:
+                    template_version = self.prompts.version(DEPLOYMENT_ERROR_PROMPT_FILES)
+                    key = cache_key(arguments, template_version, f"{self.model}/{self.deployment_name}")
+                    # SQLite reads and writes (WAL, LRU eviction, busy timeout) run off the event loop
+                    cached = await asyncio.to_thread(llm_cache.get, key)
+                    if cached is not None:
+                        return {"analysis": cached, "cached": True, "llm_request": False}
+                
+                async def generate() -> str:
+                    nonlocal generated
+                    generated = True
+                    # Execute the semantic kernel function
+                    analysis = await self._invoke(deployment_analyzer, arguments, on_chunk)
+                    if analysis and llm_cache:
+                        await asyncio.to_thread(llm_cache.put, key, analysis)
+                    return analysis
+                
+                shared = get_shared_cache() if llm_cache else None
+                if shared is not None:
+                    # Worker processes seeing the same error signature wait for one analysis
+                    analysis = await shared.run_once(
+                        f"llm-analysis:{key}", lambda: asyncio.to_thread(llm_cache.peek, key), generate
+                    )
+                else:
+                    analysis = await generate()
+                if not generated:
+                    return {"analysis": analysis, "cached": True, "llm_request": False}
+                if not analysis:
+                    return {"analysis": self._generate_mock_analysis(error_details), "cached": False, "llm_request": True}
+                
+                return {"analysis": analysis, "cached": False, "llm_request": True}
             else:
                 logger.warning("Semantic Kernel not properly configured, using fallback analysis")
-                return self._generate_mock_analysis(error_details)
+                return {"analysis": self._generate_mock_analysis(error_details), "cached": False, "llm_request": False}
                 
         except Exception as e:
             logger.error(f"Error in AI analysis: {e}")
-            return f"Error analyzing deployment: {str(e)}\n\nFallback analysis:\n{self._generate_mock_analysis(error_details)}"
+            return {
+                "analysis": f"Error analyzing deployment: {str(e)}\n\nFallback analysis:\n{self._generate_mock_analysis(error_details)}",
+                "cached": False,
+                # A request that failed still went to the model
+                "llm_request": generated
+            }
     
     def _generate_mock_analysis(self, error_details: Dict[str, Any]) -> str:
         """Generate a mock analysis for demonstration purposes"""
@@ -169,31 +456,12 @@ class NetworkTroubleshootingAgent:
         """Suggest next steps based on analysis"""
         
         try:
-            # Create a simple prompt for next step suggestions
             if hasattr(self.kernel, 'services') and self.kernel.services:
-                prompt = f"""
-                Based on the following network troubleshooting analysis, suggest 5 specific next steps:
-                
-                Analysis: {analysis_result}
-                
-                Provide only the steps as a numbered list, each step should be actionable and specific.
-                """
-                
-                # Create a simple function for next steps
-                from semantic_kernel.prompt_template import PromptTemplateConfig
-                config = PromptTemplateConfig(
-                    template=prompt,
-                    name="suggest_next_steps",
-                    description="Suggest next troubleshooting steps"
+                from semantic_kernel.functions import KernelArguments
+                result = await self._invoke(
+                    self.next_steps_function, KernelArguments(analysis=analysis_result)
                 )
                 
-                next_steps_function = KernelFunctionFromPrompt(
-                    function_name="suggest_next_steps",
-                    prompt_template_config=config
-                )
-                
-                result = await self.kernel.invoke(next_steps_function, KernelArguments())
-                
                 # Parse the result into a list
                 if result:
                     lines = str(result).strip().split('\n')
@@ -215,39 +483,25 @@ class NetworkTroubleshootingAgent:
             "Review diagnostic logs in Azure Monitor"
         ]
     
-    async def analyze_azure_resources(self, resource_data: Dict[str, Any]) -> str:
-        """Analyze Azure resources using Semantic Kernel with external prompts"""
+    async def analyze_azure_resources(self, resource_data: Dict[str, Any],
+                                      on_chunk: Optional[ChunkCallback] = None) -> str:
+        """Analyze Azure resources using Semantic Kernel with external prompts
+        
+        When on_chunk is given the completion is streamed to it as it arrives.
+        """
         
         try:
-            # Load Azure resource analysis prompt
-            resource_prompt_path = self.prompts_dir / "azure_resource_analysis.md"
-            if resource_prompt_path.exists() and hasattr(self.kernel, 'services') and self.kernel.services:
-                with open(resource_prompt_path, 'r', encoding='utf-8') as f:
-                    system_prompt = f.read()
-                
-                combined_prompt = f"""
-                {system_prompt}
-                
-                ## Resource Data to Analyze
-                {resource_data}
-                
-                Please provide a comprehensive analysis following the framework outlined above.
-                """
-                
-                # Create prompt template configuration
-                config = PromptTemplateConfig(
-                    template=combined_prompt,
-                    name="analyze_azure_resources",
-                    description="Analyze Azure resources and provide insights"
+            resource_analyzer = self.resource_analyzer
+            if resource_analyzer and hasattr(self.kernel, 'services') and self.kernel.services:
+                from semantic_kernel.functions import KernelArguments
+                context = build_context(
+                    resource_data, "analyze_azure_resources", self.model,
+                    focus=str(resource_data.get('target_resource_group', ''))
                 )
-                
-                resource_analyzer = KernelFunctionFromPrompt(
-                    function_name="analyze_azure_resources",
-                    prompt_template_config=config
+                result = await self._invoke(
+                    resource_analyzer, KernelArguments(resource_data=context), on_chunk
                 )
-                
-                result = await self.kernel.invoke(resource_analyzer, KernelArguments())
-                return str(result) if result else self._generate_mock_resource_analysis(resource_data)
+                return result if result else self._generate_mock_resource_analysis(resource_data)
             else:
                 logger.warning("Resource analysis prompt not found or Semantic Kernel not configured")
                 return self._generate_mock_resource_analysis(resource_data)
@@ -278,4 +532,33 @@ class NetworkTroubleshootingAgent:
         - Set up monitoring and alerting
         - Review security group configurations
         - Implement backup and disaster recovery
-        """
\ No newline at end of file
+        """
+
+
+# One long-lived agent per model/deployment for the whole server process
+_agents: Dict[Tuple[str, str, str], NetworkTroubleshootingAgent] = {}
+_agents_lock = threading.Lock()
+
+def get_troubleshooting_agent(openai_api_key: str = None, model: str = "gpt-4") -> NetworkTroubleshootingAgent:
+    """Get the shared agent for a model and Azure OpenAI deployment, creating it on first use"""
+    key = (model, os.getenv('AZURE_OPENAI_ENDPOINT', ''), os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME', ''))
+    agent = _agents.get(key)
+    if agent is None:
+        # The startup warmup builds the agent in a worker thread
+        with _agents_lock:
+            agent = _agents.get(key)
+            if agent is None:
+                agent = NetworkTroubleshootingAgent(openai_api_key, model)
+                _agents[key] = agent
+    return agent
+
+def get_agent_stats() -> List[Dict[str, Any]]:
+    """Return statistics for every shared agent"""
+    return [agent.stats() for agent in _agents.values()]
+
+async def close_troubleshooting_agents():
+    """Close every shared agent and its HTTP connection pool"""
+    agents = list(_agents.values())
+    _agents.clear()
+    for agent in agents:
+        await agent.aclose()
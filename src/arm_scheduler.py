@@ -0,0 +1,364 @@
+"""
+ARM Scheduler Module
+
+Admission control for Azure Resource Manager requests. Every request a
+subscription's management clients send takes a slot in that subscription's
+concurrency window, which grows additively while ARM has read quota to spare
+and halves when the remaining-reads header runs low or ARM answers 429.
+Throttled subscriptions pause for the Retry-After interval, retries back off
+with jitter, and interactive tool calls are admitted ahead of background
+refreshes.
+"""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Lower values are admitted first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Quota headers ARM returns on reads; the global one comes with the token-bucket throttling model
+RATELIMIT_HEADERS = (
+    "x-ms-ratelimit-remaining-subscription-global-reads",
+    "x-ms-ratelimit-remaining-subscription-reads",
+)
+
+_priority: ContextVar[int] = ContextVar("arm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Let ARM requests made inside the block yield to interactive ones"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from retry-after-ms, x-ms-retry-after-ms or Retry-After (seconds or HTTP date)"""
+    for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _remaining_reads(headers: Mapping[str, str]) -> Optional[int]:
+    for name in RATELIMIT_HEADERS:
+        value = headers.get(name)
+        if value:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+    return None
+
+
+class _Waiter:
+    """A request queued for a slot; granted from whichever thread frees one"""
+
+    __slots__ = ("loop", "future", "event", "granted", "cancelled")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+    def grant(self):
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class ArmScheduler:
+    """Per-subscription AIMD concurrency window with priority admission
+
+    Shared by the sync and async clients of a subscription, so its state is
+    guarded by a thread lock rather than tied to an event loop.
+    """
+
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 64,
+                 low_watermark: int = 50, adaptive: bool = True):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, initial_limit)
+        self.low_watermark = low_watermark
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.remaining_reads: Optional[int] = None
+        self._waiters: List = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        # Responses since the last decrease; the window halves at most once per window of responses.
+        # It starts a full window in, so throttling on the very first responses shrinks the window too.
+        self._since_decrease = self.window
+        self._wakeup: Optional[threading.Timer] = None
+        self.admitted: Counter = Counter()
+        self.queued = 0
+        self.throttled = 0
+        self.decreases = 0
+        self.peak_limit = self.limit
+        self.queue_wait_s = 0.0
+
+    @property
+    def window(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def _admissible(self, now: float) -> bool:
+        return self.in_flight < self.window and now >= self.paused_until
+
+    def _dispatch(self):
+        """Grant free slots to queued requests in priority order; the lock must be held"""
+        now = time.monotonic()
+        while self._waiters and self._admissible(now):
+            priority, _, waiter = heapq.heappop(self._waiters)
+            if waiter.cancelled:
+                continue
+            self.in_flight += 1
+            self.admitted[priority] += 1
+            waiter.grant()
+        if self._waiters and now < self.paused_until and self._wakeup is None:
+            # No response frees a slot while the subscription is paused, so resume on a timer
+            self._wakeup = threading.Timer(self.paused_until - now, self._resume)
+            self._wakeup.daemon = True
+            self._wakeup.start()
+
+    def _resume(self):
+        with self._lock:
+            self._wakeup = None
+            self._dispatch()
+
+    def _try_acquire(self, priority: int, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Take a slot right away (returns None) or queue a waiter for one"""
+        with self._lock:
+            if not self._waiters and self._admissible(time.monotonic()):
+                self.in_flight += 1
+                self.admitted[priority] += 1
+                return None
+            waiter = _Waiter(loop)
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            self.queued += 1
+            self._dispatch()
+            return waiter
+
+    async def acquire(self, priority: Optional[int] = None):
+        """Wait for a slot in the window"""
+        priority = _priority.get() if priority is None else priority
+        loop = asyncio.get_running_loop()
+        waiter = self._try_acquire(priority, loop)
+        if waiter is None:
+            return
+        started = time.monotonic()
+        with span("queue", "arm"):
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    waiter.cancelled = True
+                    granted = waiter.granted
+                if granted:
+                    self.release()
+                raise
+            finally:
+                self.queue_wait_s += time.monotonic() - started
+
+    def acquire_sync(self, priority: Optional[int] = None):
+        """Blocking variant of acquire for the sync clients"""
+        priority = _priority.get() if priority is None else priority
+        waiter = self._try_acquire(priority, None)
+        if waiter is None:
+            return
+        started = time.monotonic()
+        with span("queue", "arm"):
+            waiter.event.wait()
+        self.queue_wait_s += time.monotonic() - started
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        """Adjust the window from a response: additive increase, multiplicative decrease"""
+        remaining = _remaining_reads(headers)
+        with self._lock:
+            now = time.monotonic()
+            self._since_decrease += 1
+            if remaining is not None:
+                self.remaining_reads = remaining
+            if status == 429 or (status == 503 and "retry-after" in headers):
+                self.throttled += 1
+                retry_after = parse_retry_after(headers)
+                self.paused_until = max(self.paused_until, now + (retry_after if retry_after is not None else 1.0))
+                self._decrease()
+            elif remaining is not None and remaining < self.low_watermark:
+                # Back off before ARM starts rejecting
+                self._decrease()
+            elif self.adaptive and status < 400 and self.limit < self.max_limit:
+                # One more slot per window's worth of successful responses
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+                self._dispatch()
+
+    def _decrease(self):
+        # Responses to requests sent before the last decrease don't count as new congestion
+        if not self.adaptive or self._since_decrease < self.window:
+            return
+        self._since_decrease = 0
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        self.decreases += 1
+        logger.info(f"ARM throttling signal, concurrency window now {self.window}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return window, queue and throttling counters"""
+        return {
+            "adaptive": self.adaptive,
+            "window": self.window,
+            "peak_window": int(self.peak_limit),
+            "in_flight": self.in_flight,
+            "queued_now": sum(1 for _, _, waiter in self._waiters if not waiter.cancelled),
+            "admitted_interactive": self.admitted[INTERACTIVE],
+            "admitted_background": self.admitted[BACKGROUND],
+            "queued_total": self.queued,
+            "queue_wait_s": round(self.queue_wait_s, 3),
+            "throttled_responses": self.throttled,
+            "window_decreases": self.decreases,
+            "remaining_reads": self.remaining_reads,
+            "paused_for_s": round(max(0.0, self.paused_until - time.monotonic()), 3),
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def _policy_classes():
+    # azure-core is imported with the management SDKs, when the first clients are built
+    from azure.core.pipeline.policies import AsyncHTTPPolicy, AsyncRetryPolicy, HTTPPolicy, RetryPolicy
+
+    def jittered(backoff: float) -> float:
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def retry_after_with_jitter(policy, response) -> Optional[float]:
+        # Never earlier than ARM asked; spread clients that were throttled together
+        retry_after = policy.get_retry_after(response)
+        return retry_after + random.uniform(0, policy.retry_after_jitter) if retry_after else None
+
+    class ArmSchedulerPolicy(HTTPPolicy):
+        """Holds a scheduler slot for the duration of each sync request attempt"""
+
+        def __init__(self, scheduler: ArmScheduler):
+            super().__init__()
+            self.scheduler = scheduler
+
+        def send(self, request):
+            self.scheduler.acquire_sync()
+            try:
+                response = self.next.send(request)
+            finally:
+                self.scheduler.release()
+            self.scheduler.observe(response.http_response.status_code, response.http_response.headers)
+            return response
+
+    class AsyncArmSchedulerPolicy(AsyncHTTPPolicy):
+        """Holds a scheduler slot for the duration of each async request attempt"""
+
+        def __init__(self, scheduler: ArmScheduler):
+            super().__init__()
+            self.scheduler = scheduler
+
+        async def send(self, request):
+            await self.scheduler.acquire()
+            try:
+                response = await self.next.send(request)
+            finally:
+                self.scheduler.release()
+            self.scheduler.observe(response.http_response.status_code, response.http_response.headers)
+            return response
+
+    class JitteredRetryPolicy(RetryPolicy):
+        """azure-core retries with jittered exponential backoff and jittered Retry-After waits"""
+
+        def __init__(self, retry_after_jitter: float = 1.0, **kwargs):
+            super().__init__(**kwargs)
+            self.retry_after_jitter = retry_after_jitter
+
+        def get_backoff_time(self, settings):
+            return jittered(super().get_backoff_time(settings))
+
+        def _sleep_for_retry(self, response, transport):
+            retry_after = retry_after_with_jitter(self, response)
+            if retry_after:
+                transport.sleep(retry_after)
+                return True
+            return False
+
+    class AsyncJitteredRetryPolicy(AsyncRetryPolicy):
+        """Async counterpart of JitteredRetryPolicy"""
+
+        def __init__(self, retry_after_jitter: float = 1.0, **kwargs):
+            super().__init__(**kwargs)
+            self.retry_after_jitter = retry_after_jitter
+
+        def get_backoff_time(self, settings):
+            return jittered(super().get_backoff_time(settings))
+
+        async def _sleep_for_retry(self, response, transport):
+            retry_after = retry_after_with_jitter(self, response)
+            if retry_after:
+                await transport.sleep(retry_after)
+                return True
+            return False
+
+    return ArmSchedulerPolicy, AsyncArmSchedulerPolicy, JitteredRetryPolicy, AsyncJitteredRetryPolicy
+
+
+def scheduler_client_options(scheduler: ArmScheduler, is_async: bool,
+                             retry_after_jitter: float = 1.0) -> Dict[str, Any]:
+    """Management client arguments routing every request attempt through the scheduler"""
+    scheduler_policy, async_scheduler_policy, retry_policy, async_retry_policy = _policy_classes()
+    if is_async:
+        return {
+            "retry_policy": async_retry_policy(retry_after_jitter=retry_after_jitter),
+            "per_retry_policies": [async_scheduler_policy(scheduler)],
+        }
+    return {
+        "retry_policy": retry_policy(retry_after_jitter=retry_after_jitter),
+        "per_retry_policies": [scheduler_policy(scheduler)],
+    }
@@ -0,0 +1,490 @@
+"""
+Azure Client Pool Module
+
+Keeps Azure credentials, access tokens and management clients alive for the
+whole process so MCP tool calls don't pay for them on every request.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from .arm_scheduler import ArmScheduler
+from .config import get_config
+from .telemetry import get_telemetry, span, start_span
+
+# The identity and management SDKs (and their HTTP stacks) take about a second
+# to import, so they are loaded when the first pool or client is built
+if TYPE_CHECKING:
+    import aiohttp
+    from azure.core.credentials import AccessToken
+    from azure.core.pipeline.transport import AioHttpTransport, RequestsTransport
+    from azure.mgmt.network import NetworkManagementClient
+    from azure.mgmt.network.aio import NetworkManagementClient as AsyncNetworkManagementClient
+    from azure.mgmt.resource import ResourceManagementClient
+    from azure.mgmt.resource.resources.aio import ResourceManagementClient as AsyncResourceManagementClient
+    from azure.mgmt.resource.subscriptions.aio import SubscriptionClient as AsyncSubscriptionClient
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """In-memory access-token cache that refreshes tokens before they expire"""
+
+    def __init__(self, refresh_margin: int = 300):
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[Tuple, "AccessToken"] = {}
+        self.hits = 0
+        self.refreshes = 0
+
+    def get(self, key: Tuple) -> Optional["AccessToken"]:
+        """Return a cached token that is still valid beyond the refresh margin"""
+        token = self._tokens.get(key)
+        if token and token.expires_on - self.refresh_margin > time.time():
+            self.hits += 1
+            return token
+        return None
+
+    def put(self, key: Tuple, token: "AccessToken"):
+        """Store a freshly acquired token"""
+        self._tokens[key] = token
+        self.refreshes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return token cache counters"""
+        return {
+            "cached_tokens": len(self._tokens),
+            "token_cache_hits": self.hits,
+            "token_refreshes": self.refreshes,
+        }
+
+
+class CachedTokenCredential:
+    """Credential wrapper that serves access tokens from a shared TokenCache"""
+
+    def __init__(self, credential, cache: TokenCache):
+        self._credential = credential
+        self._cache = cache
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, claims: Optional[str] = None,
+                  tenant_id: Optional[str] = None, **kwargs) -> "AccessToken":
+        # Claims challenges (CAE) must always go to the underlying credential
+        if claims:
+            return self._credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+
+        key = (tenant_id, scopes)
+        token = self._cache.get(key)
+        if token:
+            return token
+
+        with span("token", "get_token"), self._lock:
+            token = self._cache.get(key)
+            if token:
+                return token
+            logger.debug(f"Refreshing Azure access token for scopes {scopes}")
+            token = self._credential.get_token(*scopes, tenant_id=tenant_id, **kwargs)
+            self._cache.put(key, token)
+            return token
+
+    def close(self):
+        """Close the underlying credential"""
+        if hasattr(self._credential, "close"):
+            self._credential.close()
+
+
+class AsyncCachedTokenCredential:
+    """Async credential wrapper that serves access tokens from a shared TokenCache"""
+
+    def __init__(self, credential, cache: TokenCache):
+        self._credential = credential
+        self._cache = cache
+        # asyncio locks belong to one event loop; the lock is rebuilt when the loop changes
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_token(self, *scopes: str, claims: Optional[str] = None,
+                        tenant_id: Optional[str] = None, **kwargs) -> "AccessToken":
+        if claims:
+            return await self._credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+
+        key = (tenant_id, scopes)
+        token = self._cache.get(key)
+        if token:
+            return token
+
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        with span("token", "get_token"):
+            async with self._lock:
+                token = self._cache.get(key)
+                if token:
+                    return token
+                logger.debug(f"Refreshing Azure access token for scopes {scopes}")
+                token = await self._credential.get_token(*scopes, tenant_id=tenant_id, **kwargs)
+                self._cache.put(key, token)
+                return token
+
+    async def close(self):
+        """Close the underlying credential"""
+        await self._credential.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+def arm_operation(method: str, url: str) -> str:
+    """Request method and lowercased ARM path with resource names replaced, e.g.
+    GET /subscriptions/{}/resourcegroups/{}/providers/microsoft.network/virtualnetworks/{}"""
+    parts = urlsplit(url).path.strip("/").split("/")
+    template = []
+    index = 0
+    expect_name = False
+    while index < len(parts):
+        part = parts[index]
+        if expect_name:
+            template.append("{}")
+            expect_name = False
+        elif part.lower() == "providers" and index + 1 < len(parts):
+            # The provider namespace follows "providers" instead of a name
+            template += [part, parts[index + 1]]
+            index += 1
+        else:
+            template.append(part)
+            expect_name = True
+        index += 1
+    return f"{method} /{'/'.join(template).lower()}"
+
+
+@functools.lru_cache(maxsize=None)
+def _arm_telemetry_policy_class():
+    from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+    class ArmTelemetryPolicy(SansIOHTTPPolicy):
+        """Records every ARM HTTP request (each page and each retry) as an "arm" span"""
+
+        def on_request(self, request):
+            http_request = request.http_request
+            request.context["telemetry_span"] = start_span("arm", arm_operation(http_request.method, http_request.url))
+
+        def on_response(self, request, response):
+            arm_span = request.context.pop("telemetry_span", None)
+            if arm_span is not None:
+                arm_span.end(str(response.http_response.status_code))
+
+        def on_exception(self, request):
+            arm_span = request.context.pop("telemetry_span", None)
+            if arm_span is not None:
+                arm_span.end("error")
+
+    return ArmTelemetryPolicy
+
+
+def _client_options(scheduler: ArmScheduler, is_async: bool) -> Dict[str, Any]:
+    """Extra management client arguments; the scheduler and telemetry policies run once per attempt"""
+    from .arm_scheduler import scheduler_client_options
+
+    options = scheduler_client_options(scheduler, is_async)
+    if get_telemetry().enabled:
+        # After the scheduler, so ARM spans leave out the time spent queued for a slot
+        options["per_retry_policies"].append(_arm_telemetry_policy_class()())
+    return options
+
+
+@dataclass
+class SubscriptionClients:
+    """Management clients bound to a single subscription"""
+
+    subscription_id: str
+    resource_client: "ResourceManagementClient"
+    network_client: "NetworkManagementClient"
+    scheduler: ArmScheduler
+
+
+@dataclass
+class AsyncSubscriptionClients:
+    """Async management clients bound to a single subscription"""
+
+    subscription_id: str
+    resource_client: "AsyncResourceManagementClient"
+    network_client: "AsyncNetworkManagementClient"
+    # Admits every ARM request against this subscription; shared with the sync clients
+    scheduler: ArmScheduler
+
+
+class AzureClientPool:
+    """Process-wide pool of Azure management clients keyed by subscription id"""
+
+    def __init__(self, credential=None, async_credential=None, pool_size: int = 20,
+                 token_refresh_margin: int = 300, max_concurrency: int = 8,
+                 adaptive_concurrency: bool = True, max_adaptive_concurrency: int = 64,
+                 ratelimit_low_watermark: int = 50,
+                 transport_factory: Optional[Callable[[], Any]] = None,
+                 async_transport_factory: Optional[Callable[[], Any]] = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from azure.identity import AzureCliCredential
+        from azure.identity.aio import AzureCliCredential as AsyncAzureCliCredential
+
+        self.token_cache = TokenCache(refresh_margin=token_refresh_margin)
+        self.credential = CachedTokenCredential(credential or AzureCliCredential(), self.token_cache)
+        # The async credential shares the token cache, so sync and async callers reuse tokens
+        self.async_credential = AsyncCachedTokenCredential(
+            async_credential or AsyncAzureCliCredential(), self.token_cache
+        )
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_adaptive_concurrency = max_adaptive_concurrency
+        self.ratelimit_low_watermark = ratelimit_low_watermark
+        self._schedulers: Dict[str, ArmScheduler] = {}
+        # Override the pooled HTTP transports, e.g. with recorded-response fakes for benchmarks
+        self._transport_factory = transport_factory
+        self._async_transport_factory = async_transport_factory
+
+        # One keep-alive HTTP session shared by every sync client in the pool
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._clients: Dict[str, SubscriptionClients] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Async clients are bound to the event loop they were created on
+        self._async_session: Optional["aiohttp.ClientSession"] = None
+        self._async_clients: Dict[str, AsyncSubscriptionClients] = {}
+        self._async_subscription_client: Optional["AsyncSubscriptionClient"] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Closes of clients left behind by an earlier event loop
+        self._retiring: Set[asyncio.Task] = set()
+
+    def _transport(self) -> "RequestsTransport":
+        from azure.core.pipeline.transport import RequestsTransport
+
+        if self._transport_factory is not None:
+            return self._transport_factory()
+        return RequestsTransport(session=self._session, session_owner=False)
+
+    def _async_transport(self) -> "AioHttpTransport":
+        import aiohttp
+        from azure.core.pipeline.transport import AioHttpTransport
+
+        if self._async_transport_factory is not None:
+            return self._async_transport_factory()
+        if self._async_session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._async_session = aiohttp.ClientSession(connector=connector)
+        return AioHttpTransport(session=self._async_session, session_owner=False)
+
+    def scheduler(self, subscription_id: str) -> ArmScheduler:
+        """The ARM request scheduler of a subscription, shared by its sync and async clients"""
+        scheduler = self._schedulers.get(subscription_id)
+        if scheduler is None:
+            scheduler = self._schedulers.setdefault(subscription_id, ArmScheduler(
+                initial_limit=self.max_concurrency,
+                max_limit=self.max_adaptive_concurrency,
+                low_watermark=self.ratelimit_low_watermark,
+                adaptive=self.adaptive_concurrency,
+            ))
+        return scheduler
+
+    def get(self, subscription_id: str) -> SubscriptionClients:
+        """Get (or lazily build) the management clients for a subscription"""
+        clients = self._clients.get(subscription_id)
+        if clients:
+            self.hits += 1
+            return clients
+
+        with self._lock:
+            clients = self._clients.get(subscription_id)
+            if clients:
+                self.hits += 1
+                return clients
+
+            from azure.mgmt.network import NetworkManagementClient
+            from azure.mgmt.resource import ResourceManagementClient
+
+            self.misses += 1
+            logger.info(f"Creating Azure management clients for subscription {subscription_id[:8]}...")
+            scheduler = self.scheduler(subscription_id)
+            clients = SubscriptionClients(
+                subscription_id=subscription_id,
+                resource_client=ResourceManagementClient(
+                    self.credential, subscription_id, transport=self._transport(),
+                    **_client_options(scheduler, is_async=False)
+                ),
+                network_client=NetworkManagementClient(
+                    self.credential, subscription_id, transport=self._transport(),
+                    **_client_options(scheduler, is_async=False)
+                ),
+                scheduler=scheduler,
+            )
+            self._clients[subscription_id] = clients
+            return clients
+
+    def _bind_loop(self):
+        """Async clients and the aiohttp session belong to one event loop; rebuild them on a new one"""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            if self._async_loop is not None:
+                logger.warning("Event loop changed, rebuilding async Azure clients")
+                self._retire_async_clients(self._async_loop, loop)
+            self._async_clients = {}
+            self._async_subscription_client = None
+            self._async_session = None
+            self._async_loop = loop
+
+    def _retire_async_clients(self, old_loop: asyncio.AbstractEventLoop, loop: asyncio.AbstractEventLoop):
+        """Close the previous loop's clients and session: on that loop while it still runs, else on this one"""
+        closing = _close_async_clients(
+            list(self._async_clients.values()), self._async_subscription_client, self._async_session
+        )
+        if old_loop.is_running() and not old_loop.is_closed():
+            future = asyncio.run_coroutine_threadsafe(closing, old_loop)
+        else:
+            # aiohttp skips the sockets of a closed loop; the session and clients are still marked closed
+            future = loop.create_task(closing)
+            self._retiring.add(future)
+            future.add_done_callback(self._retiring.discard)
+        future.add_done_callback(_log_close_failure)
+
+    def get_subscription_client_async(self) -> "AsyncSubscriptionClient":
+        """Get (or lazily build) the tenant-level async client that lists visible subscriptions"""
+        self._bind_loop()
+        if self._async_subscription_client is None:
+            from azure.mgmt.resource.subscriptions.aio import SubscriptionClient as AsyncSubscriptionClient
+
+            self._async_subscription_client = AsyncSubscriptionClient(
+                self.async_credential, transport=self._async_transport()
+            )
+        return self._async_subscription_client
+
+    def get_async(self, subscription_id: str) -> AsyncSubscriptionClients:
+        """Get (or lazily build) the async management clients for a subscription
+
+        Must be called from inside the running event loop.
+        """
+        self._bind_loop()
+
+        clients = self._async_clients.get(subscription_id)
+        if clients:
+            self.hits += 1
+            return clients
+
+        from azure.mgmt.network.aio import NetworkManagementClient as AsyncNetworkManagementClient
+        from azure.mgmt.resource.resources.aio import ResourceManagementClient as AsyncResourceManagementClient
+
+        self.misses += 1
+        logger.info(f"Creating async Azure management clients for subscription {subscription_id[:8]}...")
+        scheduler = self.scheduler(subscription_id)
+        clients = AsyncSubscriptionClients(
+            subscription_id=subscription_id,
+            resource_client=AsyncResourceManagementClient(
+                self.async_credential, subscription_id, transport=self._async_transport(),
+                **_client_options(scheduler, is_async=True)
+            ),
+            network_client=AsyncNetworkManagementClient(
+                self.async_credential, subscription_id, transport=self._async_transport(),
+                **_client_options(scheduler, is_async=True)
+            ),
+            scheduler=scheduler,
+        )
+        self._async_clients[subscription_id] = clients
+        return clients
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool and token counters so reuse can be verified"""
+        return {
+            "subscriptions": len(self._clients),
+            "async_subscriptions": len(self._async_clients),
+            "pool_hits": self.hits,
+            "pool_misses": self.misses,
+            **self.token_cache.stats(),
+            "arm_schedulers": {
+                subscription_id[:8]: scheduler.stats() for subscription_id, scheduler in self._schedulers.items()
+            },
+        }
+
+    def close(self):
+        """Close all pooled clients, the shared session and the credential"""
+        with self._lock:
+            for clients in self._clients.values():
+                clients.resource_client.close()
+                clients.network_client.close()
+            self._clients.clear()
+        self._session.close()
+        self.credential.close()
+
+    async def aclose(self):
+        """Close all pooled async clients, the shared aiohttp session and the async credential"""
+        await _close_async_clients(
+            list(self._async_clients.values()), self._async_subscription_client, self._async_session
+        )
+        self._async_clients.clear()
+        self._async_subscription_client = None
+        self._async_session = None
+        self._async_loop = None
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+        await self.async_credential.close()
+
+
+async def _close_async_clients(clients: Iterable[AsyncSubscriptionClients],
+                               subscription_client: Optional["AsyncSubscriptionClient"],
+                               session: Optional["aiohttp.ClientSession"]):
+    for subscription_clients in clients:
+        await subscription_clients.resource_client.close()
+        await subscription_clients.network_client.close()
+    if subscription_client is not None:
+        await subscription_client.close()
+    if session is not None:
+        await session.close()
+
+
+def _log_close_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Error closing async Azure clients of a previous event loop: {future.exception()}")
+
+
+_client_pool: Optional[AzureClientPool] = None
+_client_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> AzureClientPool:
+    """Get the global Azure client pool, creating it on first use"""
+    global _client_pool
+    if _client_pool is None:
+        with _client_pool_lock:
+            if _client_pool is None:
+                config = get_config()
+                _client_pool = AzureClientPool(
+                    pool_size=config.azure_http_pool_size,
+                    token_refresh_margin=config.azure_token_refresh_margin,
+                    max_concurrency=config.azure_max_concurrency,
+                    adaptive_concurrency=config.arm_adaptive_concurrency,
+                    max_adaptive_concurrency=config.arm_max_concurrency,
+                    ratelimit_low_watermark=config.arm_ratelimit_low_watermark,
+                )
+    return _client_pool
+
+
+async def close_client_pool():
+    """Close the global Azure client pool if it was ever created"""
+    global _client_pool
+    if _client_pool is not None:
+        await _client_pool.aclose()
+        _client_pool.close()
+        _client_pool = None
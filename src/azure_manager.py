@@ -4,54 +4,112 @@ Azure Integration Module
 This module handles interactions with Azure resources for network troubleshooting.
 """
 
-from azure.identity import AzureCliCredential
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.network import NetworkManagementClient
+import asyncio
 import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from .address_overlap import AddressSpace, check_prefix, find_address_conflicts
+from .arm_scheduler import background_priority
+from .azure_clients import AzureClientPool, get_client_pool
+from .config import get_config
+from .deployment_tree import DeploymentRef, DeploymentTraversal
+from .inventory_cache import InventoryCache, get_inventory_cache
+from .inventory_store import AGGREGATE_COLUMNS, InventoryStore, get_inventory_store, resource_group_of
+from .network_snapshot import (
+    NetworkSnapshot,
+    analyze_network_snapshot,
+    collect_network_snapshot,
+    collect_network_snapshot_async,
+    to_arm_json,
+)
+from .pagination import (
+    EXPANDED_FIELDS,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+    project,
+    validate_fields,
+)
+from .resource_records import ResourceRecord
+from .single_flight import SingleFlight
+from .telemetry import current_span, traced
 
 logger = logging.getLogger(__name__)
 
+# Extra resource fields requested from the listing API for incremental inventory sync
+INVENTORY_EXPAND = "createdTime,changedTime,provisioningState"
+# Re-read a window before the high-water mark so changes racing the last sync aren't missed
+CHANGED_TIME_OVERLAP = timedelta(minutes=5)
+
+# Concurrent reads that find the inventory store stale share one sync per subscription
+_inventory_syncs = SingleFlight()
+# Syncs started by reads that didn't wait for them, by subscription
+_background_syncs: Dict[str, asyncio.Task] = {}
+
+def _resource_to_dict(resource) -> Dict[str, Any]:
+    """Convert an SDK GenericResource into the dict shape returned by the tools"""
+    return ResourceRecord.from_sdk(resource).to_dict()
+
+def _odata_quote(value: str) -> str:
+    """Escape a value for a single-quoted OData string literal"""
+    return value.replace("'", "''")
+
+def _deployment_to_dict(deployment, deployment_name: str, resource_group: str) -> Dict[str, Any]:
+    """Convert an SDK DeploymentExtended into the dict shape returned by the tools"""
+    error = deployment.properties.error
+    return {
+        "deployment_name": deployment_name,
+        "resource_group": resource_group,
+        "deployment_state": deployment.properties.provisioning_state,
+        # The SDK error model is not JSON serializable; its dict form also keeps the nested details
+        "error": error.as_dict() if error else None,
+        "timestamp": deployment.properties.timestamp
+    }
+
 class AzureManager:
     """Manages Azure resource operations"""
     
-    def __init__(self, subscription_id: str = None):
+    def __init__(self, subscription_id: str = None, client_pool: AzureClientPool = None):
         self.subscription_id = subscription_id
-        # Use Azure CLI logged-in credentials
-        self.credential = AzureCliCredential()
+        # Credentials and clients are shared process-wide through the client pool
+        pool = client_pool or get_client_pool()
+        self.credential = pool.credential
         
         if subscription_id:
-            self.resource_client = ResourceManagementClient(
-                self.credential, subscription_id
-            )
-            self.network_client = NetworkManagementClient(
-                self.credential, subscription_id
-            )
+            clients = pool.get(subscription_id)
+            self.resource_client = clients.resource_client
+            self.network_client = clients.network_client
     
+    @traced("azure")
     def list_resource_groups(self):
         """List all resource groups in the subscription"""
         try:
             resource_groups = list(self.resource_client.resource_groups.list())
+            current_span().add("items", len(resource_groups))
             return [rg.name for rg in resource_groups]
         except Exception as e:
             logger.error(f"Error listing resource groups: {e}")
             return []
     
+    @traced("azure")
+    def get_network_snapshot(self, resource_group: str) -> NetworkSnapshot:
+        """Collect the network resources of a group into an indexed snapshot"""
+        return collect_network_snapshot(
+            self.network_client, resource_group, max_workers=get_config().azure_max_concurrency
+        )
+    
+    @traced("azure")
     def get_network_issues(self, resource_group: str):
         """Analyze network resources for potential issues"""
-        # TODO: Implement network analysis logic
-        # This is where you would check:
-        # - Network security groups
-        # - Route tables
-        # - Virtual networks
-        # - Load balancers
-        # - Application gateways
-        
-        logger.info(f"Analyzing network resources in {resource_group}")
-        return {
-            "status": "analysis_needed",
-            "message": "Network analysis logic to be implemented"
-        }
+        try:
+            logger.info(f"Analyzing network resources in {resource_group}")
+            return analyze_network_snapshot(self.get_network_snapshot(resource_group))
+        except Exception as e:
+            logger.error(f"Error analyzing network resources in {resource_group}: {e}")
+            return {"error": str(e), "resource_group": resource_group}
     
+    @traced("azure")
     def diagnose_deployment_error(self, deployment_name: str, resource_group: str):
         """Diagnose deployment errors"""
         try:
@@ -60,37 +118,443 @@ class AzureManager:
                 resource_group, deployment_name
             )
             
-            return {
-                "deployment_name": deployment_name,
-                "resource_group": resource_group,
-                "deployment_state": deployment.properties.provisioning_state,
-                "error": deployment.properties.error if deployment.properties.error else None,
-                "timestamp": deployment.properties.timestamp
-            }
+            return _deployment_to_dict(deployment, deployment_name, resource_group)
         except Exception as e:
             logger.error(f"Error getting deployment details: {e}")
             return {"error": str(e)}
     
+    @traced("azure")
     def list_resources_in_group(self, resource_group: str):
         """List all resources in a specific resource group"""
         try:
-            resources = list(self.resource_client.resources.list_by_resource_group(resource_group))
-            resource_list = []
+            resources = self.resource_client.resources.list_by_resource_group(resource_group)
+            resource_list = [_resource_to_dict(resource) for resource in resources]
+            current_span().add("items", len(resource_list))
+            
+            return {
+                "resource_group": resource_group,
+                "resource_count": len(resource_list),
+                "resources": resource_list
+            }
+            
+        except Exception as e:
+            logger.error(f"Error listing resources in group {resource_group}: {e}")
+            return {"error": str(e), "resource_group": resource_group}
+
+class AsyncAzureManager:
+    """Manages Azure resource operations without blocking the event loop"""
+    
+    def __init__(self, subscription_id: str = None, client_pool: AzureClientPool = None,
+                 cache: InventoryCache = None, store: InventoryStore = None):
+        self.subscription_id = subscription_id
+        pool = client_pool or get_client_pool()
+        self._pool = pool
+        self.credential = pool.async_credential
+        self.cache = cache or get_inventory_cache()
+        # None when the local inventory store is disabled; reads then always go to ARM
+        self.store = store or get_inventory_store()
+        
+        if subscription_id:
+            clients = pool.get_async(subscription_id)
+            self.resource_client = clients.resource_client
+            self.network_client = clients.network_client
+            # Shared per subscription; it admits each ARM request, so concurrent tool calls share the window
+            self.scheduler = clients.scheduler
+    
+    async def _collect(self, pager, convert) -> List[Any]:
+        """Drain an async pager page by page; each page request waits for a scheduler slot"""
+        items = []
+        pages = 0
+        async for page in pager.by_page():
+            pages += 1
+            async for item in page:
+                items.append(convert(item))
+        span = current_span()
+        span.add("pages", pages)
+        span.add("items", len(items))
+        return items
+    
+    async def gather(self, *reads: Awaitable) -> List[Any]:
+        """Run independent reads in parallel; the ARM scheduler bounds their requests"""
+        return await asyncio.gather(*reads)
+    
+    async def _fetch_resource_groups(self, max_age: float = None, sync: bool = True) -> List[str]:
+        if await self._inventory_available(max_age, sync):
+            return await asyncio.to_thread(self.store.resource_groups, self.subscription_id)
+        return await self._collect(
+            self.resource_client.resource_groups.list(), lambda rg: rg.name
+        )
+    
+    async def _fetch_resources_in_group(self, resource_group: str, max_age: float = None) -> List[ResourceRecord]:
+        if await self._inventory_available(max_age):
+            return await asyncio.to_thread(self.store.resources_in_group, self.subscription_id, resource_group)
+        return await self._collect(
+            self.resource_client.resources.list_by_resource_group(resource_group),
+            ResourceRecord.from_sdk
+        )
+    
+    async def _inventory_available(self, max_age: float = None, sync: bool = True, wait: bool = False) -> bool:
+        """Whether the inventory store is within max_age seconds; False means read live from ARM
+
+        A store that isn't fresh is synced in the background while the read
+        goes live, so interactive calls never wait for a subscription-wide
+        enumeration. With wait, the caller waits for the sync instead (and is
+        served the old snapshot if it fails); without sync, no sync is started.
+        """
+        if self.store is None:
+            return False
+        max_age = get_config().inventory_store_max_age if max_age is None else max_age
+        state = self.store.sync_state(self.subscription_id)
+        if state and time.time() - state["last_sync"] <= max_age:
+            return True
+        if not sync:
+            return False
+        if not wait:
+            self._sync_in_background()
+            return False
+        try:
+            await self.sync_inventory()
+            return True
+        except Exception as e:
+            if state is None:
+                logger.warning(f"Inventory sync failed, reading live from ARM: {e}")
+                return False
+            logger.warning(f"Inventory sync failed, serving snapshot from {state['last_sync']:.0f}: {e}")
+            return True
+    
+    def _sync_in_background(self):
+        """Start syncing the inventory store unless a background sync of the subscription is running"""
+        running = _background_syncs.get(self.subscription_id)
+        if running is not None and not running.done():
+            return
+        
+        async def sync():
+            try:
+                # Nobody is waiting on it, so its ARM requests yield to interactive ones
+                with background_priority():
+                    await self.sync_inventory()
+            except Exception as e:
+                logger.warning(f"Background inventory sync of {self.subscription_id} failed: {e}")
+        
+        _background_syncs[self.subscription_id] = asyncio.create_task(sync())
+    
+    @traced("azure")
+    async def sync_inventory(self, full: bool = False) -> Dict[str, Any]:
+        """Refresh the inventory store: a bulk enumeration, or only resources changed since the last sync"""
+        state = self.store.sync_state(self.subscription_id)
+        full = (full or state is None or not state["high_water"]
+                or time.time() - state["last_full_sync"] > get_config().inventory_store_full_sync_interval)
+        if full:
+            return await _inventory_syncs.run(("inventory_sync", self.subscription_id, "full"),
+                                              self._coordinated_sync(self._full_sync, state))
+        return await _inventory_syncs.run(
+            ("inventory_sync", self.subscription_id, "incremental"),
+            self._coordinated_sync(lambda: self._incremental_sync(state["high_water"]), state)
+        )
+    
+    def _coordinated_sync(self, sync: Callable[[], Awaitable[Dict[str, Any]]], state: Optional[Dict[str, Any]]):
+        """Let one worker process at a time sync a subscription; the others wait for its snapshot"""
+        shared = self.cache.shared
+        if shared is None:
+            return sync
+        last_sync = state["last_sync"] if state else 0
+        
+        async def synced_elsewhere() -> Optional[Dict[str, Any]]:
+            current = await asyncio.to_thread(self.store.sync_state, self.subscription_id)
+            if current and current["last_sync"] > last_sync:
+                return {"mode": "shared", "last_sync": current["last_sync"]}
+            return None
+        
+        return lambda: shared.run_once(f"inventory-sync:{self.subscription_id}", synced_elsewhere, sync)
+    
+    async def _list_all(self, filter_expression: str = None) -> List[ResourceRecord]:
+        return await self._collect(
+            self.resource_client.resources.list(filter=filter_expression, expand=INVENTORY_EXPAND),
+            ResourceRecord.from_sdk
+        )
+    
+    async def _list_group_records(self) -> List[Dict[str, Any]]:
+        return await self._collect(
+            self.resource_client.resource_groups.list(),
+            lambda rg: {"name": rg.name, "location": rg.location}
+        )
+    
+    async def _full_sync(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        synced_at = time.time()
+        resources, groups = await self.gather(self._list_all(), self._list_group_records())
+        await asyncio.to_thread(self.store.replace_subscription, self.subscription_id, resources, groups, synced_at)
+        logger.info(f"Full inventory sync of {self.subscription_id}: {len(resources)} resources")
+        return {"mode": "full", "resources": len(resources), "resource_groups": len(groups),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+    
+    async def _incremental_sync(self, high_water: str) -> Dict[str, Any]:
+        from azure.core.exceptions import HttpResponseError
+        
+        started = time.perf_counter()
+        synced_at = time.time()
+        since = datetime.fromisoformat(high_water).astimezone(timezone.utc) - CHANGED_TIME_OVERLAP
+        try:
+            changed, groups = await self.gather(
+                self._list_all(filter_expression=f"changedTime ge '{since.strftime('%Y-%m-%dT%H:%M:%SZ')}'"),
+                self._list_group_records()
+            )
+        except HttpResponseError as e:
+            if e.status_code != 400:
+                raise
+            # Not every API version accepts changedTime in $filter; fall back to a bulk enumeration
+            logger.warning(f"changedTime filter rejected ({e.message}), running a full inventory sync")
+            return await self._full_sync()
+        await asyncio.to_thread(self.store.apply_changes, self.subscription_id, changed, groups, synced_at)
+        logger.info(f"Incremental inventory sync of {self.subscription_id}: {len(changed)} changed resources")
+        return {"mode": "incremental", "changed_since": since.isoformat(), "resources": len(changed),
+                "resource_groups": len(groups), "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+    
+    @traced("azure")
+    async def aggregate_inventory(self, group_by: str = "type", resource_group: str = None,
+                                  max_age: float = None) -> Dict[str, Any]:
+        """Resource counts per type/location/SKU/... answered from the local inventory store"""
+        try:
+            if self.store is None:
+                return {"error": "Inventory store is disabled (INVENTORY_STORE_ENABLED=false)"}
+            if group_by not in AGGREGATE_COLUMNS:
+                return {"error": f"group_by must be one of {sorted(AGGREGATE_COLUMNS)}"}
+            # Counts can only come from the store, so this one waits for the sync
+            await self._inventory_available(max_age, wait=True)
+            groups = await asyncio.to_thread(
+                self.store.aggregate, self.subscription_id, group_by, resource_group
+            )
+            return {
+                "group_by": group_by,
+                "resource_group": resource_group,
+                "total": sum(group["count"] for group in groups),
+                "groups": groups,
+                "sync_state": self.store.sync_state(self.subscription_id),
+            }
+        except Exception as e:
+            logger.error(f"Error aggregating inventory: {e}")
+            return {"error": str(e)}
+    
+    async def _fetch_virtual_networks(self) -> List[Dict[str, Any]]:
+        return await self._collect(self.network_client.virtual_networks.list_all(), to_arm_json)
+    
+    def _resources_key(self, resource_group: str):
+        return ("resources", self.subscription_id, resource_group.lower())
+    
+    def invalidate_inventory(self, resource_group: str = None) -> int:
+        """Drop cached inventory for one resource group, or the whole subscription"""
+        # Deleted resources only disappear from the store on its next full sync
+        if self.store is not None:
+            self.store.mark_stale(self.subscription_id)
+        # VNet listings are subscription-wide, so any change may affect them
+        dropped = self.cache.invalidate("virtual_networks", self.subscription_id)
+        if resource_group:
+            return dropped + self.cache.invalidate(*self._resources_key(resource_group))
+        return (dropped
+                + self.cache.invalidate("resources", self.subscription_id)
+                + self.cache.invalidate("resource_groups", self.subscription_id))
+    
+    @traced("azure")
+    async def list_virtual_networks(self) -> List[Dict[str, Any]]:
+        """All VNets in the subscription (ARM REST JSON, with subnets and peerings)"""
+        return await self.cache.get_or_load(
+            ("virtual_networks", self.subscription_id), self._fetch_virtual_networks
+        )
+    
+    @traced("azure")
+    async def list_resource_groups(self, max_age: float = None):
+        """List all resource groups in the subscription
+
+        With max_age, the in-memory cache is skipped and the answer is at most
+        max_age seconds old (from the inventory store, or live).
+        """
+        try:
+            if max_age is not None:
+                return await self._fetch_resource_groups(max_age)
+            return await self.cache.get_or_load(
+                ("resource_groups", self.subscription_id), self._fetch_resource_groups
+            )
+        except Exception as e:
+            logger.error(f"Error listing resource groups: {e}")
+            return []
+    
+    @traced("azure")
+    async def get_network_snapshot(self, resource_group: str) -> NetworkSnapshot:
+        """Collect the network resources of a group into an indexed snapshot"""
+        return await collect_network_snapshot_async(self.network_client, resource_group)
+    
+    @traced("azure")
+    async def get_network_issues(self, resource_group: str):
+        """Analyze network resources for potential issues"""
+        try:
+            logger.info(f"Analyzing network resources in {resource_group}")
+            return analyze_network_snapshot(await self.get_network_snapshot(resource_group))
+        except Exception as e:
+            logger.error(f"Error analyzing network resources in {resource_group}: {e}")
+            return {"error": str(e), "resource_group": resource_group}
+    
+    @traced("azure")
+    async def evaluate_nsg_flows(self, resource_group: str, nsg_name: str,
+                                 flows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Decide which rule of an NSG allows or denies each 5-tuple flow"""
+        try:
+            # numpy-backed evaluators are imported on first use to keep server startup fast
+            from .nsg_evaluator import evaluate_flows
             
-            for resource in resources:
-                resource_info = {
-                    "name": resource.name,
-                    "type": resource.type,
-                    "location": resource.location,
-                    "id": resource.id
-                }
-                # Add additional properties if available
-                if hasattr(resource, 'kind') and resource.kind:
-                    resource_info["kind"] = resource.kind
-                if hasattr(resource, 'sku') and resource.sku:
-                    resource_info["sku"] = resource.sku.name if hasattr(resource.sku, 'name') else str(resource.sku)
-                
-                resource_list.append(resource_info)
+            snapshot = await self.get_network_snapshot(resource_group)
+            # Compilation and evaluation are CPU-bound; keep them off the event loop
+            return await asyncio.to_thread(evaluate_flows, snapshot, nsg_name, flows)
+        except Exception as e:
+            logger.error(f"Error evaluating flows against NSG {nsg_name}: {e}")
+            return {"error": str(e), "resource_group": resource_group}
+
+    @traced("azure")
+    async def get_effective_next_hops(self, resource_group: str,
+                                      queries: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Longest-prefix-match next hop for (subnet, destination) pairs"""
+        try:
+            from .route_trie import compute_next_hops
+            
+            snapshot = await self.get_network_snapshot(resource_group)
+            return await asyncio.to_thread(compute_next_hops, snapshot, queries)
+        except Exception as e:
+            logger.error(f"Error computing next hops in {resource_group}: {e}")
+            return {"error": str(e), "resource_group": resource_group}
+    
+    @traced("azure")
+    async def get_address_conflicts(self, resource_group: str = None) -> Dict[str, Any]:
+        """Overlapping VNet address spaces and subnets across the subscription"""
+        try:
+            space = AddressSpace(await self.list_virtual_networks())
+            return await asyncio.to_thread(find_address_conflicts, space, resource_group)
+        except Exception as e:
+            logger.error(f"Error detecting address space conflicts: {e}")
+            return {"error": str(e), "resource_group": resource_group}
+    
+    @traced("azure")
+    async def check_address_prefix(self, prefix: str, vnet_name: str = None) -> Dict[str, Any]:
+        """Whether a new VNet address space (or a subnet of vnet_name) would overlap existing ones"""
+        try:
+            space = AddressSpace(await self.list_virtual_networks())
+            return check_prefix(space, prefix, vnet_name)
+        except Exception as e:
+            logger.error(f"Error checking address prefix {prefix}: {e}")
+            return {"error": str(e), "prefix": prefix}
+    
+    @traced("azure")
+    async def list_failed_deployments(self, resource_group: str, since: datetime,
+                                      until: datetime = None) -> List[Dict[str, Any]]:
+        """Failed deployments of a resource group whose timestamp falls in [since, until]"""
+        deployments = await self._collect(
+            self.resource_client.deployments.list_by_resource_group(
+                resource_group, filter="provisioningState eq 'Failed'"
+            ),
+            lambda deployment: {
+                "deployment_name": deployment.name,
+                "resource_group": resource_group,
+                "timestamp": deployment.properties.timestamp,
+            }
+        )
+        return [
+            deployment for deployment in deployments
+            if deployment["timestamp"] and deployment["timestamp"] >= since
+            and (until is None or deployment["timestamp"] <= until)
+        ]
+    
+    @traced("azure")
+    async def find_resources(self, name_contains: str = None, resource_type: str = None) -> List[Dict[str, Any]]:
+        """Resources of the subscription whose name contains a substring and/or of a type (raises on failure)"""
+        clauses = []
+        if name_contains:
+            clauses.append(f"substringof('{_odata_quote(name_contains)}', name)")
+        if resource_type:
+            clauses.append(f"resourceType eq '{_odata_quote(resource_type)}'")
+        resources = await self._collect(
+            self.resource_client.resources.list(filter=" and ".join(clauses) or None), _resource_to_dict
+        )
+        for resource in resources:
+            resource["subscription_id"] = self.subscription_id
+            resource["resource_group"] = resource_group_of(resource["id"])
+        return resources
+    
+    @traced("azure")
+    async def find_deployment(self, deployment_name: str) -> List[Dict[str, Any]]:
+        """Resource groups of the subscription holding a deployment with this name (raises on failure)"""
+        from azure.core.exceptions import ResourceNotFoundError
+        
+        async def lookup(resource_group: str):
+            try:
+                deployment = await self.resource_client.deployments.get(resource_group, deployment_name)
+            except ResourceNotFoundError:
+                return None
+            return {"subscription_id": self.subscription_id,
+                    **_deployment_to_dict(deployment, deployment_name, resource_group)}
+        
+        # Deployment names are only unique within a group, so every group is asked. The group list
+        # never waits for an inventory sync: this runs per subscription inside the fan-out deadline
+        groups = await self._fetch_resource_groups(sync=False)
+        found = await self.gather(*(lookup(group) for group in groups))
+        return [deployment for deployment in found if deployment]
+    
+    async def _list_deployment_operations(self, ref: DeploymentRef) -> List[Any]:
+        # Nested deployments may target other subscriptions or subscription scope
+        operations = self._pool.get_async(ref.subscription_id).resource_client.deployment_operations
+        if ref.resource_group:
+            pager = operations.list(ref.resource_group, ref.name)
+        else:
+            pager = operations.list_at_subscription_scope(ref.name)
+        return [operation async for operation in pager]
+    
+    @traced("azure")
+    async def get_deployment_failure_tree(self, deployment_name: str, resource_group: str) -> Dict[str, Any]:
+        """Failed operations of a deployment and its nested deployments, deepest failures first"""
+        config = get_config()
+        # The traversal bounds its own fan-out so wide module trees are listed in parallel
+        traversal = DeploymentTraversal(
+            self._list_deployment_operations,
+            max_depth=config.deployment_traversal_max_depth,
+            max_concurrency=config.deployment_traversal_concurrency,
+        )
+        return await traversal.run(DeploymentRef(self.subscription_id, resource_group, deployment_name))
+    
+    @traced("azure")
+    async def diagnose_deployment_error(self, deployment_name: str, resource_group: str):
+        """Diagnose deployment errors, following nested deployments of failed ones to the root cause"""
+        try:
+            deployment = await self.resource_client.deployments.get(
+                resource_group, deployment_name
+            )
+            
+            # A deployment newer than the cached listing means the group has changed
+            cached_at = await self.cache.stored_at(self._resources_key(resource_group))
+            timestamp = deployment.properties.timestamp
+            if cached_at and timestamp and timestamp.timestamp() > cached_at:
+                logger.info(f"New deployment observed in {resource_group}, invalidating cached inventory")
+                self.invalidate_inventory(resource_group)
+            
+            details = _deployment_to_dict(deployment, deployment_name, resource_group)
+            if str(details["deployment_state"]).lower() == "failed":
+                details.update(await self.get_deployment_failure_tree(deployment_name, resource_group))
+            return details
+        except Exception as e:
+            logger.error(f"Error getting deployment details: {e}")
+            return {"error": str(e)}
+    
+    @traced("azure")
+    async def list_resources_in_group(self, resource_group: str, max_age: float = None):
+        """List all resources in a specific resource group, optionally no older than max_age seconds
+
+        The resources are compact ResourceRecords (or dicts, when another
+        worker loaded the listing); resource_dicts() converts them for output.
+        """
+        try:
+            if max_age is not None:
+                resource_list = await self._fetch_resources_in_group(resource_group, max_age)
+            else:
+                resource_list = await self.cache.get_or_load(
+                    self._resources_key(resource_group),
+                    lambda: self._fetch_resources_in_group(resource_group)
+                )
             
             return {
                 "resource_group": resource_group,
@@ -100,4 +564,92 @@ class AzureManager:
             
         except Exception as e:
             logger.error(f"Error listing resources in group {resource_group}: {e}")
-            return {"error": str(e), "resource_group": resource_group}
\ No newline at end of file
+            return {"error": str(e), "resource_group": resource_group}
+    
+    @traced("azure")
+    async def list_resources_page(self, resource_group: str, page_size: int = None, cursor: str = None,
+                                  type_filter: str = None, fields: List[str] = None,
+                                  max_age: float = None) -> Dict[str, Any]:
+        """One page of a resource group's resources, projected to fields, with a cursor to the next page
+        
+        Pages come from the inventory store when it is fresh enough, otherwise
+        straight from the ARM pager, holding no more than one ARM page at a time.
+        """
+        try:
+            fields = validate_fields(fields)
+            page_size = clamp_page_size(page_size or get_config().resource_page_size)
+            query = {"group": resource_group.lower(), "type": type_filter.lower() if type_filter else None}
+            position = decode_cursor(cursor, query) if cursor else None
+            
+            if position is not None:
+                from_store = position.get("source") == "store"
+            else:
+                from_store = await self._inventory_available(max_age)
+            if from_store:
+                records, next_position = await self._store_page(resource_group, type_filter, page_size, position)
+            else:
+                expand = bool(fields and EXPANDED_FIELDS.intersection(fields))
+                records, next_position = await self._arm_page(resource_group, type_filter, page_size,
+                                                              position, expand)
+            
+            return {
+                "resource_group": resource_group,
+                "resource_count": len(records),
+                "resources": project(records, fields),
+                "next_cursor": encode_cursor(query, next_position) if next_position else None,
+            }
+        except Exception as e:
+            logger.error(f"Error listing resources in group {resource_group}: {e}")
+            return {"error": str(e), "resource_group": resource_group}
+    
+    async def _store_page(self, resource_group: str, type_filter: str, page_size: int,
+                          position: Dict[str, Any] = None):
+        # One extra row tells whether another page follows
+        rows = await asyncio.to_thread(
+            self.store.resources_page, self.subscription_id, resource_group,
+            (position or {}).get("after", ""), page_size + 1, type_filter
+        )
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        current_span().add("items", len(rows))
+        return [record for _, record in rows], {"source": "store", "after": rows[-1][0]} if more else None
+    
+    async def _arm_pages(self, resource_group: str, type_filter: str, page_size: int, link: str, expand: bool):
+        """Yield (link, resources, next link) per ARM page, requesting a page only once the previous is consumed"""
+        pager = self.resource_client.resources.list_by_resource_group(
+            resource_group,
+            filter=f"resourceType eq '{_odata_quote(type_filter)}'" if type_filter else None,
+            expand=INVENTORY_EXPAND if expand else None,
+            top=page_size,
+        )
+        pages = pager.by_page(continuation_token=link)
+        async for page in pages:
+            resources = [ResourceRecord.from_sdk(item) async for item in page]
+            current_span().add("pages", 1)
+            yield link, resources, pages.continuation_token
+            link = pages.continuation_token
+    
+    async def _arm_page(self, resource_group: str, type_filter: str, page_size: int,
+                        position: Dict[str, Any], expand: bool):
+        # An ARM page can hold more than page_size resources, so positions are (page link, offset into it)
+        position = position or {}
+        offset = position.get("offset", 0)
+        records: List[ResourceRecord] = []
+        next_position = None
+        pages = self._arm_pages(resource_group, type_filter, page_size, position.get("link"), expand)
+        try:
+            async for link, resources, next_link in pages:
+                taken = resources[offset:offset + page_size - len(records)]
+                records.extend(taken)
+                offset += len(taken)
+                if offset < len(resources):
+                    next_position = {"source": "arm", "link": link, "offset": offset}
+                    break
+                offset = 0
+                if len(records) == page_size:
+                    next_position = {"source": "arm", "link": next_link, "offset": 0} if next_link else None
+                    break
+        finally:
+            await pages.aclose()
+        current_span().add("items", len(records))
+        return records, next_position
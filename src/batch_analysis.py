@@ -0,0 +1,144 @@
+"""
+Batch Analysis Module
+
+Finds every failed deployment in a time window across resource groups,
+groups them by normalized error signature and asks the LLM once per
+signature, producing one consolidated incident report.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from .ai_agent import NetworkTroubleshootingAgent
+from .azure_manager import AsyncAzureManager
+from .llm_cache import normalize_error_message
+
+logger = logging.getLogger(__name__)
+
+
+def _error_text(error: Any) -> str:
+    if hasattr(error, "as_dict"):
+        error = error.as_dict()
+    return str(error or "")
+
+
+def error_signature(details: Dict[str, Any]) -> str:
+    """Normalized text identifying the failure, preferring the deepest root causes"""
+    causes = details.get("root_causes") or []
+    if causes:
+        text = "; ".join(sorted({
+            f"{cause.get('resource_type')}: {(cause.get('error') or {}).get('code')}: "
+            f"{(cause.get('error') or {}).get('message')}"
+            for cause in causes
+        }))
+    else:
+        text = _error_text(details.get("error"))
+    names = (str(details.get("deployment_name", "")), str(details.get("resource_group", "")))
+    return normalize_error_message(text, names)
+
+
+def _signature_id(signature: str) -> str:
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:12]
+
+
+async def analyze_failed_deployments(azure_manager: AsyncAzureManager, agent: NetworkTroubleshootingAgent,
+                                     resource_groups: Optional[List[str]] = None, window_hours: float = 24,
+                                     llm_concurrency: int = 4, max_deployments: int = 200) -> Dict[str, Any]:
+    """Diagnose all failed deployments in the window with one LLM request per error signature"""
+    started = time.perf_counter()
+    until = datetime.now(timezone.utc)
+    since = until - timedelta(hours=window_hours)
+    errors: List[Dict[str, str]] = []
+
+    if not resource_groups:
+        resource_groups = await azure_manager.list_resource_groups()
+
+    # 1. Failed deployments of every group, listed concurrently
+    listings = await asyncio.gather(
+        *(azure_manager.list_failed_deployments(group, since, until) for group in resource_groups),
+        return_exceptions=True
+    )
+    failed: List[Dict[str, Any]] = []
+    for group, listing in zip(resource_groups, listings):
+        if isinstance(listing, Exception):
+            errors.append({"resource_group": group, "error": str(listing)})
+            continue
+        failed.extend(listing)
+    failed.sort(key=lambda deployment: deployment["timestamp"], reverse=True)
+    truncated = len(failed) > max_deployments
+    failed = failed[:max_deployments]
+
+    # 2. Full diagnosis (including nested failure trees) of each, concurrently
+    diagnoses = await asyncio.gather(*(
+        azure_manager.diagnose_deployment_error(deployment["deployment_name"], deployment["resource_group"])
+        for deployment in failed
+    ))
+
+    # 3. Group by normalized signature
+    groups: Dict[str, Dict[str, Any]] = {}
+    for deployment, details in zip(failed, diagnoses):
+        if "deployment_state" not in details:
+            errors.append({**{k: deployment[k] for k in ("deployment_name", "resource_group")},
+                           "error": str(details.get("error"))})
+            continue
+        signature = error_signature(details)
+        group = groups.setdefault(signature, {"representative": details, "deployments": []})
+        group["deployments"].append({
+            "deployment_name": details["deployment_name"],
+            "resource_group": details["resource_group"],
+            "timestamp": str(deployment["timestamp"]),
+        })
+
+    # 4. One LLM request per signature, bounded
+    semaphore = asyncio.Semaphore(llm_concurrency)
+
+    async def analyze(group: Dict[str, Any]) -> Dict[str, Any]:
+        representative = group["representative"]
+        # The root causes carry the actionable errors; the top-level one is usually "DeploymentFailed"
+        error_details = {
+            **{key: representative.get(key) for key in ("deployment_name", "resource_group", "deployment_state", "timestamp")},
+            "error": {
+                "error": _error_text(representative.get("error")),
+                "root_causes": representative.get("root_causes", [])[:10],
+            },
+        }
+        async with semaphore:
+            return await agent.analyze_deployment_error_with_cache_info(error_details)
+
+    analyses = await asyncio.gather(*(analyze(group) for group in groups.values()))
+
+    report = []
+    for (signature, group), analysis in zip(groups.items(), analyses):
+        representative = group["representative"]
+        report.append({
+            "signature_id": _signature_id(signature),
+            "signature": signature[:500],
+            "deployment_count": len(group["deployments"]),
+            "deployments": group["deployments"],
+            "root_causes": representative.get("root_causes", [])[:5],
+            "analysis": analysis["analysis"],
+            "served_from_cache": analysis["cached"],
+        })
+    report.sort(key=lambda entry: -entry["deployment_count"])
+    # Cached answers, and fallbacks when no model is configured, cost no request
+    llm_requests = sum(1 for analysis in analyses if analysis.get("llm_request"))
+
+    logger.info(
+        f"Batch analysis: {len(failed)} failed deployments in {len(resource_groups)} groups, "
+        f"{len(report)} signatures, {llm_requests} LLM calls"
+    )
+    return {
+        "window": {"since": since.isoformat(), "until": until.isoformat()},
+        "resource_groups_scanned": len(resource_groups),
+        "failed_deployments": len(failed),
+        "failed_deployments_truncated": truncated,
+        "signature_count": len(report),
+        "llm_requests": llm_requests,
+        "signatures": report,
+        "errors": errors,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
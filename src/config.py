@@ -5,7 +5,8 @@ Handles application configuration and environment variables.
 """
 
 import os
-from typing import Optional
+from pathlib import Path
+from typing import List, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
@@ -18,6 +19,8 @@ class Config:
     
     # Azure Configuration
     azure_subscription_id: Optional[str] = None
+    # Default scope of the multi-subscription tools: ids, or ["all"] for every visible subscription
+    azure_subscription_ids: Optional[List[str]] = None
     azure_tenant_id: Optional[str] = None
     azure_client_id: Optional[str] = None
     azure_client_secret: Optional[str] = None
@@ -30,9 +33,59 @@ class Config:
     debug: bool = False
     log_level: str = "INFO"
     
+    # Performance Tuning
+    azure_http_pool_size: int = 20
+    azure_token_refresh_margin: int = 300
+    azure_max_concurrency: int = 8
+    arm_adaptive_concurrency: bool = True
+    arm_max_concurrency: int = 64
+    arm_ratelimit_low_watermark: int = 50
+    inventory_cache_ttl: float = 60
+    inventory_cache_stale_ttl: float = 300
+    inventory_cache_max_entries: int = 256
+    inventory_cache_max_bytes: int = 32 * 1024 * 1024
+    llm_http_max_connections: int = 20
+    llm_http_max_keepalive: int = 10
+    llm_http_keepalive_expiry: float = 30
+    llm_http2: bool = True
+    llm_streaming: bool = True
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = str(Path(__file__).parent.parent / ".cache" / "llm_results.sqlite3")
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_ttl: float = 7 * 24 * 3600
+    llm_context_token_budget: int = 6000
+    llm_batch_concurrency: int = 4
+    inventory_store_enabled: bool = True
+    inventory_store_path: str = str(Path(__file__).parent.parent / ".cache" / "inventory.sqlite3")
+    inventory_store_max_age: float = 300
+    inventory_store_full_sync_interval: float = 6 * 3600
+    deployment_traversal_max_depth: int = 10
+    deployment_traversal_concurrency: int = 16
+    startup_warmup: bool = True
+    # Resource groups whose listings the startup warmup prefetches
+    warmup_resource_groups: Optional[List[str]] = None
+    telemetry_enabled: bool = False
+    fanout_deadline: float = 30
+    fanout_concurrency: int = 16
+    resource_page_size: int = 500
+    # Worker processes behind the server's port; more than one shares caches through shared_cache_path
+    mcp_workers: int = 1
+    shared_cache_enabled: bool = False
+    shared_cache_path: str = str(Path(__file__).parent.parent / ".cache" / "shared_cache.sqlite3")
+    shared_cache_lease: float = 60
+    # Tool calls: per-tool limits and queues by lane, plus capacity shared by ARM- and LLM-heavy tools
+    admission_enabled: bool = True
+    admission_capacity: int = 16
+    admission_max_wait: float = 10
+    admission_tool_limits: str = ""
+    
     def __post_init__(self):
         """Load configuration from environment variables"""
         self.azure_subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID", self.azure_subscription_id)
+        subscription_ids = os.getenv("AZURE_SUBSCRIPTION_IDS", "")
+        self.azure_subscription_ids = [
+            subscription_id.strip() for subscription_id in subscription_ids.split(",") if subscription_id.strip()
+        ] or ([self.azure_subscription_id] if self.azure_subscription_id else None)
         self.azure_tenant_id = os.getenv("AZURE_TENANT_ID", self.azure_tenant_id)
         self.azure_client_id = os.getenv("AZURE_CLIENT_ID", self.azure_client_id)
         self.azure_client_secret = os.getenv("AZURE_CLIENT_SECRET", self.azure_client_secret)
@@ -42,6 +95,58 @@ class Config:
         
         self.debug = os.getenv("DEBUG", "false").lower() == "true"
         self.log_level = os.getenv("LOG_LEVEL", self.log_level)
+        
+        self.azure_http_pool_size = int(os.getenv("AZURE_HTTP_POOL_SIZE", self.azure_http_pool_size))
+        self.azure_token_refresh_margin = int(os.getenv("AZURE_TOKEN_REFRESH_MARGIN", self.azure_token_refresh_margin))
+        self.azure_max_concurrency = int(os.getenv("AZURE_MAX_CONCURRENCY", self.azure_max_concurrency))
+        self.arm_adaptive_concurrency = os.getenv("ARM_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+        self.arm_max_concurrency = int(os.getenv("ARM_MAX_CONCURRENCY", self.arm_max_concurrency))
+        self.arm_ratelimit_low_watermark = int(
+            os.getenv("ARM_RATELIMIT_LOW_WATERMARK", self.arm_ratelimit_low_watermark)
+        )
+        self.inventory_cache_ttl = float(os.getenv("INVENTORY_CACHE_TTL", self.inventory_cache_ttl))
+        self.inventory_cache_stale_ttl = float(os.getenv("INVENTORY_CACHE_STALE_TTL", self.inventory_cache_stale_ttl))
+        self.inventory_cache_max_entries = int(os.getenv("INVENTORY_CACHE_MAX_ENTRIES", self.inventory_cache_max_entries))
+        self.inventory_cache_max_bytes = int(os.getenv("INVENTORY_CACHE_MAX_BYTES", self.inventory_cache_max_bytes))
+        self.llm_http_max_connections = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", self.llm_http_max_connections))
+        self.llm_http_max_keepalive = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", self.llm_http_max_keepalive))
+        self.llm_http_keepalive_expiry = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", self.llm_http_keepalive_expiry))
+        self.llm_http2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+        self.llm_streaming = os.getenv("LLM_STREAMING", "true").lower() == "true"
+        self.llm_cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.llm_cache_path = os.getenv("LLM_CACHE_PATH", self.llm_cache_path)
+        self.llm_cache_max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", self.llm_cache_max_bytes))
+        self.llm_cache_ttl = float(os.getenv("LLM_CACHE_TTL", self.llm_cache_ttl))
+        self.llm_context_token_budget = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", self.llm_context_token_budget))
+        self.llm_batch_concurrency = int(os.getenv("LLM_BATCH_CONCURRENCY", self.llm_batch_concurrency))
+        self.inventory_store_enabled = os.getenv("INVENTORY_STORE_ENABLED", "true").lower() == "true"
+        self.inventory_store_path = os.getenv("INVENTORY_STORE_PATH", self.inventory_store_path)
+        self.inventory_store_max_age = float(os.getenv("INVENTORY_STORE_MAX_AGE", self.inventory_store_max_age))
+        self.inventory_store_full_sync_interval = float(
+            os.getenv("INVENTORY_STORE_FULL_SYNC_INTERVAL", self.inventory_store_full_sync_interval)
+        )
+        self.deployment_traversal_max_depth = int(
+            os.getenv("DEPLOYMENT_TRAVERSAL_MAX_DEPTH", self.deployment_traversal_max_depth)
+        )
+        self.deployment_traversal_concurrency = int(
+            os.getenv("DEPLOYMENT_TRAVERSAL_CONCURRENCY", self.deployment_traversal_concurrency)
+        )
+        self.startup_warmup = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+        self.warmup_resource_groups = [
+            group.strip() for group in os.getenv("WARMUP_RESOURCE_GROUPS", "").split(",") if group.strip()
+        ]
+        self.telemetry_enabled = os.getenv("TELEMETRY_ENABLED", "false").lower() == "true"
+        self.fanout_deadline = float(os.getenv("FANOUT_DEADLINE", self.fanout_deadline))
+        self.fanout_concurrency = int(os.getenv("FANOUT_CONCURRENCY", self.fanout_concurrency))
+        self.resource_page_size = int(os.getenv("RESOURCE_PAGE_SIZE", self.resource_page_size))
+        self.mcp_workers = int(os.getenv("MCP_WORKERS", self.mcp_workers))
+        self.shared_cache_enabled = os.getenv("SHARED_CACHE_ENABLED", "false").lower() == "true"
+        self.shared_cache_path = os.getenv("SHARED_CACHE_PATH", self.shared_cache_path)
+        self.shared_cache_lease = float(os.getenv("SHARED_CACHE_LEASE", self.shared_cache_lease))
+        self.admission_enabled = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+        self.admission_capacity = int(os.getenv("ADMISSION_CAPACITY", self.admission_capacity))
+        self.admission_max_wait = float(os.getenv("ADMISSION_MAX_WAIT", self.admission_max_wait))
+        self.admission_tool_limits = os.getenv("ADMISSION_TOOL_LIMITS", self.admission_tool_limits)
     
     def validate(self) -> list[str]:
         """Validate configuration and return list of missing required values"""
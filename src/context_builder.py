@@ -0,0 +1,180 @@
+"""
+Context Builder Module
+
+Fits the variable data of LLM prompts into a token budget: compact JSON,
+field projection, per-type counts for resource lists and relevance-ranked
+truncation, with token counts measured by a local tokenizer.
+"""
+
+import json
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Fields kept when a resource record is projected for the prompt
+RESOURCE_FIELDS = ("name", "type", "location", "sku", "kind", "provisioning_state")
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3, "info": 4}
+# Lists are cut to at most this many items before the budget loop starts halving
+MAX_LIST_ITEMS = 256
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Rough BPE behaviour for the fallback: words, numbers and single punctuation marks
+_TOKEN_ESTIMATE_RE = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|\S")
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when its encoding is available locally, else estimates"""
+
+    def __init__(self, model: str = "gpt-4"):
+        self.model = model
+        self._encoding = None
+        self.exact = False
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            self.exact = True
+        except Exception as e:
+            # tiktoken missing, or its encoding file can't be downloaded/found offline
+            logger.debug(f"Using estimated token counts: {e}")
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(_TOKEN_ESTIMATE_RE.findall(text))
+
+
+_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(model: str = "gpt-4") -> TokenCounter:
+    """Shared token counter per model (loading an encoding is not free)"""
+    counter = _counters.get(model)
+    if counter is None:
+        counter = _counters[model] = TokenCounter(model)
+    return counter
+
+
+def compact_json(value: Any) -> str:
+    """Serialize without the whitespace (and Python repr noise) of str(dict)"""
+    return json.dumps(value, separators=(",", ":"), default=str, ensure_ascii=False)
+
+
+def markup_safe(text: str, is_json: bool) -> str:
+    """Neutralize prompt-template message tags without HTML-escaping every quote
+
+    JSON gets \\u003c/\\u003e escapes (still valid JSON); plain text gets &lt;/&gt;.
+    """
+    if is_json:
+        return text.replace("<", "\\u003c").replace(">", "\\u003e")
+    return text.replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _terms(text: str) -> set:
+    return set(_WORD_RE.findall(str(text).lower()))
+
+
+def _is_resource(value: Any) -> bool:
+    return isinstance(value, dict) and "type" in value and ("id" in value or "name" in value)
+
+
+def _project(value: Any) -> Any:
+    """Drop fields the model doesn't need (ids, tags, raw properties) from resource records"""
+    if _is_resource(value):
+        return {field: value[field] for field in RESOURCE_FIELDS if value.get(field) is not None}
+    if isinstance(value, dict):
+        return {key: _project(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_project(item) for item in value]
+    return value
+
+
+class ContextBuilder:
+    """Shrinks structured prompt data until its rendered form fits a token budget"""
+
+    def __init__(self, budget: int, counter: TokenCounter, focus: str = ""):
+        self.budget = budget
+        self.counter = counter
+        self.focus_terms = _terms(focus)
+
+    def relevance(self, item: Any) -> Tuple:
+        """Sort key: most severe first, then most overlap with the focus (e.g. target resource group)"""
+        severity = SEVERITY_RANK.get(str(item.get("severity", "")).lower(), 9) if isinstance(item, dict) else 9
+        text = compact_json(item) if isinstance(item, (dict, list)) else str(item)
+        overlap = len(self.focus_terms & _terms(text))
+        exact = 0 if isinstance(item, str) and _terms(item) == self.focus_terms else 1
+        return severity, exact, -overlap
+
+    def _truncate(self, value: Any, max_items: int) -> Any:
+        if isinstance(value, dict):
+            return {key: self._truncate(item, max_items) for key, item in value.items()}
+        if not isinstance(value, list):
+            return value
+
+        items = value
+        summary: Dict[str, Any] = {}
+        if len(items) > max_items and all(_is_resource(item) for item in items):
+            # Deduped counts keep the shape of the whole list once it is cut
+            summary["type_counts"] = dict(Counter(item["type"] for item in items).most_common())
+        if len(items) > max_items:
+            items = sorted(items, key=self.relevance)[:max_items]
+            summary["omitted"] = len(value) - max_items
+        items = [self._truncate(item, max_items) for item in items]
+        return items + [summary] if summary else items
+
+    def fit(self, data: Any) -> Tuple[str, Dict[str, int]]:
+        """Render data within the budget; returns (text, token statistics)"""
+        # "Before" is what the prompt used to carry: the str() of the data
+        stats = {"tokens_before": self.counter.count(str(data)), "budget": self.budget}
+        text = data if isinstance(data, str) else compact_json(data)
+        if self.counter.count(text) <= self.budget:
+            return text, {**stats, "tokens_after": self.counter.count(text)}
+        if isinstance(data, str):
+            text = self._clip(text)
+            return text, {**stats, "tokens_after": self.counter.count(text)}
+
+        projected = _project(data)
+        text = compact_json(projected)
+        max_items = MAX_LIST_ITEMS
+        while self.counter.count(text) > self.budget and max_items >= 1:
+            text = compact_json(self._truncate(projected, max_items))
+            max_items //= 2
+        if self.counter.count(text) > self.budget:
+            text = self._clip(text)
+        return text, {**stats, "tokens_after": self.counter.count(text)}
+
+    def _clip(self, text: str) -> str:
+        """Last resort for unstructured or irreducible data: cut the text at the budget"""
+        marker = " ...[truncated]"
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.counter.count(text[:middle] + marker) <= self.budget:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + marker
+
+
+def build_context(data: Any, label: str, model: str = "gpt-4", focus: str = "",
+                  budget: Optional[int] = None) -> str:
+    """Fit prompt data into the configured token budget and log the token counts
+
+    The result contains no markup, so prompt templates can insert it unescaped.
+    """
+    budget = budget or get_config().llm_context_token_budget
+    counter = get_token_counter(model)
+    text, stats = ContextBuilder(budget, counter, focus).fit(data)
+    text = markup_safe(text, is_json=not isinstance(data, str))
+    logger.info(
+        f"Prompt context for {label}: {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+        f"(budget {budget}, {'tiktoken' if counter.exact else 'estimated'})"
+    )
+    return text
@@ -0,0 +1,178 @@
+"""
+Deployment Tree Module
+
+Walks a deployment's operations and follows nested/linked deployments
+concurrently, producing a compact tree of failed operations and the deepest
+failures that are the likely root causes.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEPLOYMENT_TYPE = "microsoft.resources/deployments"
+
+_DEPLOYMENT_ID_RE = re.compile(
+    r"^/subscriptions/(?P<subscription>[^/]+)(?:/resourcegroups/(?P<group>[^/]+))?"
+    r"/providers/microsoft\.resources/deployments/(?P<name>[^/]+)$",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class DeploymentRef:
+    """A deployment at resource group scope, or subscription scope when resource_group is None"""
+
+    subscription_id: str
+    resource_group: Optional[str]
+    name: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.subscription_id}/{self.resource_group or ''}/{self.name}".lower()
+
+
+def parse_deployment_id(resource_id: str) -> Optional[DeploymentRef]:
+    """DeploymentRef for a deployment ARM id; None for management group/tenant scopes"""
+    match = _DEPLOYMENT_ID_RE.match(resource_id or "")
+    if match is None:
+        return None
+    return DeploymentRef(match["subscription"], match["group"], match["name"])
+
+
+def _field(value: Any, name: str) -> Any:
+    """Read a field from an SDK model or from its dict form"""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def error_of(status_message: Any) -> Optional[Dict[str, Any]]:
+    """The innermost (code, message) of an operation's statusMessage error"""
+    error = _field(status_message, "error") or status_message
+    if not (_field(error, "code") or _field(error, "message")):
+        return None
+    # Nested details usually hold the actionable error; keep the deepest first one
+    while _field(error, "details"):
+        error = _field(error, "details")[0]
+    return {"code": _field(error, "code"), "message": _field(error, "message")}
+
+
+def _operation_summary(operation: Any) -> Dict[str, Any]:
+    props = _field(operation, "properties")
+    target = _field(props, "target_resource")
+    return {
+        "operation_id": _field(operation, "operation_id") or _field(operation, "id"),
+        "provisioning_state": _field(props, "provisioning_state"),
+        "status_code": _field(props, "status_code"),
+        "resource_type": _field(target, "resource_type"),
+        "resource_name": _field(target, "resource_name"),
+        "resource_id": _field(target, "id"),
+        "error": error_of(_field(props, "status_message")),
+    }
+
+
+class DeploymentTraversal:
+    """Concurrent, depth-limited walk over a deployment and its nested deployments
+
+    Children are listed as soon as their parent's operations arrive, so wall
+    time grows with tree depth rather than with the number of deployments.
+    """
+
+    def __init__(self, list_operations: Callable[[DeploymentRef], Awaitable[List[Any]]],
+                 max_depth: int = 10, max_concurrency: int = 16):
+        self.list_operations = list_operations
+        self.max_depth = max_depth
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._visited: set = set()
+        self._operations_seen: set = set()
+        self.deployments_visited = 0
+        self.duplicates_skipped = 0
+        self.depth_limited = 0
+        self.errors: List[Dict[str, str]] = []
+
+    async def run(self, root: DeploymentRef) -> Dict[str, Any]:
+        """Return the failure tree, deepest failing operations and traversal counters"""
+        started = time.perf_counter()
+        tree = await self._visit(root, depth=0)
+        root_causes: List[Dict[str, Any]] = []
+        self._collect_root_causes(tree, [], root_causes)
+        root_causes.sort(key=lambda cause: -cause["depth"])
+        return {
+            "failure_tree": tree,
+            "root_causes": root_causes,
+            "traversal": {
+                "deployments_visited": self.deployments_visited,
+                "operations_seen": len(self._operations_seen),
+                "duplicates_skipped": self.duplicates_skipped,
+                "depth_limited": self.depth_limited,
+                "errors": self.errors,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
+        }
+
+    async def _visit(self, ref: DeploymentRef, depth: int) -> Dict[str, Any]:
+        self._visited.add(ref.key)
+        self.deployments_visited += 1
+        node: Dict[str, Any] = {"deployment": ref.name, "resource_group": ref.resource_group, "failed_operations": []}
+        try:
+            async with self._semaphore:
+                operations = await self.list_operations(ref)
+        except Exception as e:
+            logger.warning(f"Could not list operations of deployment {ref.name}: {e}")
+            self.errors.append({"deployment": ref.name, "error": str(e)})
+            node["error"] = str(e)
+            return node
+
+        children = []
+        for operation in operations:
+            summary = _operation_summary(operation)
+            if summary["operation_id"] in self._operations_seen:
+                self.duplicates_skipped += 1
+                continue
+            self._operations_seen.add(summary["operation_id"])
+            if str(summary["provisioning_state"]).lower() != "failed":
+                continue
+            is_deployment = str(summary["resource_type"]).lower() == DEPLOYMENT_TYPE
+            child = parse_deployment_id(summary["resource_id"]) if is_deployment else None
+            if child is not None and child.key in self._visited:
+                # Another operation (e.g. a retry) already targets this nested deployment
+                self.duplicates_skipped += 1
+                continue
+            node["failed_operations"].append(summary)
+            if child is None:
+                continue
+            if depth + 1 > self.max_depth:
+                self.depth_limited += 1
+                summary["nested_not_expanded"] = True
+                continue
+            self._visited.add(child.key)
+            children.append((summary, child))
+
+        subtrees = await asyncio.gather(*(self._visit(child, depth + 1) for _, child in children))
+        for (summary, _), subtree in zip(children, subtrees):
+            summary["nested"] = subtree
+        return node
+
+    def _collect_root_causes(self, node: Dict[str, Any], path: List[str], causes: List[Dict[str, Any]]):
+        path = path + [node["deployment"]]
+        for operation in node["failed_operations"]:
+            nested = operation.get("nested")
+            if nested and nested["failed_operations"]:
+                self._collect_root_causes(nested, path, causes)
+                continue
+            causes.append({
+                "deployment_path": path,
+                "depth": len(path) - 1,
+                "resource_type": operation["resource_type"],
+                "resource_name": operation["resource_name"],
+                "status_code": operation["status_code"],
+                "error": operation["error"],
+            })
@@ -0,0 +1,185 @@
+"""
+Subscription Fan-Out Module
+
+Runs a per-subscription read against many subscriptions (or every
+subscription the credential can see) concurrently. Each subscription has
+its own AsyncAzureManager, and so its own ARM scheduler, so one throttled or
+failing subscription doesn't hold back the others. Results are merged as
+they arrive, and the whole operation has a deadline: subscriptions still
+running when it passes are cancelled and reported as timed out next to the
+partial results.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .address_overlap import AddressSpace, check_prefix, find_address_conflicts
+from .azure_clients import AzureClientPool, get_client_pool
+from .azure_manager import AsyncAzureManager
+from .config import get_config
+from .inventory_cache import get_inventory_cache
+
+logger = logging.getLogger(__name__)
+
+ALL_SUBSCRIPTIONS = "all"
+# Visible subscriptions change rarely; listing them is one tenant-level call per TTL
+SUBSCRIPTIONS_TTL = 600
+
+Operation = Callable[[AsyncAzureManager], Awaitable[Any]]
+# Called with (subscription_id, result) as each subscription finishes
+ResultCallback = Callable[[str, Any], Awaitable[None]]
+
+
+async def list_visible_subscriptions(client_pool: AzureClientPool = None) -> List[Dict[str, Any]]:
+    """Enabled subscriptions the credential can see (cached)"""
+    pool = client_pool or get_client_pool()
+
+    async def load() -> List[Dict[str, Any]]:
+        client = pool.get_subscription_client_async()
+        return [
+            {
+                "subscription_id": subscription.subscription_id,
+                "display_name": subscription.display_name,
+                "state": str(subscription.state),
+                "tenant_id": getattr(subscription, "tenant_id", None),
+            }
+            async for subscription in client.subscriptions.list()
+            if str(subscription.state).lower().endswith("enabled")
+        ]
+
+    return await get_inventory_cache().get_or_load(("subscriptions",), load, ttl=SUBSCRIPTIONS_TTL)
+
+
+class SubscriptionFanOut:
+    """AsyncAzureManager reads across a set of subscriptions, with a deadline"""
+
+    def __init__(self, subscriptions: Optional[Iterable[str]] = None, client_pool: AzureClientPool = None,
+                 deadline: float = None, concurrency: int = None):
+        config = get_config()
+        subscriptions = list(subscriptions or config.azure_subscription_ids or [])
+        self.all_visible = any(subscription.lower() == ALL_SUBSCRIPTIONS for subscription in subscriptions)
+        self.subscriptions = [subscription for subscription in subscriptions
+                              if subscription.lower() != ALL_SUBSCRIPTIONS]
+        self.pool = client_pool or get_client_pool()
+        self.deadline = config.fanout_deadline if deadline is None else deadline
+        self.concurrency = concurrency or config.fanout_concurrency
+
+    async def subscription_ids(self) -> List[str]:
+        """The explicit subscriptions, plus every visible one when "all" was asked for"""
+        if not self.all_visible:
+            return list(dict.fromkeys(self.subscriptions))
+        visible = await list_visible_subscriptions(self.pool)
+        return list(dict.fromkeys(self.subscriptions + [item["subscription_id"] for item in visible]))
+
+    async def run(self, operation: Operation, on_result: Optional[ResultCallback] = None) -> Dict[str, Any]:
+        """Run operation once per subscription; errors and timeouts are reported per subscription"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        try:
+            subscription_ids = await asyncio.wait_for(self.subscription_ids(), timeout=self.deadline)
+        except Exception as e:
+            logger.error(f"Error listing visible subscriptions: {e}")
+            return {"error": f"Could not list visible subscriptions: {e}"}
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def one(subscription_id: str) -> Any:
+            async with slots:
+                return await operation(AsyncAzureManager(subscription_id, client_pool=self.pool))
+
+        tasks = {asyncio.create_task(one(subscription_id)): subscription_id for subscription_id in subscription_ids}
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline_at - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    subscription_id = tasks[task]
+                    try:
+                        results[subscription_id] = task.result()
+                    except Exception as e:
+                        logger.warning(f"Fan-out read failed in subscription {subscription_id[:8]}...: {e}")
+                        errors[subscription_id] = str(e)
+                        continue
+                    if on_result is not None:
+                        try:
+                            await on_result(subscription_id, results[subscription_id])
+                        except Exception as e:
+                            logger.debug(f"Dropping fan-out progress update: {e}")
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        timed_out = sorted(tasks[task] for task in pending)
+        if timed_out:
+            logger.warning(f"Fan-out deadline of {self.deadline}s passed with {len(timed_out)} subscriptions pending")
+        return {
+            "subscriptions": len(subscription_ids),
+            "completed": len(results),
+            "complete": not errors and not timed_out,
+            "results": results,
+            "errors": errors,
+            "timed_out": timed_out,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def find_resources(self, name_contains: str = None, resource_type: str = None,
+                             on_result: Optional[ResultCallback] = None) -> Dict[str, Any]:
+        """Resources matching a name substring and/or type, merged across subscriptions"""
+        outcome = await self.run(lambda manager: manager.find_resources(name_contains, resource_type), on_result)
+        return _merge(outcome, "resources")
+
+    async def find_deployment(self, deployment_name: str,
+                              on_result: Optional[ResultCallback] = None) -> Dict[str, Any]:
+        """Every subscription and resource group holding a deployment with this name"""
+        outcome = await self.run(lambda manager: manager.find_deployment(deployment_name), on_result)
+        return _merge(outcome, "deployments")
+
+    async def address_space(self, on_result: Optional[ResultCallback] = None) -> Tuple[AddressSpace, Dict[str, Any]]:
+        """VNets of every subscription in one address index, grown as each subscription's listing arrives"""
+        space = AddressSpace()
+
+        async def list_and_index(manager: AsyncAzureManager) -> List[Dict[str, Any]]:
+            vnets = await manager.list_virtual_networks()
+            # Indexed as part of the operation (not the progress callback, whose errors are dropped),
+            # so a failure is reported as this subscription's error; no await, so a deadline can't split it
+            space.add_vnets(vnets)
+            return vnets
+
+        outcome = await self.run(list_and_index, on_result)
+        outcome.pop("results", None)
+        return space, outcome
+
+    async def find_address_conflicts(self, resource_group: str = None,
+                                     on_result: Optional[ResultCallback] = None) -> Dict[str, Any]:
+        """Overlapping VNet address spaces and subnets across subscriptions"""
+        space, outcome = await self.address_space(on_result)
+        if "error" in outcome:
+            return outcome
+        return {**outcome, **await asyncio.to_thread(find_address_conflicts, space, resource_group)}
+
+    async def check_address_prefix(self, prefix: str, vnet_name: str = None,
+                                   on_result: Optional[ResultCallback] = None) -> Dict[str, Any]:
+        """Whether a new VNet address space (or a subnet of vnet_name) would overlap any subscription's"""
+        space, outcome = await self.address_space(on_result)
+        if "error" in outcome:
+            return outcome
+        return {**outcome, **check_prefix(space, prefix, vnet_name)}
+
+
+def _merge(outcome: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """Flatten per-subscription lists into one list under key"""
+    if "error" in outcome:
+        return outcome
+    results = outcome.pop("results")
+    outcome[key] = [item for subscription_id in sorted(results) for item in results[subscription_id]]
+    return outcome
@@ -0,0 +1,249 @@
+"""
+Inventory Cache Module
+
+Bounded TTL + LRU cache for Azure inventory reads (resource groups and
+per-group resource listings) with stale-while-revalidate refresh. With a
+SharedCache behind it, entries are shared by the worker processes of a
+multi-worker server and only one of them loads a missing entry.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from .arm_scheduler import background_priority
+from .config import get_config
+from .resource_records import to_jsonable
+from .shared_cache import SharedCache, get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+def _encode(value: Any) -> Optional[str]:
+    try:
+        return json.dumps(value, default=to_jsonable)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the in-memory footprint of a cached value by its JSON size"""
+    text = _encode(value)
+    return len(str(value)) if text is None else len(text)
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its freshness window"""
+
+    value: Any
+    size: int
+    stored_at: float
+    expires_at: float
+    stale_until: float
+
+
+class InventoryCache:
+    """TTL + LRU cache bounded by entry count and estimated byte size"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: float = 60, stale_ttl: float = 300, shared: Optional[SharedCache] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        # Entries here are a local copy of the shared ones, checked against it on every lookup
+        self.shared = shared
+
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Set[Tuple] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.invalidations = 0
+
+    async def get(self, key: Tuple, allow_stale: bool = False) -> Tuple[Optional[Any], bool]:
+        """Look up a key; returns (value, is_fresh) or (None, False) on a miss"""
+        if self.shared is not None:
+            await self._sync_from_shared(key)
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is None or now >= entry.stale_until or (now >= entry.expires_at and not allow_stale):
+            return None, False
+        self._entries.move_to_end(key)
+        return entry.value, now < entry.expires_at
+
+    async def _sync_from_shared(self, key: Tuple):
+        """Bring the local copy of key in line with the shared entry"""
+        entry = self._entries.get(key)
+        # SQLite may wait on other workers' writes (busy timeout); keep that off the event loop
+        row = await asyncio.to_thread(self.shared.lookup, key, entry.stored_at if entry else None)
+        current = self._entries.get(key)
+        if current is not entry and current is not None and (row is None or current.stored_at >= row[0]):
+            # Stored locally while the lookup ran; that version is at least as new
+            return
+        if row is None:
+            self._remove(key)
+            return
+        stored_at, expires_at, stale_until, value, size = row
+        if value is not None:
+            self._store(key, CacheEntry(value, size, stored_at, expires_at, stale_until))
+
+    async def put(self, key: Tuple, value: Any, ttl: Optional[float] = None):
+        """Store a value with its own TTL, evicting least-recently-used entries as needed"""
+        ttl = self.default_ttl if ttl is None else ttl
+        text = _encode(value)
+        size = len(str(value)) if text is None else len(text)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key}: {size} bytes exceeds cache budget")
+            return
+
+        now = time.time()
+        entry = CacheEntry(
+            value=value,
+            size=size,
+            stored_at=now,
+            expires_at=now + ttl,
+            stale_until=now + ttl + self.stale_ttl,
+        )
+        self._store(key, entry)
+        if self.shared is not None and text is not None:
+            await asyncio.to_thread(self.shared.put, key, text, entry.stored_at, entry.expires_at, entry.stale_until)
+
+    def _store(self, key: Tuple, entry: CacheEntry):
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def stored_at(self, key: Tuple) -> Optional[float]:
+        """Return when a key was last stored, or None if it isn't cached"""
+        if self.shared is not None:
+            await self._sync_from_shared(key)
+        entry = self._entries.get(key)
+        return entry.stored_at if entry else None
+
+    def invalidate(self, *prefix) -> int:
+        """Drop every entry whose key starts with the given prefix; returns the count"""
+        keys = [key for key in self._entries if key[:len(prefix)] == prefix]
+        for key in keys:
+            self._remove(key)
+        dropped = len(keys)
+        if self.shared is not None:
+            # Other workers' local copies go stale on their next lookup
+            dropped = max(dropped, self.shared.invalidate(prefix))
+        self.invalidations += dropped
+        return dropped
+
+    async def get_or_load(self, key: Tuple, loader: Loader, ttl: Optional[float] = None) -> Any:
+        """Serve from cache, revalidating stale entries in the background
+
+        Loader exceptions propagate to the caller and nothing is cached.
+        """
+        value, fresh = await self.get(key, allow_stale=True)
+        if value is not None:
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._schedule_refresh(key, loader, ttl)
+            return value
+
+        self.misses += 1
+        if self.shared is not None:
+            return await self.shared.run_once(
+                f"cache-load:{key}", lambda: self._value(key), lambda: self._load(key, loader, ttl)
+            )
+        return await self._load(key, loader, ttl)
+
+    async def _value(self, key: Tuple) -> Optional[Any]:
+        value, _ = await self.get(key)
+        return value
+
+    async def _load(self, key: Tuple, loader: Loader, ttl: Optional[float]) -> Any:
+        value = await loader()
+        await self.put(key, value, ttl)
+        return value
+
+    def _schedule_refresh(self, key: Tuple, loader: Loader, ttl: Optional[float]):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, loader, ttl))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: Tuple, loader: Loader, ttl: Optional[float]):
+        try:
+            # Nobody is waiting on a revalidation, so its ARM requests yield to interactive ones
+            with background_priority():
+                if self.shared is not None:
+                    # One worker revalidates; the others pick up its entry
+                    await self.shared.run_once(
+                        f"cache-load:{key}", lambda: self._value(key), lambda: self._load(key, loader, ttl)
+                    )
+                else:
+                    await self._load(key, loader, ttl)
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning(f"Background refresh of {key} failed, keeping stale entry: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics and current occupancy"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "background_refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "invalidations": self.invalidations,
+        }
+
+
+_inventory_cache: Optional[InventoryCache] = None
+
+
+def get_inventory_cache() -> InventoryCache:
+    """Get the global inventory cache, creating it on first use"""
+    global _inventory_cache
+    if _inventory_cache is None:
+        config = get_config()
+        _inventory_cache = InventoryCache(
+            max_entries=config.inventory_cache_max_entries,
+            max_bytes=config.inventory_cache_max_bytes,
+            default_ttl=config.inventory_cache_ttl,
+            stale_ttl=config.inventory_cache_stale_ttl,
+            shared=get_shared_cache(),
+        )
+    return _inventory_cache
@@ -0,0 +1,244 @@
+"""
+Inventory Store Module
+
+Local SQLite snapshot of a subscription's resource inventory. It is filled by
+one bulk enumeration and then kept current with incremental changedTime
+queries, so read tools and aggregations can be answered without going to ARM.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import get_config
+from .resource_records import ResourceRecord
+
+logger = logging.getLogger(__name__)
+
+# Columns that aggregate_inventory can group by
+AGGREGATE_COLUMNS = {
+    "type": "type",
+    "location": "location",
+    "sku": "sku",
+    "kind": "kind",
+    "resource_group": "resource_group",
+    "provisioning_state": "provisioning_state",
+}
+
+
+def resource_group_of(resource_id: str) -> Optional[str]:
+    """Lowercased resource group segment of an ARM id"""
+    parts = resource_id.split("/")
+    for index, part in enumerate(parts[:-1]):
+        if part.lower() == "resourcegroups":
+            return parts[index + 1].lower()
+    return None
+
+
+class InventoryStore:
+    """SQLite-backed per-subscription resource snapshot with sync bookkeeping"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Worker processes of a multi-worker server share the file; wait out each other's writes
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS resources ("
+            " id TEXT PRIMARY KEY, subscription_id TEXT NOT NULL, resource_group TEXT,"
+            " name TEXT, type TEXT, location TEXT, sku TEXT, kind TEXT, provisioning_state TEXT,"
+            " created_time TEXT, changed_time TEXT, record TEXT NOT NULL, synced_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS resources_group ON resources (subscription_id, resource_group);"
+            "CREATE TABLE IF NOT EXISTS resource_groups ("
+            " subscription_id TEXT NOT NULL, name TEXT NOT NULL, location TEXT,"
+            " PRIMARY KEY (subscription_id, name));"
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " subscription_id TEXT PRIMARY KEY, last_full_sync REAL, last_sync REAL,"
+            " high_water TEXT, resource_count INTEGER);"
+        )
+
+    @staticmethod
+    def _row(subscription_id: str, record: Any, synced_at: float) -> tuple:
+        if isinstance(record, ResourceRecord):
+            record = record.to_dict()
+        return (
+            record["id"].lower(), subscription_id, resource_group_of(record["id"]),
+            record.get("name"), record.get("type"), record.get("location"), record.get("sku"),
+            record.get("kind"), record.get("provisioning_state"), record.get("created_time"),
+            record.get("changed_time"), json.dumps(record), synced_at,
+        )
+
+    def _upsert(self, subscription_id: str, records: Iterable[Dict[str, Any]], synced_at: float) -> int:
+        rows = [self._row(subscription_id, record, synced_at) for record in records]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        return len(rows)
+
+    def _set_state(self, subscription_id: str, synced_at: float, full: bool):
+        high_water, count = self._conn.execute(
+            "SELECT MAX(changed_time), COUNT(*) FROM resources WHERE subscription_id = ?", (subscription_id,)
+        ).fetchone()
+        self._conn.execute(
+            "INSERT INTO sync_state (subscription_id, last_full_sync, last_sync, high_water, resource_count) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (subscription_id) DO UPDATE SET "
+            "last_full_sync = COALESCE(excluded.last_full_sync, last_full_sync), "
+            "last_sync = excluded.last_sync, high_water = excluded.high_water, "
+            "resource_count = excluded.resource_count",
+            (subscription_id, synced_at if full else None, synced_at, high_water, count)
+        )
+
+    def replace_subscription(self, subscription_id: str, records: List[Dict[str, Any]],
+                             resource_groups: List[Dict[str, Any]], synced_at: float = None):
+        """Store the result of a full enumeration; resources not seen in it are removed"""
+        synced_at = synced_at or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._upsert(subscription_id, records, synced_at)
+                self._conn.execute(
+                    "DELETE FROM resources WHERE subscription_id = ? AND synced_at < ?", (subscription_id, synced_at)
+                )
+                self._replace_groups(subscription_id, resource_groups)
+                self._set_state(subscription_id, synced_at, full=True)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _replace_groups(self, subscription_id: str, resource_groups: List[Dict[str, Any]]):
+        self._conn.execute("DELETE FROM resource_groups WHERE subscription_id = ?", (subscription_id,))
+        self._conn.executemany(
+            "INSERT INTO resource_groups VALUES (?, ?, ?)",
+            [(subscription_id, group["name"], group.get("location")) for group in resource_groups]
+        )
+
+    def apply_changes(self, subscription_id: str, records: List[Dict[str, Any]],
+                      resource_groups: List[Dict[str, Any]] = None, synced_at: float = None) -> int:
+        """Upsert resources returned by an incremental (changedTime) query"""
+        synced_at = synced_at or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                count = self._upsert(subscription_id, records, synced_at)
+                if resource_groups is not None:
+                    self._replace_groups(subscription_id, resource_groups)
+                self._set_state(subscription_id, synced_at, full=False)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def sync_state(self, subscription_id: str) -> Optional[Dict[str, Any]]:
+        """Last full/incremental sync times and changedTime high-water mark, or None if never synced"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_full_sync, last_sync, high_water, resource_count FROM sync_state "
+                "WHERE subscription_id = ?", (subscription_id,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return {"last_full_sync": row[0], "last_sync": row[1], "high_water": row[2], "resource_count": row[3]}
+
+    def mark_stale(self, subscription_id: str):
+        """Force the next freshness check to sync (deletions still wait for the next full sync)"""
+        with self._lock:
+            self._conn.execute("UPDATE sync_state SET last_sync = 0 WHERE subscription_id = ?", (subscription_id,))
+
+    def resources_in_group(self, subscription_id: str, resource_group: str) -> List[ResourceRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM resources WHERE subscription_id = ? AND resource_group = ? ORDER BY id",
+                (subscription_id, resource_group.lower())
+            ).fetchall()
+        return [ResourceRecord.from_dict(json.loads(row[0])) for row in rows]
+
+    def resources_page(self, subscription_id: str, resource_group: str, after_id: str = "", limit: int = 500,
+                       resource_type: str = None) -> List[Tuple[str, ResourceRecord]]:
+        """Up to limit (id, record) pairs ordered by id, starting after after_id (keyset pagination)"""
+        query = "SELECT id, record FROM resources WHERE subscription_id = ? AND resource_group = ? AND id > ?"
+        params: List[Any] = [subscription_id, resource_group.lower(), after_id]
+        if resource_type:
+            query += " AND type = ? COLLATE NOCASE"
+            params.append(resource_type)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(row[0], ResourceRecord.from_dict(json.loads(row[1]))) for row in rows]
+
+    def resource_groups(self, subscription_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM resource_groups WHERE subscription_id = ? ORDER BY name", (subscription_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def aggregate(self, subscription_id: str, group_by: str, resource_group: str = None) -> List[Dict[str, Any]]:
+        """Resource counts per type/location/SKU/... computed locally"""
+        column = AGGREGATE_COLUMNS[group_by]
+        query = f"SELECT {column}, COUNT(*) FROM resources WHERE subscription_id = ?"
+        params: List[Any] = [subscription_id]
+        if resource_group:
+            query += " AND resource_group = ?"
+            params.append(resource_group.lower())
+        query += f" GROUP BY {column} ORDER BY COUNT(*) DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{group_by: value, "count": count} for value, count in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT subscription_id, last_full_sync, last_sync, resource_count FROM sync_state"
+            ).fetchall()
+        now = time.time()
+        return {
+            "path": str(self.path),
+            "subscriptions": {
+                subscription_id: {
+                    "resources": count,
+                    "full_sync_age_s": round(now - full, 1) if full else None,
+                    "sync_age_s": round(now - last, 1) if last else None,
+                }
+                for subscription_id, full, last, count in rows
+            },
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_inventory_store: Optional[InventoryStore] = None
+_inventory_store_lock = threading.Lock()
+
+
+def get_inventory_store() -> Optional[InventoryStore]:
+    """Get the global inventory store, or None when it is disabled"""
+    global _inventory_store
+    config = get_config()
+    if not config.inventory_store_enabled:
+        return None
+    if _inventory_store is None:
+        with _inventory_store_lock:
+            if _inventory_store is None:
+                _inventory_store = InventoryStore(config.inventory_store_path)
+    return _inventory_store
+
+
+def close_inventory_store():
+    """Close the global inventory store if it was ever opened"""
+    global _inventory_store
+    if _inventory_store is not None:
+        _inventory_store.close()
+        _inventory_store = None
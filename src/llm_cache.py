@@ -0,0 +1,238 @@
+"""
+LLM Result Cache Module
+
+Persistent, size-bounded cache for LLM analyses of deployment errors. Errors
+that differ only in GUIDs, timestamps, resource IDs and the deployment and
+resource group names share one entry; the key keeps the error codes,
+targets and resource types.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+_ARM_ID_RE = re.compile(r"/subscriptions/[^\s'\",;]+", re.IGNORECASE)
+_GUID_RE = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE)
+_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+_RESOURCE_TYPE_RE = re.compile(r"\bMicrosoft\.[A-Za-z]+(?:/[A-Za-z]+)+", re.IGNORECASE)
+# Fields of an ARM error, when the message couldn't be parsed as JSON
+_ERROR_FIELD_RE = re.compile(r"[\"'](code|target)[\"']\s*:\s*[\"']([^\"']*)[\"']")
+# Keys of an ARM error (and of root causes) that identify what failed
+_ERROR_FIELD_KEYS = {"code": "codes", "target": "targets", "resource_type": "resource_types",
+                     "resourceType": "resource_types"}
+
+
+def _name_pattern(name: str) -> "re.Pattern":
+    # Whole tokens only: a deployment named "d" must not touch "requested"
+    return re.compile(r"(?<![\w-])" + re.escape(name) + r"(?![\w-])", re.IGNORECASE)
+
+
+def normalize_error_message(message: str, names: tuple = ()) -> str:
+    """Strip resource-specific details so equivalent errors normalize to the same text
+
+    Only resource IDs, GUIDs, timestamps and the given names are replaced;
+    error codes, targets and resource types stay, so different errors never
+    normalize to the same text.
+    """
+    text = message
+    for name in names:
+        if name and name != "Unknown":
+            text = _name_pattern(name).sub("<name>", text)
+    text = _ARM_ID_RE.sub("<resource-id>", text)
+    text = _GUID_RE.sub("<guid>", text)
+    text = _TIMESTAMP_RE.sub("<timestamp>", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def _collect_error_fields(value: Any, fields: Dict[str, set]):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in _ERROR_FIELD_KEYS and isinstance(item, str):
+                fields[_ERROR_FIELD_KEYS[key]].add(item)
+            else:
+                _collect_error_fields(item, fields)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_error_fields(item, fields)
+
+
+def error_fields(message: str, names: tuple = ()) -> Dict[str, List[str]]:
+    """Error codes, targets and resource types of an ARM error message (JSON, or text quoting them)"""
+    fields: Dict[str, set] = {"codes": set(), "targets": set(), "resource_types": set()}
+    try:
+        _collect_error_fields(json.loads(message), fields)
+    except (ValueError, TypeError):
+        for key, value in _ERROR_FIELD_RE.findall(message):
+            fields[_ERROR_FIELD_KEYS[key]].add(value)
+    # Types mentioned in the text; resource IDs are left out since their name segments vary
+    fields["resource_types"].update(_RESOURCE_TYPE_RE.findall(_ARM_ID_RE.sub(" ", message)))
+    return {
+        "codes": sorted(code.lower() for code in fields["codes"]),
+        # Targets name the failing resource or property; only their resource-specific parts are stripped
+        "targets": sorted({normalize_error_message(target, names) for target in fields["targets"]}),
+        "resource_types": sorted({resource_type.lower() for resource_type in fields["resource_types"]}),
+    }
+
+
+def normalize_error_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce deployment error prompt arguments to the parts that determine the answer"""
+    names = (str(arguments.get("deployment_name", "")), str(arguments.get("resource_group", "")))
+    message = str(arguments.get("error_message", ""))
+    return {
+        "deployment_state": str(arguments.get("deployment_state", "Unknown")).lower(),
+        **error_fields(message, names),
+        "error_message": normalize_error_message(message, names),
+    }
+
+
+def cache_key(arguments: Dict[str, Any], template_version: str, model: str) -> str:
+    """Hash normalized arguments together with the prompt template version and model"""
+    payload = json.dumps({
+        "arguments": normalize_error_arguments(arguments),
+        "template_version": template_version,
+        "model": model,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """SQLite-backed result store with a TTL and LRU eviction by total bytes"""
+
+    def __init__(self, path: Path, max_bytes: int = 64 * 1024 * 1024, ttl: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Worker processes of a multi-worker server share the file; wait out each other's writes
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached result, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] + self.ttl < now:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def peek(self, key: str) -> Optional[str]:
+        """Return an unexpired result without counting a lookup or refreshing its recency"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND created_at >= ?", (key, time.time() - self.ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: str):
+        """Store a result and evict least-recently-used entries beyond the byte budget"""
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_llm_cache: Optional[LLMResultCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResultCache]:
+    """Get the global LLM result cache, or None when it is disabled"""
+    global _llm_cache
+    config = get_config()
+    if not config.llm_cache_enabled:
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResultCache(
+                    config.llm_cache_path,
+                    max_bytes=config.llm_cache_max_bytes,
+                    ttl=config.llm_cache_ttl,
+                )
+    return _llm_cache
+
+
+def close_llm_cache():
+    """Close the global LLM result cache if it was ever opened"""
+    global _llm_cache
+    if _llm_cache is not None:
+        _llm_cache.close()
+        _llm_cache = None
@@ -6,14 +6,33 @@ to provide Azure network troubleshooting capabilities to GitHub Copilot.
 """
 
 import asyncio
-from typing import Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
 import logging
+import os
 import ssl
 import httpx
 from mcp.server import FastMCP
-from .azure_manager import AzureManager
-from .ai_agent import NetworkTroubleshootingAgent
+from mcp.server.fastmcp import Context
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from .address_overlap import mentions_address_conflict
+from .admission import HEAVY, INTERACTIVE, STANDARD, AdmissionController, parse_tool_limits
+from .azure_manager import AsyncAzureManager
+from .azure_clients import close_client_pool, get_client_pool
+from .batch_analysis import analyze_failed_deployments as analyze_failed_deployments_batch
+from .inventory_cache import get_inventory_cache
+from .inventory_store import close_inventory_store, get_inventory_store
+from .llm_cache import close_llm_cache, get_llm_cache
+from .single_flight import SingleFlight
+from .ai_agent import ChunkCallback, close_troubleshooting_agents, get_agent_stats, get_troubleshooting_agent
 from .config import get_config
+from .fanout import ResultCallback, SubscriptionFanOut, list_visible_subscriptions
+from .pagination import dumps
+from .shared_cache import close_shared_cache, get_shared_cache
+from .telemetry import PROMETHEUS_CONTENT_TYPE, get_telemetry, traced
+from .warmup import get_startup_warmup
+from .workers import serve_workers, worker_index
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +62,64 @@ mcp_server = FastMCP(
     http_client=httpx.AsyncClient(verify=False)
 )
 
+# Coalesces concurrent identical tool calls onto one execution
+_in_flight = SingleFlight()
+
+# Per-tool concurrency limits and wait queues; cheap tools don't queue behind ARM- and LLM-heavy ones
+_admission = AdmissionController(
+    capacity=get_config().admission_capacity,
+    max_wait=get_config().admission_max_wait,
+    tool_limits=parse_tool_limits(get_config().admission_tool_limits),
+    enabled=get_config().admission_enabled
+)
+
+# Dependencies the tools import on first use; the startup warmup imports them first
+WARMUP_MODULES = (
+    "semantic_kernel",
+    "semantic_kernel.connectors.ai.open_ai",
+    "openai",
+    "azure.identity.aio",
+    "azure.mgmt.resource.resources.aio",
+    "azure.mgmt.network.aio",
+    f"{__package__}.nsg_evaluator",
+    f"{__package__}.route_trie",
+)
+
+def _flight_arg(value: str) -> str:
+    """Normalize a tool argument for in-flight deduplication"""
+    return value.strip().lower()
+
+def _stream_forwarder(ctx: Context) -> Optional[ChunkCallback]:
+    """
+    Build a callback that forwards streamed LLM text to the MCP client.
+    
+    Chunks go out as progress notifications when the client sent a progress
+    token, otherwise as log notifications. Returns None when streaming is
+    disabled or there is no request to stream to.
+    """
+    if not get_config().llm_streaming or ctx is None:
+        return None
+    try:
+        meta = ctx.request_context.meta
+    except ValueError:
+        return None
+    
+    has_progress_token = bool(meta and meta.progressToken is not None)
+    received = 0
+    
+    async def forward(chunk: str):
+        nonlocal received
+        received += len(chunk)
+        if has_progress_token:
+            await ctx.report_progress(received, message=chunk)
+        else:
+            await ctx.log("info", chunk, logger_name="llm-stream")
+    
+    return forward
+
 @mcp_server.tool()
+@traced("tool")
+@_admission.admitted(INTERACTIVE)
 def hello_world(name: str = "World") -> str:
     """
     A simple hello world tool to test MCP connectivity.
@@ -57,7 +133,9 @@ def hello_world(name: str = "World") -> str:
     return f"Hello, {name}! Welcome to the Hero of the Day MCP server! 🚀"
 
 @mcp_server.tool()
-def get_azure_resource_groups() -> List[str]:
+@traced("tool")
+@_admission.admitted(INTERACTIVE)
+async def get_azure_resource_groups() -> List[str]:
     """
     Get list of Azure resource groups in the configured subscription.
     
@@ -69,8 +147,8 @@ def get_azure_resource_groups() -> List[str]:
         if not config.azure_subscription_id:
             return ["Error: Azure subscription ID not configured"]
         
-        azure_manager = AzureManager(config.azure_subscription_id)
-        resource_groups = azure_manager.list_resource_groups()
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        resource_groups = await azure_manager.list_resource_groups()
         
         if not resource_groups:
             return ["No resource groups found"]
@@ -81,69 +159,137 @@ def get_azure_resource_groups() -> List[str]:
         return [f"Error: {str(e)}"]
 
 @mcp_server.tool()
-def analyze_deployment_error(
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def analyze_deployment_error(
     deployment_name: str, 
     resource_group: str
 ) -> Dict[str, Any]:
     """
     Analyze a specific deployment error in Azure.
     
+    For failed deployments, nested and linked deployments are followed to
+    build a failure tree and list the deepest failing operations.
+    
     Args:
         deployment_name: Name of the deployment to analyze
         resource_group: Resource group containing the deployment
         
     Returns:
-        Analysis results with error details and recommendations
+        Analysis results with error details, failure tree and root causes
     """
     try:
         config = get_config()
         if not config.azure_subscription_id:
             return {"error": "Azure subscription ID not configured"}
         
-        azure_manager = AzureManager(config.azure_subscription_id)
-        deployment_info = azure_manager.diagnose_deployment_error(
-            deployment_name, resource_group
+        # Concurrent calls for the same deployment share one ARM read
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        deployment_info = await _in_flight.run(
+            ("analyze_deployment_error", _flight_arg(deployment_name), _flight_arg(resource_group)),
+            lambda: azure_manager.diagnose_deployment_error(deployment_name, resource_group)
         )
         
+        # Address space failures get the concrete overlapping prefixes instead of generic advice
+        if mentions_address_conflict(deployment_info.get("error")):
+            conflicts = await azure_manager.get_address_conflicts(resource_group)
+            deployment_info = {**deployment_info, "address_conflicts": conflicts}
+        
         return deployment_info
     except Exception as e:
         logger.error(f"Error analyzing deployment: {e}")
         return {"error": str(e)}
 
 @mcp_server.tool()
+@traced("tool")
+@_admission.admitted(HEAVY, _in_flight, lambda arguments: (
+    "get_ai_troubleshooting_advice", _flight_arg(arguments["error_details"])
+))
 async def get_ai_troubleshooting_advice(
-    error_details: str
-) -> str:
+    error_details: str,
+    ctx: Context = None
+) -> Dict[str, Any]:
     """
     Get AI-powered troubleshooting advice for network issues.
     
+    The advice is streamed to the client as progress notifications while the
+    model generates it. Identical questions asked at the same time share one
+    model request; only the first caller receives the streamed chunks.
+    
     Args:
         error_details: Description of the error or issue
         
     Returns:
-        AI-generated troubleshooting advice and recommendations
+        AI-generated troubleshooting advice and whether it was served from
+        the result cache
     """
     try:
         config = get_config()
         if not config.openai_api_key:
-            return "Error: OpenAI API key not configured"
+            return {"error": "OpenAI API key not configured"}
         
-        ai_agent = NetworkTroubleshootingAgent(
+        ai_agent = get_troubleshooting_agent(
             config.openai_api_key, 
             config.openai_model
         )
         
         # Create a structured error details dict
         error_data = {"description": error_details}
-        analysis = await ai_agent.analyze_deployment_error(error_data)
+        result = await ai_agent.analyze_deployment_error_with_cache_info(
+            error_data, on_chunk=_stream_forwarder(ctx)
+        )
         
-        return analysis
+        return {"analysis": result["analysis"], "served_from_cache": result["cached"]}
     except Exception as e:
         logger.error(f"Error getting AI advice: {e}")
-        return f"Error: {str(e)}"
+        return {"error": str(e)}
 
 @mcp_server.tool()
-def get_network_issues(resource_group: str) -> Dict[str, Any]:
+@traced("tool")
+@_admission.admitted(HEAVY)
+async def analyze_failed_deployments(
+    resource_groups: Optional[List[str]] = None,
+    window_hours: float = 24,
+    max_deployments: int = 200
+) -> Dict[str, Any]:
+    """
+    Diagnose every failed deployment in a time window across resource groups.
+    
+    Failures are grouped by normalized error signature and each signature is
+    analyzed by the AI agent once, so an incident with many identical
+    failures costs one LLM request.
+    
+    Args:
+        resource_groups: Resource groups to scan (default: all in the subscription)
+        window_hours: How far back to look for failed deployments
+        max_deployments: Upper bound on deployments diagnosed (most recent first)
+        
+    Returns:
+        Consolidated report with one entry per error signature, listing the
+        affected deployments, their root causes and the AI analysis
+    """
+    try:
+        config = get_config()
+        if not config.azure_subscription_id:
+            return {"error": "Azure subscription ID not configured"}
+        
+        if not config.openai_api_key:
+            return {"error": "OpenAI API key not configured for AI analysis"}
+        
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        ai_agent = get_troubleshooting_agent(config.openai_api_key, config.openai_model)
+        return await analyze_failed_deployments_batch(
+            azure_manager, ai_agent, resource_groups, window_hours,
+            llm_concurrency=config.llm_batch_concurrency, max_deployments=max_deployments
+        )
+    except Exception as e:
+        logger.error(f"Error in batch deployment analysis: {e}")
+        return {"error": str(e)}
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def get_network_issues(resource_group: str) -> Dict[str, Any]:
     """
     Analyze network resources in a resource group for potential issues.
     
@@ -158,22 +304,184 @@ def get_network_issues(resource_group: str) -> Dict[str, Any]:
         if not config.azure_subscription_id:
             return {"error": "Azure subscription ID not configured"}
         
-        azure_manager = AzureManager(config.azure_subscription_id)
-        network_analysis = azure_manager.get_network_issues(resource_group)
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        network_analysis = await azure_manager.get_network_issues(resource_group)
         
         return network_analysis
     except Exception as e:
         logger.error(f"Error analyzing network issues: {e}")
         return {"error": str(e)}
 
+async def _analyze_resources(
+    resource_group: str,
+    include_network_analysis: bool,
+    on_chunk: Optional[ChunkCallback]
+) -> Dict[str, Any]:
+    """Gather resource data for a group and analyze it with the AI agent"""
+    config = get_config()
+    
+    # Get Azure resource data; the independent reads run concurrently
+    azure_manager = AsyncAzureManager(config.azure_subscription_id)
+    reads = [azure_manager.list_resource_groups()]
+    if include_network_analysis:
+        reads.append(azure_manager.get_network_issues(resource_group))
+    results = await azure_manager.gather(*reads)
+    
+    # Prepare resource data for AI analysis
+    resource_data = {
+        "target_resource_group": resource_group,
+        "all_resource_groups": results[0],
+        "subscription_id": config.azure_subscription_id[:8] + "...",  # Masked for privacy
+    }
+    
+    if include_network_analysis:
+        resource_data["network_analysis"] = results[1]
+    
+    # Analyze with AI
+    ai_agent = get_troubleshooting_agent(
+        config.openai_api_key, 
+        config.openai_model
+    )
+    
+    analysis = await ai_agent.analyze_azure_resources(
+        resource_data, on_chunk=on_chunk
+    )
+    
+    return {
+        "analysis": analysis,
+        "resource_data": resource_data,
+        "ai_powered": True
+    }
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def evaluate_nsg_flows(
+    resource_group: str,
+    nsg_name: str,
+    flows: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Check whether traffic flows are allowed by a network security group.
+    
+    Args:
+        resource_group: Resource group containing the NSG
+        nsg_name: Name of the network security group
+        flows: Flows to evaluate, each with source_ip, destination_ip,
+            destination_port, protocol (Tcp/Udp/Icmp/*), and optionally
+            source_port and direction (Inbound/Outbound, default Inbound)
+        
+    Returns:
+        The deciding rule, priority and Allow/Deny decision for every flow
+    """
+    try:
+        config = get_config()
+        if not config.azure_subscription_id:
+            return {"error": "Azure subscription ID not configured"}
+        
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        return await azure_manager.evaluate_nsg_flows(resource_group, nsg_name, flows)
+    except Exception as e:
+        logger.error(f"Error evaluating NSG flows: {e}")
+        return {"error": str(e)}
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def get_effective_next_hops(
+    resource_group: str,
+    queries: List[Dict[str, str]]
+) -> Dict[str, Any]:
+    """
+    Compute the effective next hop for traffic leaving subnets.
+    
+    Uses longest-prefix match over the subnet's system routes (VNet address
+    space, peerings, Internet default) and its route table's user-defined routes.
+    
+    Args:
+        resource_group: Resource group containing the virtual networks
+        queries: Pairs to resolve, each with subnet (subnet id, "vnet/subnet"
+            or a unique subnet name) and destination (IPv4 or IPv6 address)
+        
+    Returns:
+        The matching prefix, next hop type, next hop IP and route source per query
+    """
+    try:
+        config = get_config()
+        if not config.azure_subscription_id:
+            return {"error": "Azure subscription ID not configured"}
+        
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        return await azure_manager.get_effective_next_hops(resource_group, queries)
+    except Exception as e:
+        logger.error(f"Error computing effective next hops: {e}")
+        return {"error": str(e)}
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def find_address_space_conflicts(
+    resource_group: Optional[str] = None,
+    prefix: Optional[str] = None,
+    vnet_name: Optional[str] = None,
+    subscriptions: Optional[List[str]] = None,
+    deadline_seconds: Optional[float] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Find overlapping VNet address spaces and subnet prefixes across
+    subscriptions.
+    
+    Without a prefix, reports every conflicting overlap (peered VNets, subnets
+    of the same VNet, unpeered VNets that could never be peered). With a
+    prefix, checks whether adding it would conflict. VNets of all the given
+    subscriptions are checked against each other; VNets of other
+    subscriptions are only seen through the address space of their peerings.
+    
+    Args:
+        resource_group: Only report conflicts involving VNets in this group
+        prefix: Candidate CIDR to check instead of listing existing conflicts
+        vnet_name: With prefix, check it as a new subnet of this VNet (name,
+            or resource id when the name exists in several subscriptions)
+            rather than as a new VNet address space
+        subscriptions: Subscription ids, or ["all"] for every visible one
+            (default: AZURE_SUBSCRIPTION_IDS)
+        deadline_seconds: Return partial results after this long (default: FANOUT_DEADLINE)
+        
+    Returns:
+        Conflicting pairs with severity, or the conflicts the prefix would cause,
+        plus per-subscription errors and the subscriptions that timed out
+    """
+    try:
+        fanout = SubscriptionFanOut(subscriptions, deadline=deadline_seconds)
+        if not fanout.subscriptions and not fanout.all_visible:
+            return {"error": "No subscriptions given and AZURE_SUBSCRIPTION_IDS is not configured"}
+        if prefix:
+            return await fanout.check_address_prefix(prefix, vnet_name, on_result=_fanout_progress(ctx))
+        return await fanout.find_address_conflicts(resource_group, on_result=_fanout_progress(ctx))
+    except Exception as e:
+        logger.error(f"Error finding address space conflicts: {e}")
+        return {"error": str(e)}
+
 @mcp_server.tool()
+@traced("tool")
+# Concurrent calls for the same group share one set of ARM reads and one LLM request (and one
+# admission slot); only the first caller receives the streamed chunks
+@_admission.admitted(HEAVY, _in_flight, lambda arguments: (
+    "analyze_azure_resources_with_ai", _flight_arg(arguments["resource_group"]),
+    arguments["include_network_analysis"]
+))
 async def analyze_azure_resources_with_ai(
     resource_group: str,
-    include_network_analysis: bool = True
+    include_network_analysis: bool = True,
+    ctx: Context = None
 ) -> Dict[str, Any]:
     """
     Analyze Azure resources using AI-powered insights through Semantic Kernel.
     
+    The analysis is streamed to the client as progress notifications while
+    the model generates it.
+    
     Args:
         resource_group: Name of the resource group to analyze
         include_network_analysis: Whether to include network-specific analysis
@@ -189,64 +497,313 @@ async def analyze_azure_resources_with_ai(
         if not config.openai_api_key:
             return {"error": "OpenAI API key not configured for AI analysis"}
         
-        # Get Azure resource data
-        azure_manager = AzureManager(config.azure_subscription_id)
-        resource_groups = azure_manager.list_resource_groups()
+        return await _analyze_resources(resource_group, include_network_analysis, _stream_forwarder(ctx))
         
-        # Prepare resource data for AI analysis
-        resource_data = {
-            "target_resource_group": resource_group,
-            "all_resource_groups": resource_groups,
-            "subscription_id": config.azure_subscription_id[:8] + "...",  # Masked for privacy
-        }
+    except Exception as e:
+        logger.error(f"Error in AI-powered resource analysis: {e}")
+        return {"error": str(e)}
+
+# Returns pre-encoded compact JSON: one encoding pass instead of FastMCP's indented text plus structured copy
+@mcp_server.tool(structured_output=False)
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def list_azure_resources_in_group(
+    resource_group: str,
+    max_age_seconds: Optional[float] = None,
+    fields: Optional[List[str]] = None,
+    type_filter: Optional[str] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> str:
+    """
+    List the Azure resources in a specific resource group, one page at a time.
+    
+    Args:
+        resource_group: Name of the resource group
+        max_age_seconds: Maximum acceptable age of the answer; served from the
+            local inventory snapshot when it is fresh enough (default: server setting)
+        fields: Only return these fields of each resource (id, name, type,
+            location, kind, sku, provisioning_state, created_time, changed_time)
+        type_filter: Only return resources of this type, e.g. Microsoft.Network/virtualNetworks
+        page_size: Resources per page (default: RESOURCE_PAGE_SIZE, at most 1000)
+        cursor: next_cursor from the previous page, to continue the same listing
         
-        if include_network_analysis:
-            network_analysis = azure_manager.get_network_issues(resource_group)
-            resource_data["network_analysis"] = network_analysis
+    Returns:
+        JSON with one page of resources and next_cursor, which is null on the last page
+    """
+    try:
+        config = get_config()
+        if not config.azure_subscription_id:
+            return dumps({"error": "Azure subscription ID not configured"})
         
-        # Analyze with AI
-        ai_agent = NetworkTroubleshootingAgent(
-            config.openai_api_key, 
-            config.openai_model
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        page = await azure_manager.list_resources_page(
+            resource_group, page_size, cursor, type_filter, fields, max_age_seconds
         )
         
-        analysis = await ai_agent.analyze_azure_resources(resource_data)
+        return dumps(page)
         
+    except Exception as e:
+        logger.error(f"Error listing resources: {e}")
+        return dumps({"error": str(e)})
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(INTERACTIVE)
+async def aggregate_inventory(
+    group_by: str = "type",
+    resource_group: Optional[str] = None,
+    max_age_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Count resources in the subscription by type, location, SKU, kind,
+    resource group or provisioning state, from the local inventory snapshot.
+    
+    Args:
+        group_by: type, location, sku, kind, resource_group or provisioning_state
+        resource_group: Only count resources in this resource group
+        max_age_seconds: Sync the snapshot first if it is older than this
+        
+    Returns:
+        Counts per group, the total, and when the snapshot was last synced
+    """
+    try:
+        config = get_config()
+        if not config.azure_subscription_id:
+            return {"error": "Azure subscription ID not configured"}
+        
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        return await azure_manager.aggregate_inventory(group_by, resource_group, max_age_seconds)
+    except Exception as e:
+        logger.error(f"Error aggregating inventory: {e}")
+        return {"error": str(e)}
+
+def _fanout_progress(ctx: Context) -> Optional[ResultCallback]:
+    """Report each finished subscription to the MCP client while a fan-out is still running"""
+    if ctx is None:
+        return None
+    try:
+        meta = ctx.request_context.meta
+    except ValueError:
+        return None
+    if not (meta and meta.progressToken is not None):
+        return None
+    
+    finished = 0
+    
+    async def report(subscription_id: str, result: Any):
+        nonlocal finished
+        finished += 1
+        count = len(result) if isinstance(result, list) else 0
+        await ctx.report_progress(finished, message=f"{subscription_id}: {count} found")
+    
+    return report
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(INTERACTIVE)
+async def list_azure_subscriptions() -> Dict[str, Any]:
+    """
+    List the enabled Azure subscriptions the server's credential can see.
+    
+    Returns:
+        Subscription ids, display names and tenants, plus the default scope
+        of the multi-subscription tools (AZURE_SUBSCRIPTION_IDS)
+    """
+    try:
+        subscriptions = await list_visible_subscriptions()
         return {
-            "analysis": analysis,
-            "resource_data": resource_data,
-            "ai_powered": True
+            "subscriptions": subscriptions,
+            "count": len(subscriptions),
+            "default_scope": get_config().azure_subscription_ids or [],
         }
+    except Exception as e:
+        logger.error(f"Error listing subscriptions: {e}")
+        return {"error": str(e)}
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def find_azure_resources(
+    name_contains: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    subscriptions: Optional[List[str]] = None,
+    deadline_seconds: Optional[float] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Find resources by name and/or type across many subscriptions at once,
+    e.g. to answer "which subscription is this VNet in?".
+    
+    Subscriptions are searched concurrently; ones that fail or don't answer
+    before the deadline are reported instead of failing the whole search.
+    
+    Args:
+        name_contains: Substring of the resource name
+        resource_type: Resource type, e.g. Microsoft.Network/virtualNetworks
+        subscriptions: Subscription ids, or ["all"] for every visible one
+            (default: AZURE_SUBSCRIPTION_IDS)
+        deadline_seconds: Return partial results after this long (default: FANOUT_DEADLINE)
         
+    Returns:
+        Matching resources with their subscription and resource group, plus
+        per-subscription errors and the subscriptions that timed out
+    """
+    try:
+        if not name_contains and not resource_type:
+            return {"error": "Provide name_contains and/or resource_type"}
+        fanout = SubscriptionFanOut(subscriptions, deadline=deadline_seconds)
+        if not fanout.subscriptions and not fanout.all_visible:
+            return {"error": "No subscriptions given and AZURE_SUBSCRIPTION_IDS is not configured"}
+        return await fanout.find_resources(name_contains, resource_type, on_result=_fanout_progress(ctx))
     except Exception as e:
-        logger.error(f"Error in AI-powered resource analysis: {e}")
+        logger.error(f"Error finding resources across subscriptions: {e}")
         return {"error": str(e)}
 
 @mcp_server.tool()
-def list_azure_resources_in_group(resource_group: str) -> Dict[str, Any]:
+@traced("tool")
+@_admission.admitted(STANDARD)
+async def find_deployment(
+    deployment_name: str,
+    subscriptions: Optional[List[str]] = None,
+    deadline_seconds: Optional[float] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
     """
-    List all Azure resources in a specific resource group using Azure Management SDK.
+    Find which subscriptions and resource groups hold a deployment with the
+    given name, searching many subscriptions concurrently.
     
     Args:
-        resource_group: Name of the resource group
+        deployment_name: Name of the deployment
+        subscriptions: Subscription ids, or ["all"] for every visible one
+            (default: AZURE_SUBSCRIPTION_IDS)
+        deadline_seconds: Return partial results after this long (default: FANOUT_DEADLINE)
+        
+    Returns:
+        Every matching deployment with its state and timestamp, plus
+        per-subscription errors and the subscriptions that timed out
+    """
+    try:
+        fanout = SubscriptionFanOut(subscriptions, deadline=deadline_seconds)
+        if not fanout.subscriptions and not fanout.all_visible:
+            return {"error": "No subscriptions given and AZURE_SUBSCRIPTION_IDS is not configured"}
+        return await fanout.find_deployment(deployment_name, on_result=_fanout_progress(ctx))
+    except Exception as e:
+        logger.error(f"Error finding deployment {deployment_name} across subscriptions: {e}")
+        return {"error": str(e)}
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(INTERACTIVE)
+def get_server_diagnostics() -> Dict[str, Any]:
+    """
+    Get internal diagnostics for the MCP server (client reuse, caches).
+    
+    Returns:
+        Counters describing Azure credential and client pool reuse, and
+        inventory and LLM result cache hit/miss statistics
+    """
+    llm_cache = get_llm_cache()
+    inventory_store = get_inventory_store()
+    shared_cache = get_shared_cache()
+    return {
+        "azure_client_pool": get_client_pool().stats(),
+        "inventory_cache": get_inventory_cache().stats(),
+        "inventory_store": inventory_store.stats() if inventory_store else {"enabled": False},
+        "llm_cache": llm_cache.stats() if llm_cache else {"enabled": False},
+        "llm_agents": get_agent_stats(),
+        "single_flight": _in_flight.stats(),
+        "warmup": get_startup_warmup().status(),
+        "telemetry": get_telemetry().stats(),
+        "worker": {"index": worker_index(), "pid": os.getpid()},
+        "shared_cache": shared_cache.stats() if shared_cache else {"enabled": False},
+        "admission": _admission.stats()
+    }
+
+@mcp_server.tool()
+@traced("tool")
+@_admission.admitted(INTERACTIVE)
+async def invalidate_inventory_cache(resource_group: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Drop cached Azure inventory and mark the local inventory snapshot stale,
+    so the next call refreshes from Azure.
+    
+    Args:
+        resource_group: Resource group to invalidate (default: the whole subscription)
         
     Returns:
-        List of resources with their types and properties
+        Number of cache entries dropped
     """
     try:
         config = get_config()
         if not config.azure_subscription_id:
             return {"error": "Azure subscription ID not configured"}
         
-        azure_manager = AzureManager(config.azure_subscription_id)
-        resource_list = azure_manager.list_resources_in_group(resource_group)
-        
-        return resource_list
+        azure_manager = AsyncAzureManager(config.azure_subscription_id)
+        dropped = azure_manager.invalidate_inventory(resource_group)
         
+        return {"invalidated_entries": dropped, "resource_group": resource_group}
     except Exception as e:
-        logger.error(f"Error listing resources: {e}")
+        logger.error(f"Error invalidating inventory cache: {e}")
         return {"error": str(e)}
 
+@mcp_server.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint for the tool, Azure and LLM call metrics"""
+    telemetry = get_telemetry()
+    if not telemetry.enabled:
+        return PlainTextResponse("Telemetry is disabled; set TELEMETRY_ENABLED=true\n", status_code=404)
+    return PlainTextResponse(telemetry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@mcp_server.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """Readiness probe: 200 once the startup warmup has finished, with what is warm"""
+    warmup = get_startup_warmup()
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+async def _shutdown():
+    """Release process-wide resources held by the tools"""
+    await close_troubleshooting_agents()
+    await close_client_pool()
+    close_llm_cache()
+    close_inventory_store()
+    close_shared_cache()
+
+def build_http_app():
+    """
+    Build the streamable-http Starlette app, with process-wide resources
+    released when the server stops.
+    """
+    app = mcp_server.streamable_http_app()
+    session_lifespan = app.router.lifespan_context
+    
+    @asynccontextmanager
+    async def lifespan(app):
+        async with session_lifespan(app):
+            # Connections are accepted while the warmup runs; /ready reports when it is done
+            warmup = asyncio.create_task(get_startup_warmup().run(WARMUP_MODULES)) if get_config().startup_warmup else None
+            try:
+                yield
+            finally:
+                if warmup is not None:
+                    warmup.cancel()
+                await _shutdown()
+    
+    app.router.lifespan_context = lifespan
+    return app
+
+async def _serve():
+    import uvicorn
+    
+    settings = mcp_server.settings
+    server = uvicorn.Server(uvicorn.Config(
+        build_http_app(),
+        host=settings.host,
+        port=settings.port,
+        log_level=settings.log_level.lower()
+    ))
+    await server.serve()
+
 def run_mcp_server():
     """
     Run the MCP server using streamable-http transport (FastMCP built-in HTTP server).
@@ -258,8 +815,14 @@ def run_mcp_server():
     
     # Configure additional HTTP client settings for SSL bypass
     try:
+        workers = get_config().mcp_workers
+        if workers > 1:
+            settings = mcp_server.settings
+            logger.info(f"Serving from {workers} worker processes sharing {get_config().shared_cache_path}")
+            asyncio.run(serve_workers(workers, settings.host, settings.port, settings.log_level.lower()))
+            return
         # Use the MCP server with SSL verification disabled
-        mcp_server.run(transport="streamable-http")
+        asyncio.run(_serve())
     except Exception as e:
         logger.error(f"Failed to start MCP server: {e}")
         raise
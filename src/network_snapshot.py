@@ -0,0 +1,312 @@
+"""
+Network Snapshot Module
+
+Collects the network resources of a resource group concurrently into an
+id-indexed, cross-referenced snapshot and runs issue checks against it.
+
+Resources are held in ARM REST JSON shape ({"id", "name", "properties": {...}}),
+so a snapshot can equally be built from SDK models or recorded JSON.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Snapshot collection name -> NetworkManagementClient operation group (each has list(resource_group))
+NETWORK_COLLECTIONS = {
+    "network_security_groups": "network_security_groups",
+    "route_tables": "route_tables",
+    "virtual_networks": "virtual_networks",
+    "load_balancers": "load_balancers",
+    "application_gateways": "application_gateways",
+    "network_interfaces": "network_interfaces",
+    "public_ip_addresses": "public_ip_addresses",
+}
+
+# Platform subnets that must not (or need not) carry an NSG
+NSG_EXEMPT_SUBNETS = {"gatewaysubnet", "azurefirewallsubnet", "azurefirewallmanagementsubnet", "routeserversubnet"}
+
+
+def to_arm_json(item: Any) -> Dict[str, Any]:
+    """Convert an SDK model (either generation) or recorded JSON into ARM REST JSON"""
+    if isinstance(item, dict):
+        return item
+    if isinstance(item, Mapping):
+        # Newer SDK models are mappings over the REST payload
+        return item.as_dict()
+    # Older msrest models flatten properties; serialize() restores the REST shape
+    return item.serialize(keep_readonly=True)
+
+
+def _key(resource_id: Optional[str]) -> Optional[str]:
+    # ARM ids are case-insensitive
+    return resource_id.lower() if resource_id else None
+
+
+def _props(resource: Dict[str, Any]) -> Dict[str, Any]:
+    return resource.get("properties") or {}
+
+
+def _ref(resource: Dict[str, Any], name: str) -> Optional[str]:
+    """Id of a {"id": ...} sub-resource reference inside properties"""
+    return _key((_props(resource).get(name) or {}).get("id"))
+
+
+@dataclass
+class NetworkSnapshot:
+    """Id-indexed network resources of one resource group with cross-references"""
+
+    resource_group: str
+    collections: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    subnets: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    subnet_vnet: Dict[str, str] = field(default_factory=dict)
+    subnet_nsg: Dict[str, str] = field(default_factory=dict)
+    subnet_route_table: Dict[str, str] = field(default_factory=dict)
+    nic_subnets: Dict[str, List[str]] = field(default_factory=dict)
+    nic_nsg: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    collected_ms: float = 0.0
+
+    @classmethod
+    def build(cls, resource_group: str, raw: Dict[str, List[Any]],
+              errors: Dict[str, str] = None) -> "NetworkSnapshot":
+        """Index raw collections by id and derive the cross-references"""
+        snapshot = cls(resource_group=resource_group, errors=dict(errors or {}))
+        for name in NETWORK_COLLECTIONS:
+            items = (to_arm_json(item) for item in raw.get(name, []))
+            snapshot.collections[name] = {_key(item["id"]): item for item in items if item.get("id")}
+
+        for vnet_id, vnet in snapshot.virtual_networks.items():
+            for subnet in _props(vnet).get("subnets") or []:
+                subnet_id = _key(subnet.get("id"))
+                if not subnet_id:
+                    continue
+                snapshot.subnets[subnet_id] = subnet
+                snapshot.subnet_vnet[subnet_id] = vnet_id
+                nsg_id = _ref(subnet, "networkSecurityGroup")
+                if nsg_id:
+                    snapshot.subnet_nsg[subnet_id] = nsg_id
+                route_table_id = _ref(subnet, "routeTable")
+                if route_table_id:
+                    snapshot.subnet_route_table[subnet_id] = route_table_id
+
+        for nic_id, nic in snapshot.network_interfaces.items():
+            subnet_ids = [_ref(ip_config, "subnet") for ip_config in _props(nic).get("ipConfigurations") or []]
+            snapshot.nic_subnets[nic_id] = [subnet_id for subnet_id in subnet_ids if subnet_id]
+            nsg_id = _ref(nic, "networkSecurityGroup")
+            if nsg_id:
+                snapshot.nic_nsg[nic_id] = nsg_id
+        return snapshot
+
+    @property
+    def network_security_groups(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("network_security_groups", {})
+
+    @property
+    def route_tables(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("route_tables", {})
+
+    @property
+    def virtual_networks(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("virtual_networks", {})
+
+    @property
+    def load_balancers(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("load_balancers", {})
+
+    @property
+    def application_gateways(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("application_gateways", {})
+
+    @property
+    def network_interfaces(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("network_interfaces", {})
+
+    @property
+    def public_ip_addresses(self) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get("public_ip_addresses", {})
+
+    def summary(self) -> Dict[str, int]:
+        """Object counts per collection"""
+        counts = {name: len(items) for name, items in self.collections.items()}
+        counts["subnets"] = len(self.subnets)
+        return counts
+
+
+def _issue(check: str, severity: str, resource_id: str, message: str) -> Dict[str, str]:
+    return {"check": check, "severity": severity, "resource_id": resource_id, "message": message}
+
+
+def check_orphaned_nsgs(snapshot: NetworkSnapshot) -> List[Dict[str, str]]:
+    """NSGs associated with no subnet and no NIC"""
+    used = set(snapshot.subnet_nsg.values()) | set(snapshot.nic_nsg.values())
+    issues = []
+    for nsg_id, nsg in snapshot.network_security_groups.items():
+        props = _props(nsg)
+        if nsg_id in used or props.get("subnets") or props.get("networkInterfaces"):
+            continue
+        issues.append(_issue("orphaned_nsg", "low", nsg["id"],
+                             f"NSG '{nsg.get('name')}' is not associated with any subnet or network interface"))
+    return issues
+
+
+def check_subnets_without_nsg(snapshot: NetworkSnapshot) -> List[Dict[str, str]]:
+    """Workload subnets that have no NSG"""
+    issues = []
+    for subnet_id, subnet in snapshot.subnets.items():
+        name = subnet.get("name") or subnet_id.rsplit("/", 1)[-1]
+        if subnet_id in snapshot.subnet_nsg or name.lower() in NSG_EXEMPT_SUBNETS:
+            continue
+        issues.append(_issue("subnet_without_nsg", "medium", subnet["id"],
+                             f"Subnet '{name}' has no network security group"))
+    return issues
+
+
+def check_empty_lb_backend_pools(snapshot: NetworkSnapshot) -> List[Dict[str, str]]:
+    """Load balancer backend pools with no members"""
+    issues = []
+    for lb in snapshot.load_balancers.values():
+        for pool in _props(lb).get("backendAddressPools") or []:
+            pool_props = _props(pool)
+            if pool_props.get("backendIPConfigurations") or pool_props.get("loadBalancerBackendAddresses"):
+                continue
+            issues.append(_issue("empty_lb_backend_pool", "high", pool.get("id") or lb["id"],
+                                 f"Backend pool '{pool.get('name')}' of load balancer '{lb.get('name')}' has no members"))
+    return issues
+
+
+def check_unassociated_route_tables(snapshot: NetworkSnapshot) -> List[Dict[str, str]]:
+    """Route tables attached to no subnet"""
+    used = set(snapshot.subnet_route_table.values())
+    issues = []
+    for route_table_id, route_table in snapshot.route_tables.items():
+        if route_table_id in used or _props(route_table).get("subnets"):
+            continue
+        issues.append(_issue("unassociated_route_table", "low", route_table["id"],
+                             f"Route table '{route_table.get('name')}' is not associated with any subnet"))
+    return issues
+
+
+def check_unattached_public_ips(snapshot: NetworkSnapshot) -> List[Dict[str, str]]:
+    """Public IPs not bound to any IP configuration"""
+    issues = []
+    for public_ip in snapshot.public_ip_addresses.values():
+        if _props(public_ip).get("ipConfiguration") or _props(public_ip).get("natGateway"):
+            continue
+        issues.append(_issue("unattached_public_ip", "low", public_ip["id"],
+                             f"Public IP '{public_ip.get('name')}' is not attached to any resource"))
+    return issues
+
+
+def check_dangling_references(snapshot: NetworkSnapshot) -> List[Dict[str, str]]:
+    """NICs pointing at subnets that are not in the snapshot (deleted or in another group)"""
+    issues = []
+    for nic_id, subnet_ids in snapshot.nic_subnets.items():
+        for subnet_id in subnet_ids:
+            if subnet_id not in snapshot.subnets:
+                nic = snapshot.network_interfaces[nic_id]
+                issues.append(_issue("nic_subnet_outside_group", "info", nic["id"],
+                                     f"NIC '{nic.get('name')}' uses subnet {subnet_id} outside this resource group"))
+    return issues
+
+
+NETWORK_CHECKS = [
+    check_orphaned_nsgs,
+    check_subnets_without_nsg,
+    check_empty_lb_backend_pools,
+    check_unassociated_route_tables,
+    check_unattached_public_ips,
+    check_dangling_references,
+]
+
+
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2, "info": 3}
+
+
+def analyze_network_snapshot(snapshot: NetworkSnapshot, max_issues: int = 200) -> Dict[str, Any]:
+    """Run every network check against a snapshot and build the issue report
+
+    Issues are ordered by severity and capped at max_issues; the counts always
+    cover every issue found.
+    """
+    started = time.perf_counter()
+    issues = []
+    for check in NETWORK_CHECKS:
+        try:
+            issues.extend(check(snapshot))
+        except Exception as e:
+            logger.error(f"Network check {check.__name__} failed: {e}")
+            snapshot.errors[check.__name__] = str(e)
+
+    severity_counts: Dict[str, int] = {}
+    for issue in issues:
+        severity_counts[issue["severity"]] = severity_counts.get(issue["severity"], 0) + 1
+    issues.sort(key=lambda issue: SEVERITY_ORDER.get(issue["severity"], len(SEVERITY_ORDER)))
+
+    return {
+        "resource_group": snapshot.resource_group,
+        "status": "issues_found" if issues else "ok",
+        "summary": snapshot.summary(),
+        "issue_count": len(issues),
+        "issues_by_severity": severity_counts,
+        "issues": issues[:max_issues],
+        "issues_truncated": len(issues) > max_issues,
+        "collection_errors": snapshot.errors,
+        "collected_ms": round(snapshot.collected_ms, 1),
+        "analyzed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def collect_network_snapshot(network_client, resource_group: str, max_workers: int = 8) -> NetworkSnapshot:
+    """Fetch every network collection of a group on a bounded thread pool"""
+    started = time.perf_counter()
+
+    def fetch(operation: str) -> List[Any]:
+        return list(getattr(network_client, operation).list(resource_group))
+
+    raw: Dict[str, List[Any]] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(fetch, operation) for name, operation in NETWORK_COLLECTIONS.items()}
+        for name, future in futures.items():
+            try:
+                raw[name] = future.result()
+            except Exception as e:
+                logger.error(f"Error listing {name} in {resource_group}: {e}")
+                errors[name] = str(e)
+
+    snapshot = NetworkSnapshot.build(resource_group, raw, errors)
+    snapshot.collected_ms = (time.perf_counter() - started) * 1000
+    return snapshot
+
+
+async def collect_network_snapshot_async(network_client, resource_group: str) -> NetworkSnapshot:
+    """Fetch every network collection of a group concurrently; the client's ARM scheduler bounds the requests"""
+    started = time.perf_counter()
+
+    async def fetch(operation: str) -> List[Any]:
+        return [item async for item in getattr(network_client, operation).list(resource_group)]
+
+    names = list(NETWORK_COLLECTIONS)
+    results = await asyncio.gather(
+        *(fetch(NETWORK_COLLECTIONS[name]) for name in names), return_exceptions=True
+    )
+
+    raw: Dict[str, List[Any]] = {}
+    errors: Dict[str, str] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Error listing {name} in {resource_group}: {result}")
+            errors[name] = str(result)
+        else:
+            raw[name] = result
+
+    snapshot = NetworkSnapshot.build(resource_group, raw, errors)
+    snapshot.collected_ms = (time.perf_counter() - started) * 1000
+    return snapshot
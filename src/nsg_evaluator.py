@@ -0,0 +1,303 @@
+"""
+NSG Evaluator Module
+
+Compiles NSG rules into NumPy arrays and evaluates batches of 5-tuple flows
+in one vectorized pass, returning the deciding rule for each flow.
+
+Addresses of both families live in one 128-bit space (IPv4 is IPv4-mapped
+IPv6) stored as (high, low) uint64 halves, so CIDRs become integer intervals.
+"""
+
+import ipaddress
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+import numpy as np
+
+from .network_snapshot import NetworkSnapshot
+
+logger = logging.getLogger(__name__)
+
+PROTOCOLS = {"*": -1, "tcp": 6, "udp": 17, "icmp": 1, "esp": 50, "ah": 51}
+DIRECTIONS = {"inbound": 0, "outbound": 1}
+ANY_ADDRESS = ("*", "any")
+MAX_ADDRESS = (1 << 128) - 1
+_IPV4_MAPPED = 0xFFFF << 32
+_LOW_MASK = (1 << 64) - 1
+
+# Flows are evaluated in batches to bound the (flows x intervals) match matrices
+FLOW_BATCH_SIZE = 4096
+
+# Never part of the Internet tag, whether or not a VNet uses them
+PRIVATE_RANGES = ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "100.64.0.0/10", "fc00::/7")
+
+
+class AddressResolver(Protocol):
+    """Expands service tags and application security groups into address prefixes"""
+
+    def resolve_tag(self, tag: str) -> Optional[List[str]]:
+        ...
+
+    def resolve_asg(self, asg_id: str) -> Optional[List[str]]:
+        ...
+
+
+class StaticResolver:
+    """Resolver backed by fixed tag and ASG tables"""
+
+    # Approximations of the platform tags that need no lookup
+    DEFAULT_TAGS = {
+        "azureloadbalancer": ["168.63.129.16/32"],
+    }
+
+    def __init__(self, tags: Dict[str, List[str]] = None, asgs: Dict[str, List[str]] = None):
+        self.tags = {**self.DEFAULT_TAGS, **{k.lower(): v for k, v in (tags or {}).items()}}
+        self.asgs = {k.lower(): v for k, v in (asgs or {}).items()}
+
+    def resolve_tag(self, tag: str) -> Optional[List[str]]:
+        tag = tag.lower()
+        if tag == "internet" and tag not in self.tags:
+            # Everything outside the VirtualNetwork and private ranges; unknown without the VNet address space
+            vnet_prefixes = self.tags.get("virtualnetwork")
+            return None if vnet_prefixes is None else outside_prefixes(list(vnet_prefixes) + list(PRIVATE_RANGES))
+        return self.tags.get(tag)
+
+    def resolve_asg(self, asg_id: str) -> Optional[List[str]]:
+        return self.asgs.get(asg_id.lower())
+
+
+class SnapshotResolver(StaticResolver):
+    """Resolves VirtualNetwork from the snapshot's VNet address spaces and ASGs from NIC membership"""
+
+    def __init__(self, snapshot: NetworkSnapshot, tags: Dict[str, List[str]] = None):
+        vnet_prefixes = []
+        for vnet in snapshot.virtual_networks.values():
+            vnet_prefixes.extend(((vnet.get("properties") or {}).get("addressSpace") or {}).get("addressPrefixes") or [])
+
+        asgs: Dict[str, List[str]] = {}
+        for nic in snapshot.network_interfaces.values():
+            for ip_config in (nic.get("properties") or {}).get("ipConfigurations") or []:
+                props = ip_config.get("properties") or {}
+                address = props.get("privateIPAddress")
+                if not address:
+                    continue
+                for asg in props.get("applicationSecurityGroups") or []:
+                    asgs.setdefault(asg["id"].lower(), []).append(address)
+
+        super().__init__(tags={"virtualnetwork": vnet_prefixes, **(tags or {})}, asgs=asgs)
+
+
+def outside_prefixes(prefixes: Iterable[str]) -> List[str]:
+    """CIDRs covering every address (of both families) that none of the given prefixes contains"""
+    # IPv4 addresses are matched IPv4-mapped, so the IPv4 half alone must decide for them
+    networks = {4: [], 6: [ipaddress.ip_network("::ffff:0:0/96")]}
+    for prefix in prefixes:
+        try:
+            network = ipaddress.ip_network(prefix.strip(), strict=False)
+        except ValueError:
+            continue
+        networks[network.version].append(network)
+
+    outside = []
+    for version, universe in ((4, ipaddress.ip_network("0.0.0.0/0")), (6, ipaddress.ip_network("::/0"))):
+        address_class = type(universe.network_address)
+        next_start = int(universe.network_address)
+        for network in ipaddress.collapse_addresses(networks[version]):
+            if int(network.network_address) > next_start:
+                gap = (address_class(next_start), address_class(int(network.network_address) - 1))
+                outside.extend(ipaddress.summarize_address_range(*gap))
+            next_start = max(next_start, int(network.broadcast_address) + 1)
+        if next_start <= int(universe.broadcast_address):
+            outside.extend(ipaddress.summarize_address_range(address_class(next_start), universe.broadcast_address))
+    return [str(network) for network in outside]
+
+
+def _address_value(address) -> int:
+    value = int(address)
+    return value + _IPV4_MAPPED if address.version == 4 else value
+
+
+def prefix_interval(prefix: str) -> Tuple[int, int]:
+    """Convert a CIDR prefix or bare address into an inclusive 128-bit interval"""
+    network = ipaddress.ip_network(prefix.strip(), strict=False)
+    return _address_value(network.network_address), _address_value(network.broadcast_address)
+
+
+def port_interval(port_range: str) -> Tuple[int, int]:
+    """Convert '*', '443' or '1000-2000' into an inclusive port interval"""
+    port_range = str(port_range).strip()
+    if port_range in ("*", ""):
+        return 0, 65535
+    if "-" in port_range:
+        low, high = port_range.split("-", 1)
+        return int(low), int(high)
+    return int(port_range), int(port_range)
+
+
+def _split(values: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+    values = list(values)
+    high = np.fromiter((value >> 64 for value in values), dtype=np.uint64, count=len(values))
+    low = np.fromiter((value & _LOW_MASK for value in values), dtype=np.uint64, count=len(values))
+    return high, low
+
+
+class _IntervalSet:
+    """Flattened per-rule intervals; rule i owns intervals offsets[i]:offsets[i+1]"""
+
+    def __init__(self, per_rule: List[List[Tuple[int, int]]], wide: bool):
+        self.wide = wide
+        flat = []
+        offsets = []
+        for intervals in per_rule:
+            offsets.append(len(flat))
+            # A rule with nothing resolvable gets an empty interval (low > high) and never matches
+            flat.extend(intervals or [(1, 0)])
+        self.offsets = np.array(offsets, dtype=np.intp)
+        if wide:
+            self.low_high, self.low_low = _split(low for low, _ in flat)
+            self.high_high, self.high_low = _split(high for _, high in flat)
+        else:
+            self.low = np.array([low for low, _ in flat], dtype=np.int64)
+            self.high = np.array([high for _, high in flat], dtype=np.int64)
+
+    def match(self, values) -> np.ndarray:
+        """Boolean (flows x rules): does any of the rule's intervals contain the flow value"""
+        if self.wide:
+            value_high, value_low = values
+            vh, vl = value_high[:, None], value_low[:, None]
+            above_low = (vh > self.low_high) | ((vh == self.low_high) & (vl >= self.low_low))
+            below_high = (vh < self.high_high) | ((vh == self.high_high) & (vl <= self.high_low))
+            hits = above_low & below_high
+        else:
+            column = values[:, None]
+            hits = (column >= self.low) & (column <= self.high)
+        return np.logical_or.reduceat(hits, self.offsets, axis=1)
+
+
+class CompiledNsg:
+    """An NSG's custom and default rules compiled into priority-ordered arrays"""
+
+    def __init__(self, nsg: Dict[str, Any], resolver: AddressResolver):
+        self.name = nsg.get("name")
+        self.id = nsg.get("id")
+        self.unresolved: set = set()
+        self._resolver = resolver
+
+        props = nsg.get("properties") or {}
+        rules = (props.get("securityRules") or []) + (props.get("defaultSecurityRules") or [])
+        rules = sorted(rules, key=lambda rule: (rule.get("properties") or {}).get("priority", 65000))
+        self.rule_names = [rule.get("name") for rule in rules]
+
+        props_list = [rule.get("properties") or {} for rule in rules]
+        self.priority = np.array([p.get("priority", 65000) for p in props_list], dtype=np.int32)
+        self.direction = np.array([DIRECTIONS.get(str(p.get("direction", "")).lower(), -2) for p in props_list], dtype=np.int8)
+        self.allow = np.array([str(p.get("access", "")).lower() == "allow" for p in props_list], dtype=bool)
+        self.protocol = np.array([PROTOCOLS.get(str(p.get("protocol", "*")).lower(), -2) for p in props_list], dtype=np.int16)
+
+        self.source = _IntervalSet([self._addresses(p, "source") for p in props_list], wide=True)
+        self.destination = _IntervalSet([self._addresses(p, "destination") for p in props_list], wide=True)
+        self.source_ports = _IntervalSet([self._ports(p, "source") for p in props_list], wide=False)
+        self.destination_ports = _IntervalSet([self._ports(p, "destination") for p in props_list], wide=False)
+
+    def _addresses(self, props: Dict[str, Any], side: str) -> List[Tuple[int, int]]:
+        prefixes = [props.get(f"{side}AddressPrefix")] + list(props.get(f"{side}AddressPrefixes") or [])
+        intervals = []
+        for prefix in filter(None, prefixes):
+            if prefix.lower() in ANY_ADDRESS:
+                intervals.append((0, MAX_ADDRESS))
+                continue
+            try:
+                intervals.append(prefix_interval(prefix))
+                continue
+            except ValueError:
+                pass
+            expanded = self._resolve(lambda resolver: resolver.resolve_tag(prefix), prefix)
+            intervals.extend(prefix_interval(p) for p in expanded)
+
+        for asg in props.get(f"{side}ApplicationSecurityGroups") or []:
+            expanded = self._resolve(lambda resolver: resolver.resolve_asg(asg["id"]), asg["id"])
+            intervals.extend(prefix_interval(p) for p in expanded)
+        return intervals
+
+    def _ports(self, props: Dict[str, Any], side: str) -> List[Tuple[int, int]]:
+        ranges = [props.get(f"{side}PortRange")] + list(props.get(f"{side}PortRanges") or [])
+        return [port_interval(port_range) for port_range in ranges if port_range not in (None, "")]
+
+    def _resolve(self, lookup, label: str) -> List[str]:
+        prefixes = lookup(self._resolver)
+        if prefixes is None:
+            self.unresolved.add(label)
+            return []
+        return prefixes
+
+    def evaluate(self, flows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the deciding rule for each flow, in input order"""
+        if not self.rule_names:
+            # No rules at all (not even defaults): nothing can match, and reduceat needs at least one rule
+            return [{"flow": index, "decision": "NoMatch", "rule": None, "priority": None}
+                    for index in range(len(flows))]
+        results = []
+        for start in range(0, len(flows), FLOW_BATCH_SIZE):
+            results.extend(self._evaluate_batch(flows[start:start + FLOW_BATCH_SIZE], start))
+        return results
+
+    def _evaluate_batch(self, flows: List[Dict[str, Any]], start: int = 0) -> List[Dict[str, Any]]:
+        """Evaluate one batch; start is the index of its first flow in the whole input"""
+        source = _split(_address_value(ipaddress.ip_address(f["source_ip"])) for f in flows)
+        destination = _split(_address_value(ipaddress.ip_address(f["destination_ip"])) for f in flows)
+        source_port = np.array([int(f.get("source_port", 0) or 0) for f in flows], dtype=np.int64)
+        destination_port = np.array([int(f.get("destination_port", 0) or 0) for f in flows], dtype=np.int64)
+        protocol = np.array([PROTOCOLS.get(str(f.get("protocol", "tcp")).lower(), -3) for f in flows], dtype=np.int16)
+        direction = np.array([DIRECTIONS.get(str(f.get("direction", "inbound")).lower(), -3) for f in flows], dtype=np.int8)
+
+        matches = (
+            (direction[:, None] == self.direction)
+            & ((self.protocol == -1) | (protocol[:, None] == self.protocol))
+            & self.destination_ports.match(destination_port)
+            & self.source_ports.match(source_port)
+            & self.destination.match(destination)
+            & self.source.match(source)
+        )
+
+        # Rules are priority ordered, so the first match along each row decides
+        matched = matches.any(axis=1)
+        first = matches.argmax(axis=1)
+        results = []
+        for index, (hit, rule_index) in enumerate(zip(matched, first), start):
+            if not hit:
+                results.append({"flow": index, "decision": "NoMatch", "rule": None, "priority": None})
+                continue
+            results.append({
+                "flow": index,
+                "decision": "Allow" if self.allow[rule_index] else "Deny",
+                "rule": self.rule_names[rule_index],
+                "priority": int(self.priority[rule_index]),
+            })
+        return results
+
+
+def compile_nsg(nsg: Dict[str, Any], resolver: AddressResolver) -> CompiledNsg:
+    """Compile an NSG (ARM REST JSON) using the given tag/ASG resolver"""
+    return CompiledNsg(nsg, resolver)
+
+
+def evaluate_flows(snapshot: NetworkSnapshot, nsg_name: str, flows: List[Dict[str, Any]],
+                   resolver: AddressResolver = None) -> Dict[str, Any]:
+    """Evaluate flows against a named NSG from a network snapshot"""
+    nsg = next((nsg for nsg in snapshot.network_security_groups.values()
+                if str(nsg.get("name", "")).lower() == nsg_name.lower()), None)
+    if nsg is None:
+        return {"error": f"NSG '{nsg_name}' not found in resource group {snapshot.resource_group}"}
+
+    compiled = compile_nsg(nsg, resolver or SnapshotResolver(snapshot))
+    results = compiled.evaluate(flows)
+    for result in results:
+        result["flow_input"] = flows[result["flow"]]
+    return {
+        "nsg": compiled.name,
+        "nsg_id": compiled.id,
+        "rule_count": len(compiled.rule_names),
+        "flow_count": len(flows),
+        "unresolved_tags": sorted(compiled.unresolved),
+        "results": results,
+    }
@@ -0,0 +1,85 @@
+"""
+Pagination Module
+
+Opaque cursors, field projection and compact JSON encoding for tools whose
+results can run to thousands of records. A cursor is base64url-encoded JSON
+naming the query it belongs to and where the next page starts; it is only
+valid for the same resource group and type filter.
+"""
+
+import base64
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .resource_records import resource_dicts
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used without it
+    orjson = None
+
+CURSOR_VERSION = 1
+MAX_PAGE_SIZE = 1000
+
+# Fields of a resource record that callers can project to
+RESOURCE_FIELDS = (
+    "id", "name", "type", "location", "kind", "sku",
+    "provisioning_state", "created_time", "changed_time",
+)
+# Only returned by ARM with $expand; the live path asks for it when these are projected
+EXPANDED_FIELDS = {"provisioning_state", "created_time", "changed_time"}
+
+
+class InvalidCursorError(ValueError):
+    """The cursor is malformed or belongs to a different query"""
+
+
+def encode_cursor(query: Dict[str, Any], position: Dict[str, Any]) -> str:
+    payload = {"v": CURSOR_VERSION, "q": query, "p": position}
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, query: Dict[str, Any]) -> Dict[str, Any]:
+    """The position stored in cursor, checked against the query it is resumed with"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if not isinstance(payload, dict) or payload.get("v") != CURSOR_VERSION or "p" not in payload:
+        raise InvalidCursorError("Malformed cursor")
+    if payload.get("q") != query:
+        raise InvalidCursorError("Cursor belongs to a different resource group or type filter")
+    return payload["p"]
+
+
+def clamp_page_size(page_size: int) -> int:
+    return max(1, min(MAX_PAGE_SIZE, int(page_size)))
+
+
+def validate_fields(fields: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """Deduplicated projection, or None for whole records"""
+    if not fields:
+        return None
+    unknown = [field for field in fields if field not in RESOURCE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(RESOURCE_FIELDS)}")
+    return list(dict.fromkeys(fields))
+
+
+def project(records: Iterable[Any], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Dicts of the records (ResourceRecords or dicts) holding only the given fields"""
+    if fields is None:
+        return resource_dicts(records)
+    return [{field: record[field] for field in fields if field in record} for record in records]
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"), default=str)
@@ -0,0 +1,156 @@
+"""
+Resource Records Module
+
+Compact in-memory form of resource listings. A ResourceRecord keeps its
+fields in slots instead of a dict; type, location, kind, SKU and provisioning
+state strings are interned, so a large inventory holds one copy of each, and
+the ARM id is split into an interned prefix shared by the resources of a
+resource group and provider, plus the rest of the id, which is only kept
+when it can't be rebuilt from the type and name. Timestamps are kept as
+integer microseconds. Records read like the dicts the tools return and are
+converted to them with to_dict() when they leave the server.
+"""
+
+import logging
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS_SEGMENT = "/providers/"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Fields of the dict form in output order; the first four are always present
+BASE_FIELDS = ("name", "type", "location", "id")
+OPTIONAL_FIELDS = ("kind", "sku", "created_time", "changed_time", "provisioning_state")
+
+Timestamp = Union[int, str, None]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _pack_time(value: Union[datetime, str, None]) -> Timestamp:
+    """An ISO timestamp as microseconds since the epoch, or the string itself if that wouldn't round-trip"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return (value - _EPOCH) // _MICROSECOND
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if moment.tzinfo is None:
+        return value
+    micros = (moment - _EPOCH) // _MICROSECOND
+    return micros if _unpack_time(micros) == value else value
+
+
+def _unpack_time(value: Timestamp) -> Optional[str]:
+    if isinstance(value, int):
+        return (_EPOCH + value * _MICROSECOND).isoformat()
+    return value
+
+
+class ResourceRecord:
+    """One resource of a listing, readable like its dict form (record["type"], record.get("sku"))"""
+
+    __slots__ = ("_prefix", "_rest", "name", "type", "location", "kind", "sku",
+                 "provisioning_state", "_created", "_changed")
+
+    def __init__(self, resource_id: str, name: str, resource_type: str, location: Optional[str] = None,
+                 kind: Optional[str] = None, sku: Optional[str] = None, provisioning_state: Optional[str] = None,
+                 created_time: Union[datetime, str, None] = None, changed_time: Union[datetime, str, None] = None):
+        cut = resource_id.find(PROVIDERS_SEGMENT)
+        if cut < 0:
+            self._prefix, self._rest = None, resource_id
+        else:
+            cut += len(PROVIDERS_SEGMENT)
+            self._prefix = sys.intern(resource_id[:cut])
+            rest = resource_id[cut:]
+            # Top-level resources end in "<type>/<name>"; only other ids keep their own tail
+            self._rest = None if rest == f"{resource_type}/{name}" else rest
+        self.name = name
+        self.type = _intern(resource_type)
+        self.location = _intern(location)
+        self.kind = _intern(kind) or None
+        self.sku = _intern(sku) or None
+        self.provisioning_state = _intern(provisioning_state) or None
+        self._created = _pack_time(created_time)
+        self._changed = _pack_time(changed_time)
+
+    @classmethod
+    def from_sdk(cls, resource) -> "ResourceRecord":
+        """From an SDK GenericResource (or GenericResourceExpanded, listed with $expand)"""
+        sku = getattr(resource, "sku", None)
+        if sku:
+            sku = sku.name if hasattr(sku, "name") else str(sku)
+        times = [getattr(resource, field, None) for field in ("created_time", "changed_time")]
+        return cls(
+            resource.id, resource.name, resource.type, resource.location,
+            kind=getattr(resource, "kind", None), sku=sku,
+            provisioning_state=getattr(resource, "provisioning_state", None),
+            created_time=times[0].astimezone(timezone.utc) if times[0] else None,
+            changed_time=times[1].astimezone(timezone.utc) if times[1] else None,
+        )
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "ResourceRecord":
+        """From the dict form, e.g. a record read back from the inventory store"""
+        return cls(
+            record["id"], record.get("name"), record.get("type"), record.get("location"),
+            kind=record.get("kind"), sku=record.get("sku"), provisioning_state=record.get("provisioning_state"),
+            created_time=record.get("created_time"), changed_time=record.get("changed_time"),
+        )
+
+    @property
+    def id(self) -> str:
+        if self._prefix is None:
+            return self._rest
+        return self._prefix + (self._rest if self._rest is not None else f"{self.type}/{self.name}")
+
+    @property
+    def created_time(self) -> Optional[str]:
+        return _unpack_time(self._created)
+
+    @property
+    def changed_time(self) -> Optional[str]:
+        return _unpack_time(self._changed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The dict shape returned by the tools; optional fields are only present when set"""
+        record = {"name": self.name, "type": self.type, "location": self.location, "id": self.id}
+        for field in OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                record[field] = value
+        return record
+
+    def __contains__(self, field: str) -> bool:
+        return field in BASE_FIELDS or (field in OPTIONAL_FIELDS and getattr(self, field) is not None)
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        return self[field] if field in self else default
+
+    def __repr__(self) -> str:
+        return f"ResourceRecord({self.to_dict()!r})"
+
+
+def resource_dicts(records: Iterable[Union[ResourceRecord, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Dict form of a listing; entries that are dicts already (e.g. decoded from the shared cache) pass through"""
+    return [record.to_dict() if isinstance(record, ResourceRecord) else record for record in records]
+
+
+def to_jsonable(value: Any) -> Any:
+    """json.dumps default hook for values that may contain records"""
+    if isinstance(value, ResourceRecord):
+        return value.to_dict()
+    return str(value)
@@ -0,0 +1,264 @@
+"""
+Route Trie Module
+
+Longest-prefix-match routing over binary tries, used to compute effective
+next hops for subnets from their system routes and route table (UDR) entries.
+
+Each trie is stored as flat NumPy arrays so a bulk lookup walks every query
+down the trie one bit level at a time instead of one query at a time.
+"""
+
+import ipaddress
+import logging
+import socket
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .network_snapshot import NetworkSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Address space that Azure routes to None unless a VNet or UDR claims it
+SYSTEM_NONE_PREFIXES = ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "100.64.0.0/10"]
+
+
+@dataclass
+class Route:
+    """One candidate route in an effective route table"""
+
+    prefix: str
+    next_hop_type: str
+    next_hop_ip: Optional[str] = None
+    source: str = "Default"
+    name: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "prefix": self.prefix,
+            "next_hop_type": self.next_hop_type,
+            "next_hop_ip": self.next_hop_ip,
+            "source": self.source,
+            "route_name": self.name,
+        }
+
+
+class RouteTrie:
+    """Binary trie over one address family (32 or 128 bits)"""
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self._left = [-1]
+        self._right = [-1]
+        self._value = [-1]
+        self._arrays = None
+
+    def insert(self, network_value: int, length: int, value: int):
+        """Store value at the node for prefix network_value/length; re-inserting overrides"""
+        node = 0
+        for depth in range(length):
+            bit = (network_value >> (self.bits - 1 - depth)) & 1
+            children = self._right if bit else self._left
+            if children[node] == -1:
+                children[node] = len(self._value)
+                self._left.append(-1)
+                self._right.append(-1)
+                self._value.append(-1)
+            node = children[node]
+        self._value[node] = value
+        self._arrays = None
+
+    def _compiled(self):
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self._left, dtype=np.int32),
+                np.array(self._right, dtype=np.int32),
+                np.array(self._value, dtype=np.int32),
+            )
+        return self._arrays
+
+    def lookup_many(self, addresses: List[int]) -> np.ndarray:
+        """Longest-prefix match for many addresses; returns stored values (-1 for no match)"""
+        left, right, values = self._compiled()
+        count = len(addresses)
+        high = np.fromiter(((a >> 64) & 0xFFFFFFFFFFFFFFFF for a in addresses), dtype=np.uint64, count=count)
+        low = np.fromiter((a & 0xFFFFFFFFFFFFFFFF for a in addresses), dtype=np.uint64, count=count)
+
+        node = np.zeros(count, dtype=np.int32)
+        best = np.full(count, values[0], dtype=np.int32)
+        active = np.ones(count, dtype=bool)
+        for depth in range(self.bits):
+            position = self.bits - 1 - depth
+            word, shift = (high, position - 64) if position >= 64 else (low, position)
+            bit = ((word >> np.uint64(shift)) & np.uint64(1)).astype(bool)
+            child = np.where(bit, right[node], left[node])
+            active &= child != -1
+            if not active.any():
+                break
+            node = np.where(active, child, node)
+            found = values[node]
+            best = np.where(active & (found != -1), found, best)
+        return best
+
+
+def _parse(prefix: str):
+    return ipaddress.ip_network(prefix.strip(), strict=False)
+
+
+def _address(destination: str) -> Tuple[int, int]:
+    """(version, integer value) of an address; inet_pton is far cheaper than ipaddress for bulk input"""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, destination), "big")
+    except OSError:
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, destination), "big")
+    except OSError:
+        # Let ipaddress produce the usual ValueError for anything that is not an address
+        address = ipaddress.ip_address(destination)
+        return address.version, int(address)
+
+
+class EffectiveRouteTable:
+    """System routes plus UDRs for one subnet, with bulk IPv4/IPv6 next-hop lookup"""
+
+    def __init__(self, routes: List[Route]):
+        self.routes: List[Route] = []
+        self.unresolved: List[str] = []
+        self._tries = {4: RouteTrie(32), 6: RouteTrie(128)}
+        for route in routes:
+            self.add(route)
+
+    def add(self, route: Route):
+        """Add a route; a later route for the same prefix wins (UDRs are added after system routes)"""
+        try:
+            network = _parse(route.prefix)
+        except ValueError:
+            # Service-tag UDR prefixes are not expanded here
+            self.unresolved.append(route.prefix)
+            return
+        self.routes.append(route)
+        self._tries[network.version].insert(int(network.network_address), network.prefixlen, len(self.routes) - 1)
+
+    def lookup_many(self, destinations: List[str]) -> List[Optional[Route]]:
+        """Effective route for each destination address, in input order"""
+        results: List[Optional[Route]] = [None] * len(destinations)
+        by_family: Dict[int, Tuple[List[int], List[int]]] = {4: ([], []), 6: ([], [])}
+        for index, destination in enumerate(destinations):
+            version, value = _address(destination.strip())
+            positions, values = by_family[version]
+            positions.append(index)
+            values.append(value)
+        for version, (positions, values) in by_family.items():
+            if not values:
+                continue
+            for position, route_index in zip(positions, self._tries[version].lookup_many(values).tolist()):
+                if route_index >= 0:
+                    results[position] = self.routes[route_index]
+        return results
+
+
+def _props(resource: Dict[str, Any]) -> Dict[str, Any]:
+    return resource.get("properties") or {}
+
+
+def system_routes(vnet: Dict[str, Any]) -> List[Route]:
+    """Azure default system routes for a VNet, including peered address spaces"""
+    routes = [Route(prefix, "None") for prefix in SYSTEM_NONE_PREFIXES]
+    routes.append(Route("0.0.0.0/0", "Internet"))
+    for peering in _props(vnet).get("virtualNetworkPeerings") or []:
+        remote = (_props(peering).get("remoteAddressSpace") or {}).get("addressPrefixes") or []
+        routes.extend(Route(prefix, "VNetPeering", name=peering.get("name")) for prefix in remote)
+    for prefix in (_props(vnet).get("addressSpace") or {}).get("addressPrefixes") or []:
+        routes.append(Route(prefix, "VnetLocal"))
+    return routes
+
+
+def user_routes(route_table: Dict[str, Any]) -> List[Route]:
+    """User-defined routes of a route table"""
+    return [
+        Route(
+            prefix=_props(route).get("addressPrefix", ""),
+            next_hop_type=_props(route).get("nextHopType", ""),
+            next_hop_ip=_props(route).get("nextHopIpAddress"),
+            source="User",
+            name=route.get("name"),
+        )
+        for route in _props(route_table).get("routes") or []
+    ]
+
+
+class EffectiveRouteResolver:
+    """Builds (and reuses) effective route tables for the subnets of a network snapshot"""
+
+    def __init__(self, snapshot: NetworkSnapshot):
+        self.snapshot = snapshot
+        # Subnets in the same VNet with the same route table share one compiled table
+        self._tables: Dict[Tuple[str, Optional[str]], EffectiveRouteTable] = {}
+
+    def find_subnet(self, subnet: str) -> Optional[str]:
+        """Resolve a subnet id, 'vnet/subnet' or unique subnet name to its snapshot key"""
+        key = subnet.lower().strip("/")
+        if f"/{key}" in self.snapshot.subnets:
+            return f"/{key}"
+        if "/" in key:
+            vnet_name, subnet_name = key.split("/", 1)
+            suffix = f"/virtualnetworks/{vnet_name}/subnets/{subnet_name}"
+        else:
+            suffix = f"/subnets/{key}"
+        matches = [subnet_id for subnet_id in self.snapshot.subnets if subnet_id.endswith(suffix)]
+        return matches[0] if len(matches) == 1 else None
+
+    @property
+    def unresolved_prefixes(self) -> List[str]:
+        return sorted({prefix for table in self._tables.values() for prefix in table.unresolved})
+
+    def table_for(self, subnet_id: str) -> EffectiveRouteTable:
+        vnet_id = self.snapshot.subnet_vnet[subnet_id]
+        route_table_id = self.snapshot.subnet_route_table.get(subnet_id)
+        key = (vnet_id, route_table_id)
+        table = self._tables.get(key)
+        if table is None:
+            routes = system_routes(self.snapshot.virtual_networks[vnet_id])
+            route_table = self.snapshot.route_tables.get(route_table_id) if route_table_id else None
+            if route_table:
+                routes.extend(user_routes(route_table))
+            table = EffectiveRouteTable(routes)
+            self._tables[key] = table
+        return table
+
+    def next_hops(self, queries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Next hop for each {"subnet", "destination"} query, grouped per table for bulk lookup"""
+        results: List[Dict[str, Any]] = [{} for _ in queries]
+        grouped: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            subnet_id = self.find_subnet(str(query.get("subnet", "")))
+            if subnet_id is None:
+                results[index] = {**query, "error": "Subnet not found or ambiguous in snapshot"}
+                continue
+            grouped.setdefault(subnet_id, []).append(index)
+
+        for subnet_id, indexes in grouped.items():
+            table = self.table_for(subnet_id)
+            destinations = [queries[index]["destination"] for index in indexes]
+            for index, route in zip(indexes, table.lookup_many(destinations)):
+                results[index] = {
+                    **queries[index],
+                    "subnet_id": self.snapshot.subnets[subnet_id].get("id"),
+                    **(route.as_dict() if route else {"next_hop_type": "None", "source": "NoRoute"}),
+                }
+        return results
+
+
+def compute_next_hops(snapshot: NetworkSnapshot, queries: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Effective next hop for a list of (subnet, destination) pairs"""
+    resolver = EffectiveRouteResolver(snapshot)
+    results = resolver.next_hops(queries)
+    return {
+        "resource_group": snapshot.resource_group,
+        "query_count": len(queries),
+        "route_tables_compiled": len(resolver._tables),
+        "unresolved_route_prefixes": resolver.unresolved_prefixes,
+        "results": results,
+    }
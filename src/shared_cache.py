@@ -0,0 +1,230 @@
+"""
+Shared Cache Module
+
+SQLite (WAL mode) store that lets the worker processes of a multi-worker
+server share inventory cache entries, and leases that make sure only one
+process at a time loads a missing entry, syncs the inventory store or asks
+the model about an error signature. The others wait for its result instead
+of repeating the same ARM or LLM calls.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import get_config
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# How often a process waiting on another's lease checks for the result
+LEASE_POLL_INTERVAL = 0.05
+# Renewals per lease term while its holder is still producing; a holder that dies stops renewing
+LEASE_RENEWALS_PER_TERM = 3
+
+
+def shared_key(key: Tuple) -> str:
+    return json.dumps(list(key), default=str)
+
+
+class SharedCache:
+    """Cross-process cache entries and leases in one SQLite database"""
+
+    def __init__(self, path: Path, lease_seconds: float = 60):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        # Callers in this process wanting the same lease share one attempt at it
+        self._flights = SingleFlight()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Writers in other processes hold the lock briefly; wait instead of failing
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL, stale_until REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL);"
+        )
+        self.reads = 0
+        self.value_reads = 0
+        self.writes = 0
+        self.leases_taken = 0
+        self.lease_waits = 0
+        self.results_from_other_processes = 0
+
+    def lookup(self, key: Tuple, known_stored_at: Optional[float] = None) -> Optional[Tuple]:
+        """(stored_at, expires_at, stale_until, value, encoded size) of an entry, or None
+
+        The value is only read and decoded when the entry is not the version
+        stored at known_stored_at (the caller's local copy); otherwise it is None.
+        """
+        with self._lock:
+            self.reads += 1
+            row = self._conn.execute(
+                "SELECT stored_at, expires_at, stale_until, CASE WHEN stored_at IS ? THEN NULL ELSE value END "
+                "FROM entries WHERE key = ?", (known_stored_at, shared_key(key))
+            ).fetchone()
+        if row is None:
+            return None
+        stored_at, expires_at, stale_until, text = row
+        if text is None:
+            return stored_at, expires_at, stale_until, None, 0
+        self.value_reads += 1
+        return stored_at, expires_at, stale_until, json.loads(text), len(text)
+
+    def put(self, key: Tuple, text: str, stored_at: float, expires_at: float, stale_until: float):
+        """Store an entry already encoded as JSON text"""
+        with self._lock:
+            self.writes += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at, stale_until) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (shared_key(key), text, stored_at, expires_at, stale_until)
+            )
+
+    def invalidate(self, prefix: Tuple) -> int:
+        """Drop every entry whose key starts with prefix"""
+        exact = shared_key(prefix)
+        # JSON of a longer key starts with the prefix's JSON minus its closing bracket, then a comma
+        start = exact[:-1] + ","
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE key = ? OR substr(key, 1, ?) = ?", (exact, len(start), start)
+            )
+            self._conn.execute("DELETE FROM entries WHERE stale_until < ?", (time.time(),))
+        return cursor.rowcount
+
+    def try_lease(self, name: str, holder: str, seconds: float = None) -> bool:
+        """Take the named lease for holder unless someone else holds an unexpired one"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at < ?",
+                (name, holder, now + (seconds or self.lease_seconds), now)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, name: str, holder: str, seconds: float = None) -> bool:
+        """Extend a lease holder holds; False if it was lost to someone else"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND holder = ?",
+                (time.time() + (seconds or self.lease_seconds), name, holder)
+            )
+        return cursor.rowcount == 1
+
+    async def _heartbeat(self, name: str, holder: str, seconds: float):
+        """Keep renewing a lease until cancelled, so long syncs and LLM calls aren't taken over"""
+        while True:
+            await asyncio.sleep(seconds / LEASE_RENEWALS_PER_TERM)
+            try:
+                if not await asyncio.to_thread(self.renew, name, holder, seconds):
+                    logger.warning(f"Lost lease {name} while still producing its result")
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"Renewing lease {name} failed: {e}")
+
+    def release(self, name: str, holder: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    async def run_once(self, name: str, ready: Callable[[], Awaitable[Any]], produce: Callable[[], Awaitable[Any]],
+                       seconds: float = None) -> Any:
+        """produce() under the named lease, or the result another process produced
+
+        ready() resolves to the result once some process has produced it (None
+        until then). Lease reads and writes run in a thread: with several
+        workers contending for the database they can wait on its busy timeout. A process that can't take the lease polls ready() until
+        the holder finishes, or takes the lease over once it expires. The
+        holder renews the lease while produce() runs, so it only expires when
+        the holder stops (e.g. its process died). Concurrent calls for the same
+        name in this process join one attempt, so only it contends for the lease.
+        """
+        return await self._flights.run(("run_once", name), lambda: self._run_once(name, ready, produce, seconds))
+
+    async def _run_once(self, name: str, ready: Callable[[], Awaitable[Any]], produce: Callable[[], Awaitable[Any]],
+                        seconds: float = None) -> Any:
+        # Every attempt holds the lease under its own token, so no other caller can renew or release it
+        holder = uuid.uuid4().hex
+        waited = False
+        while True:
+            if await asyncio.to_thread(self.try_lease, name, holder, seconds):
+                try:
+                    # The previous holder may have finished between our check and taking the lease
+                    result = await ready() if waited else None
+                    if result is not None:
+                        self.results_from_other_processes += 1
+                        return result
+                    self.leases_taken += 1
+                    heartbeat = asyncio.create_task(self._heartbeat(name, holder, seconds or self.lease_seconds))
+                    try:
+                        return await produce()
+                    finally:
+                        heartbeat.cancel()
+                finally:
+                    await asyncio.to_thread(self.release, name, holder)
+            if not waited:
+                waited = True
+                self.lease_waits += 1
+            await asyncio.sleep(LEASE_POLL_INTERVAL)
+            result = await ready()
+            if result is not None:
+                self.results_from_other_processes += 1
+                return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and this process's reads, writes and lease counters"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "reads": self.reads,
+            "value_reads": self.value_reads,
+            "writes": self.writes,
+            "leases_taken": self.leases_taken,
+            "lease_waits": self.lease_waits,
+            "results_from_other_processes": self.results_from_other_processes,
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Get the process's handle on the shared cache, or None when it is disabled"""
+    global _shared_cache
+    config = get_config()
+    if not config.shared_cache_enabled:
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedCache(config.shared_cache_path, lease_seconds=config.shared_cache_lease)
+    return _shared_cache
+
+
+def close_shared_cache():
+    """Close the shared cache handle if it was ever opened"""
+    global _shared_cache
+    if _shared_cache is not None:
+        _shared_cache.close()
+        _shared_cache = None
@@ -0,0 +1,71 @@
+"""
+Single-Flight Module
+
+Coalesces concurrent identical calls so they share one in-flight execution.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One in-flight execution and the number of callers awaiting it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key; results are never cached past completion
+
+    Every caller awaiting a flight gets its result or exception. A caller that is
+    cancelled stops waiting without affecting the others; the shared execution is
+    only cancelled once every caller has gone away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions: Counter = Counter()
+        self.coalesced: Counter = Counter()
+
+    async def run(self, key: Tuple, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() for key, or join the execution already in flight for it"""
+        name = key[0]
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executions[name] += 1
+        else:
+            self.coalesced[name] += 1
+            logger.debug(f"Coalescing call {key} onto in-flight execution")
+
+        flight.waiters += 1
+        try:
+            # shield: one caller's cancellation must not cancel the shared execution
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Forget it now rather than in the done callback, so new callers start a fresh execution
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Tuple, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return executions and coalesced caller counts per call name"""
+        return {
+            "in_flight": len(self._flights),
+            "executions": dict(self.executions),
+            "coalesced_callers": dict(self.coalesced),
+            "total_coalesced": sum(self.coalesced.values()),
+        }
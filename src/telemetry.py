@@ -0,0 +1,288 @@
+"""
+Telemetry Module
+
+Spans around MCP tools, Azure management calls, access-token acquisition and
+LLM calls, aggregated into latency histograms, in-flight gauges and counters
+that /metrics serves in the Prometheus text format. Spans are also emitted
+through the OpenTelemetry API when it is installed, so a host that configures
+an OpenTelemetry SDK receives them as traces.
+
+Disabled (the default), span() hands back one shared no-op span.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Numeric span attributes that add up into the enclosing spans and hero_<attribute>_total counters
+COUNTED_ATTRIBUTES = ("pages", "items", "prompt_tokens", "completion_tokens")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("telemetry_span", default=None)
+
+
+class Span:
+    """One timed operation; kind is tool, azure, arm, token or llm"""
+
+    __slots__ = ("telemetry", "kind", "name", "attributes", "parent", "started", "_otel_span")
+
+    def __init__(self, telemetry: "Telemetry", kind: str, name: str, attributes: Dict[str, Any],
+                 parent: Optional["Span"]):
+        self.telemetry = telemetry
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.started = time.perf_counter()
+        self._otel_span = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float):
+        """Add to a numeric attribute here and, for counted attributes, in every enclosing span"""
+        span = self
+        while span is not None:
+            span.attributes[key] = span.attributes.get(key, 0) + amount
+            if key not in COUNTED_ATTRIBUTES:
+                break
+            span = span.parent
+
+    def end(self, status: str = "ok"):
+        self.telemetry.finish(self, status)
+
+
+class _NoopSpan:
+    """Stand-in for Span (and its context manager) while telemetry is disabled"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add(self, key: str, amount: float):
+        pass
+
+    def end(self, status: str = "ok"):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _is_error(status: str) -> bool:
+    """Span statuses are ok, error, cancelled or, for ARM requests, the HTTP status code"""
+    return status == "error" or (status.isdigit() and int(status) >= 400)
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Telemetry:
+    """Span recorder and in-process metrics registry"""
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (kind, name, status) -> bucket counts, with the sum and count in the last two slots
+        self._durations: Dict[Tuple[str, str, str], List[float]] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._counters: Dict[Tuple[str, str, str], float] = {}
+        self.spans = 0
+        self._tracer = None
+        if enabled:
+            try:
+                from opentelemetry import trace
+                self._tracer = trace.get_tracer(__name__)
+            except ImportError:
+                logger.info("opentelemetry-api is not installed; spans are only aggregated into metrics")
+
+    def start_span(self, kind: str, name: str, **attributes: Any) -> Span:
+        """Start a span under the current one; the caller must end() it"""
+        span = Span(self, kind, name, attributes, _current_span.get())
+        with self._lock:
+            key = (kind, name)
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        if self._tracer is not None:
+            span._otel_span = self._tracer.start_span(f"{kind} {name}", attributes=attributes)
+        return span
+
+    def finish(self, span: Span, status: str):
+        elapsed = time.perf_counter() - span.started
+        # Enclosing spans see how much of their time went to each kind of call
+        if span.parent is not None and span.parent.kind != span.kind:
+            span.parent.add(f"{span.kind}_ms", round(elapsed * 1000, 3))
+            span.parent.add(f"{span.kind}_calls", 1)
+
+        with self._lock:
+            self.spans += 1
+            key = (span.kind, span.name)
+            self._in_flight[key] -= 1
+            durations = self._durations.get((span.kind, span.name, status))
+            if durations is None:
+                durations = self._durations[(span.kind, span.name, status)] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if elapsed <= bound:
+                    durations[index] += 1
+                    break
+            durations[-2] += elapsed
+            durations[-1] += 1
+            for attribute in COUNTED_ATTRIBUTES:
+                if attribute in span.attributes:
+                    counter = (attribute, span.kind, span.name)
+                    self._counters[counter] = self._counters.get(counter, 0) + span.attributes[attribute]
+
+        otel_span = span._otel_span
+        if otel_span is not None:
+            from opentelemetry.trace import Status, StatusCode
+            otel_span.set_attributes(span.attributes)
+            if _is_error(status):
+                otel_span.set_status(Status(StatusCode.ERROR, status))
+            otel_span.end()
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the block as a span that nested spans attach to"""
+        span = self.start_span(kind, name, **attributes)
+        token = _current_span.set(span)
+        otel_token = None
+        if span._otel_span is not None:
+            from opentelemetry import context, trace
+            otel_token = context.attach(trace.set_span_in_context(span._otel_span))
+        status = "ok"
+        try:
+            yield span
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if otel_token is not None:
+                from opentelemetry import context
+                context.detach(otel_token)
+            _current_span.reset(token)
+            span.end(status)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            durations = {key: list(values) for key, values in self._durations.items()}
+            in_flight = dict(self._in_flight)
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP hero_span_duration_seconds Latency of MCP tools, Azure, ARM, token and LLM calls",
+            "# TYPE hero_span_duration_seconds histogram",
+        ]
+        for (kind, name, status), values in sorted(durations.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"hero_span_duration_seconds_bucket"
+                             f"{_labels(kind=kind, name=name, status=status, le=bound)} {cumulative}")
+            lines.append(f"hero_span_duration_seconds_bucket"
+                         f"{_labels(kind=kind, name=name, status=status, le='+Inf')} {int(values[-1])}")
+            lines.append(f"hero_span_duration_seconds_sum{_labels(kind=kind, name=name, status=status)} {values[-2]}")
+            lines.append(f"hero_span_duration_seconds_count{_labels(kind=kind, name=name, status=status)} {int(values[-1])}")
+
+        lines += ["# HELP hero_in_flight Calls currently running", "# TYPE hero_in_flight gauge"]
+        for (kind, name), count in sorted(in_flight.items()):
+            lines.append(f"hero_in_flight{_labels(kind=kind, name=name)} {count}")
+
+        for attribute in COUNTED_ATTRIBUTES:
+            lines += [f"# HELP hero_{attribute}_total {attribute.replace('_', ' ').capitalize()} seen by the span",
+                      f"# TYPE hero_{attribute}_total counter"]
+            for (counted, kind, name), value in sorted(counters.items()):
+                if counted == attribute:
+                    lines.append(f"hero_{attribute}_total{_labels(kind=kind, name=name)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def stats(self) -> Dict[str, Any]:
+        """Return whether telemetry is on and how much it recorded"""
+        return {
+            "enabled": self.enabled,
+            "opentelemetry": self._tracer is not None,
+            "spans_recorded": self.spans,
+            "in_flight": sum(self._in_flight.values()),
+        }
+
+
+_telemetry: Optional[Telemetry] = None
+
+
+def get_telemetry() -> Telemetry:
+    """Get the global telemetry recorder, configured on first use"""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry(enabled=get_config().telemetry_enabled)
+    return _telemetry
+
+
+def span(kind: str, name: str, **attributes: Any):
+    """Context manager timing a block as a span (a no-op while telemetry is disabled)"""
+    telemetry = get_telemetry()
+    if not telemetry.enabled:
+        return NOOP_SPAN
+    return telemetry.span(kind, name, **attributes)
+
+
+def start_span(kind: str, name: str, **attributes: Any):
+    """Start a span that is ended explicitly, for callbacks that can't wrap a block"""
+    telemetry = get_telemetry()
+    if not telemetry.enabled:
+        return NOOP_SPAN
+    return telemetry.start_span(kind, name, **attributes)
+
+
+def current_span():
+    """The innermost active span, or the no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(kind: str, name: str = None) -> Callable[[Callable], Callable]:
+    """Decorator recording every call of a function or coroutine function as a span"""
+    def decorator(function: Callable) -> Callable:
+        span_name = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, span_name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(kind, span_name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
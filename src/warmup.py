@@ -0,0 +1,181 @@
+"""
+Startup Warmup Module
+
+Background warmup that runs while the server already accepts connections:
+the lazily imported dependencies, the ARM access token and management
+clients, the troubleshooting agent with its compiled prompt functions and an
+open LLM connection, and a prefetch of the resource group list and of
+configured hot resource groups. Every step's state is recorded, so the
+readiness endpoint can report what is warm.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from .arm_scheduler import background_priority
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Scope the management clients request tokens for; warming it fills the shared token cache
+ARM_SCOPE = "https://management.azure.com/.default"
+
+
+def import_modules(names: Iterable[str]) -> Dict[str, float]:
+    """Import modules one by one, returning the milliseconds each took"""
+    timings = {}
+    for name in names:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Warmup could not import {name}: {e}")
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+class StartupWarmup:
+    """State of the warmup steps; a step that fails leaves its work to the first call that needs it"""
+
+    def __init__(self, enabled: bool = True):
+        self.state = "not_started" if enabled else "disabled"
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+
+    async def step(self, name: str, work: Callable[[], Awaitable[Any]]) -> bool:
+        """Run one step, recording its outcome; returns whether it succeeded"""
+        self.steps[name] = {"state": "running"}
+        started = time.perf_counter()
+        try:
+            detail = await work()
+        except Exception as e:
+            logger.warning(f"Warmup step {name} failed: {e}")
+            self.steps[name] = {"state": "failed", "error": str(e)}
+            return False
+        finally:
+            self.steps[name]["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.steps[name]["state"] = "done"
+        if detail is not None:
+            self.steps[name]["detail"] = detail
+        return True
+
+    def skip(self, name: str, reason: str):
+        self.steps[name] = {"state": "skipped", "reason": reason}
+
+    @property
+    def ready(self) -> bool:
+        """Whether warmup has finished (or is disabled); failed steps don't hold readiness back"""
+        return self.state in ("done", "disabled")
+
+    def status(self) -> Dict[str, Any]:
+        """Overall state plus the state and duration of every step"""
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "duration_ms": self.duration_ms,
+            "warm": sorted(name for name, step in self.steps.items() if step["state"] == "done"),
+            "steps": self.steps,
+        }
+
+    async def run(self, modules: Iterable[str]):
+        """Warm everything up; the Azure and LLM sides run concurrently once the imports are done"""
+        self.state = "running"
+        self.started = time.perf_counter()
+        await self.step("imports", lambda: asyncio.to_thread(import_modules, modules))
+        for result in await asyncio.gather(self._warm_azure(), self._warm_llm(), return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.warning(f"Warmup stopped early: {result}")
+        self.duration_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        self.state = "done"
+        logger.info(f"Background warmup finished in {self.duration_ms} ms")
+
+    async def _warm_azure(self):
+        from .azure_clients import get_client_pool
+        from .azure_manager import AsyncAzureManager
+
+        config = get_config()
+        if not config.azure_subscription_id:
+            for name in ("azure_token", "azure_clients", "inventory"):
+                self.skip(name, "Azure subscription ID not configured")
+            return
+
+        pool = get_client_pool()
+        # "all" is resolved per call by listing subscriptions, so only explicit ids are warmed
+        subscription_ids = [subscription_id for subscription_id in dict.fromkeys(
+            [config.azure_subscription_id, *(config.azure_subscription_ids or [])]
+        ) if subscription_id != "all"]
+
+        async def token():
+            access_token = await pool.async_credential.get_token(ARM_SCOPE)
+            return {"expires_in_s": round(access_token.expires_on - time.time())}
+
+        async def clients():
+            for subscription_id in subscription_ids:
+                pool.get_async(subscription_id)
+            return {"subscriptions": len(subscription_ids)}
+
+        if not await self.step("azure_token", token):
+            self.skip("azure_clients", "no access token")
+            self.skip("inventory", "no access token")
+            return
+        await self.step("azure_clients", clients)
+
+        manager = AsyncAzureManager(config.azure_subscription_id)
+
+        async def inventory():
+            return {"resource_groups": len(await manager.list_resource_groups())}
+
+        def resource_group(name: str):
+            async def prefetch():
+                # The listing lands in the inventory cache; the network read warms the network client
+                resources, network = await manager.gather(
+                    manager.list_resources_in_group(name), manager.get_network_issues(name)
+                )
+                for result in (resources, network):
+                    if "error" in result:
+                        raise RuntimeError(result["error"])
+                return {"resources": resources["resource_count"]}
+            return prefetch
+
+        # Calls that arrive meanwhile are admitted to ARM ahead of the prefetch
+        with background_priority():
+            await self.step("inventory", inventory)
+            await asyncio.gather(*(self.step(f"resource_group:{name}", resource_group(name))
+                                   for name in config.warmup_resource_groups))
+
+    async def _warm_llm(self):
+        from .ai_agent import get_troubleshooting_agent
+
+        config = get_config()
+        if not config.openai_api_key:
+            for name in ("llm_agent", "llm_connection"):
+                self.skip(name, "OpenAI API key not configured")
+            return
+
+        agent = None
+
+        async def build():
+            nonlocal agent
+            # Semantic Kernel setup and prompt compilation are synchronous; keep them off the event loop
+            agent = await asyncio.to_thread(get_troubleshooting_agent, config.openai_api_key, config.openai_model)
+            return {"prompt_functions": agent.compiled_prompt_functions()}
+
+        async def connect():
+            return {"http_version": await agent.open_connection()}
+
+        if await self.step("llm_agent", build):
+            await self.step("llm_connection", connect)
+        else:
+            self.skip("llm_connection", "no agent")
+
+
+_startup_warmup = StartupWarmup(enabled=get_config().startup_warmup)
+
+
+def get_startup_warmup() -> StartupWarmup:
+    """Get the process's warmup state"""
+    return _startup_warmup
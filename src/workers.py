@@ -0,0 +1,309 @@
+"""
+Worker Supervisor Module
+
+Multi-process mode for the MCP server. The supervisor owns the listening
+port and runs N worker processes, each serving the streamable-http app on a
+private unix socket. Requests are proxied to a worker with MCP session
+affinity: a session stays on the worker that created it, new sessions go to
+the least busy worker. Dead workers are restarted. Workers share inventory
+cache entries, the inventory store and LLM results through SQLite files
+(see shared_cache), so adding workers doesn't multiply ARM and model traffic.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+WORKER_INDEX_ENV = "MCP_WORKER_INDEX"
+SESSION_HEADER = "mcp-session-id"
+# Sessions remembered for routing; the oldest are forgotten first
+MAX_TRACKED_SESSIONS = 100_000
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade",
+}
+
+WorkerTarget = Callable[[int, str], None]
+
+
+def worker_index() -> Optional[int]:
+    """Index of this worker process, or None outside a multi-worker server"""
+    value = os.getenv(WORKER_INDEX_ENV)
+    return int(value) if value is not None else None
+
+
+def serve_worker(index: int, socket_path: str):
+    """Worker process entry point: the streamable-http app on a unix socket"""
+    import uvicorn
+    from .config import get_config
+    from .mcp_server import build_http_app, mcp_server
+
+    logging.basicConfig(
+        level=getattr(logging, get_config().log_level.upper(), logging.INFO),
+        format=f"%(asctime)s - worker {index} - %(name)s - %(levelname)s - %(message)s",
+        force=True
+    )
+    uvicorn.run(build_http_app(), uds=socket_path, log_level=mcp_server.settings.log_level.lower())
+
+
+def merge_metrics(texts: List[str]) -> str:
+    """Combine workers' Prometheus output, labelling each sample with its worker"""
+    lines: List[str] = []
+    described = set()
+    for index, text in enumerate(texts):
+        label = f'worker="{index}"'
+        for line in text.splitlines():
+            if line.startswith("#"):
+                if line not in described:
+                    described.add(line)
+                    lines.append(line)
+            elif "{" in line:
+                lines.append(line.replace("{", "{" + label + ",", 1))
+            elif line:
+                name, value = line.split(" ", 1)
+                lines.append(f"{name}{{{label}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _Worker:
+    """One worker process and the client proxying to its socket"""
+
+    def __init__(self, index: int, socket_path: str):
+        self.index = index
+        self.socket_path = socket_path
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(uds=socket_path), base_url="http://worker", timeout=None
+        )
+        self.in_flight = 0
+        self.requests = 0
+        self.restarts = 0
+        self.ready = False
+
+
+class WorkerSupervisor:
+    """ASGI app that runs the worker processes and proxies requests to them"""
+
+    def __init__(self, workers: int, target: WorkerTarget = serve_worker, ready_timeout: float = 60):
+        self.target = target
+        self.ready_timeout = ready_timeout
+        self.socket_dir = tempfile.mkdtemp(prefix="hero-mcp-")
+        self.workers = [_Worker(index, os.path.join(self.socket_dir, f"worker-{index}.sock"))
+                        for index in range(workers)]
+        self.sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._next = itertools.count()
+        self._context = multiprocessing.get_context("spawn")
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _spawn(self, worker: _Worker):
+        if os.path.exists(worker.socket_path):
+            os.remove(worker.socket_path)
+        # Spawned children read their configuration from the environment at import
+        os.environ[WORKER_INDEX_ENV] = str(worker.index)
+        os.environ.setdefault("SHARED_CACHE_ENABLED", "true")
+        worker.ready = False
+        worker.process = self._context.Process(
+            target=self.target, args=(worker.index, worker.socket_path), name=f"mcp-worker-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+
+    async def _wait_ready(self, worker: _Worker):
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if not worker.process.is_alive():
+                raise RuntimeError(f"Worker {worker.index} exited with code {worker.process.exitcode}")
+            if os.path.exists(worker.socket_path):
+                try:
+                    await worker.client.get("/")
+                    worker.ready = True
+                    return
+                except httpx.TransportError:
+                    pass
+            await asyncio.sleep(0.1)
+        raise TimeoutError(f"Worker {worker.index} did not start within {self.ready_timeout}s")
+
+    async def start(self):
+        """Start every worker and wait until all of them accept requests"""
+        for worker in self.workers:
+            self._spawn(worker)
+        await asyncio.gather(*(self._wait_ready(worker) for worker in self.workers))
+        self._monitor = asyncio.create_task(self._watch())
+        logger.info(f"{len(self.workers)} MCP workers ready")
+
+    async def _watch(self):
+        """Restart workers that die; their sessions are gone and clients start new ones"""
+        while not self._stopping:
+            await asyncio.sleep(1)
+            for worker in self.workers:
+                if self._stopping or worker.process.is_alive():
+                    continue
+                logger.warning(f"Worker {worker.index} exited with code {worker.process.exitcode}, restarting")
+                for session_id in [key for key, index in self.sessions.items() if index == worker.index]:
+                    del self.sessions[session_id]
+                worker.restarts += 1
+                self._spawn(worker)
+                try:
+                    await self._wait_ready(worker)
+                except Exception as e:
+                    logger.error(f"Restarting worker {worker.index} failed: {e}")
+
+    async def stop(self):
+        """Stop the workers (gracefully, then forcibly) and remove their sockets"""
+        self._stopping = True
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                await asyncio.to_thread(worker.process.join, 10)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            await worker.client.aclose()
+        shutil.rmtree(self.socket_dir, ignore_errors=True)
+
+    def _route(self, session_id: Optional[str]) -> _Worker:
+        if session_id is not None:
+            index = self.sessions.get(session_id)
+            if index is None:
+                # Not created through this supervisor; any stable choice will do
+                index = zlib.crc32(session_id.encode("utf-8")) % len(self.workers)
+            return self.workers[index]
+        ready = [worker for worker in self.workers if worker.ready] or self.workers
+        least = min(worker.in_flight for worker in ready)
+        candidates = [worker for worker in ready if worker.in_flight == least]
+        return candidates[next(self._next) % len(candidates)]
+
+    def _remember(self, session_id: str, worker: _Worker):
+        self.sessions[session_id] = worker.index
+        if len(self.sessions) > MAX_TRACKED_SESSIONS:
+            self.sessions.popitem(last=False)
+
+    async def _proxy(self, request: Request) -> Response:
+        session_id = request.headers.get(SESSION_HEADER)
+        worker = self._route(session_id)
+        headers = [(name, value) for name, value in request.headers.raw
+                   if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS]
+        upstream = worker.client.build_request(
+            request.method, request.url.path, params=request.url.query or None,
+            headers=headers, content=await request.body()
+        )
+        worker.in_flight += 1
+        worker.requests += 1
+        try:
+            response = await worker.client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            worker.in_flight -= 1
+            logger.warning(f"Worker {worker.index} unavailable: {e}")
+            return PlainTextResponse("MCP worker unavailable\n", status_code=503, headers={"Retry-After": "1"})
+
+        created = response.headers.get(SESSION_HEADER)
+        if created and created != session_id:
+            self._remember(created, worker)
+        if request.method == "DELETE" and session_id:
+            self.sessions.pop(session_id, None)
+
+        async def body():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                await response.aclose()
+                worker.in_flight -= 1
+
+        return StreamingResponse(
+            body(), status_code=response.status_code,
+            headers={name: value for name, value in response.headers.items()
+                     if name.lower() not in HOP_BY_HOP_HEADERS}
+        )
+
+    async def _metrics(self) -> Response:
+        responses = await asyncio.gather(*(worker.client.get("/metrics") for worker in self.workers),
+                                         return_exceptions=True)
+        texts = [response.text for response in responses
+                 if isinstance(response, httpx.Response) and response.status_code == 200]
+        if not texts:
+            return PlainTextResponse("Telemetry is disabled; set TELEMETRY_ENABLED=true\n", status_code=404)
+        from .telemetry import PROMETHEUS_CONTENT_TYPE
+        return PlainTextResponse(merge_metrics(texts), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    async def _ready(self) -> Response:
+        """Ready once every worker has finished its startup warmup"""
+        responses = await asyncio.gather(*(worker.client.get("/ready") for worker in self.workers),
+                                         return_exceptions=True)
+        statuses = [response.json() if isinstance(response, httpx.Response) else {"ready": False,
+                    "error": str(response)} for response in responses]
+        ready = all(status.get("ready") for status in statuses)
+        return JSONResponse({"ready": ready, "workers": statuses}, status_code=200 if ready else 503)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-worker load, restarts and the number of routed sessions"""
+        return {
+            "workers": [
+                {"index": worker.index, "pid": worker.process.pid if worker.process else None,
+                 "alive": bool(worker.process and worker.process.is_alive()), "in_flight": worker.in_flight,
+                 "requests": worker.requests, "restarts": worker.restarts,
+                 "sessions": sum(1 for index in self.sessions.values() if index == worker.index)}
+                for worker in self.workers
+            ],
+            "sessions": len(self.sessions),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        request = Request(scope, receive)
+        if request.url.path == "/metrics" and request.method == "GET":
+            response = await self._metrics()
+        elif request.url.path == "/ready" and request.method == "GET":
+            response = await self._ready()
+        elif request.url.path == "/workers" and request.method == "GET":
+            response = JSONResponse(self.stats())
+        else:
+            response = await self._proxy(request)
+        await response(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.start()
+                except Exception as e:
+                    logger.error(f"Starting MCP workers failed: {e}")
+                    await self.stop()
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def serve_workers(workers: int, host: str, port: int, log_level: str = "info",
+                        target: WorkerTarget = serve_worker):
+    """Serve the MCP app from several worker processes behind one port"""
+    import uvicorn
+
+    supervisor = WorkerSupervisor(workers, target=target)
+    server = uvicorn.Server(uvicorn.Config(supervisor, host=host, port=port, log_level=log_level, lifespan="on"))
+    await server.serve()
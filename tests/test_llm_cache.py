@@ -0,0 +1,48 @@
+import json
+
+from src.llm_cache import cache_key, normalize_error_message
+
+
+def _key(error, **arguments):
+    arguments = {"deployment_name": "deploy-1", "resource_group": "rg-app", "deployment_state": "Failed",
+                 "error_message": json.dumps(error), **arguments}
+    return cache_key(arguments, "v1", "gpt-4")
+
+
+def test_different_error_codes_never_share_a_key():
+    message = "The requested operation could not be completed in region 'westeurope'."
+    codes = ["SkuNotAvailable", "QuotaExceeded", "InvalidTemplate", "Conflict"]
+    keys = {_key({"code": code, "message": message}) for code in codes}
+    assert len(keys) == len(codes)
+
+
+def test_different_resource_types_never_share_a_key():
+    keys = {
+        _key({"code": "InvalidResourceType", "message": f"Type '{resource_type}' is not supported."})
+        for resource_type in ("Microsoft.Network/virtualNetworks", "Microsoft.Compute/virtualMachines")
+    }
+    assert len(keys) == 2
+
+
+def test_different_targets_never_share_a_key():
+    keys = {_key({"code": "InvalidParameter", "message": "Invalid value.", "target": target})
+            for target in ("properties.addressSpace", "properties.subnets")}
+    assert len(keys) == 2
+
+
+def test_resource_specific_details_share_a_key():
+    first = _key({"code": "InUseSubnetCannotBeDeleted",
+                  "message": "Subnet /subscriptions/00000000-0000-0000-0000-000000000001/resourceGroups/rg-app/"
+                             "providers/Microsoft.Network/virtualNetworks/vnet-a/subnets/s1 is in use at "
+                             "2024-05-01T10:00:00Z by deploy-1."})
+    second = _key({"code": "InUseSubnetCannotBeDeleted",
+                   "message": "Subnet /subscriptions/00000000-0000-0000-0000-000000000002/resourceGroups/rg-web/"
+                              "providers/Microsoft.Network/virtualNetworks/vnet-b/subnets/s2 is in use at "
+                              "2024-06-02T11:30:00Z by deploy-2."},
+                  deployment_name="deploy-2", resource_group="rg-web")
+    assert first == second
+
+
+def test_names_are_replaced_as_whole_tokens_only():
+    assert normalize_error_message("The requested deployment d failed", ("d",)) == \
+        "the requested deployment <name> failed"
@@ -0,0 +1,40 @@
+from src.nsg_evaluator import StaticResolver, compile_nsg
+
+
+def _rule(name, priority, access, direction, source="*", destination="*", port="*"):
+    return {"name": name, "properties": {
+        "priority": priority, "access": access, "direction": direction, "protocol": "*",
+        "sourceAddressPrefix": source, "destinationAddressPrefix": destination,
+        "sourcePortRange": "*", "destinationPortRange": port,
+    }}
+
+
+NSG = {
+    "name": "nsg-app",
+    "properties": {
+        "securityRules": [_rule("deny-internet", 100, "Deny", "Inbound", source="Internet")],
+        "defaultSecurityRules": [
+            _rule("AllowVnetInBound", 65000, "Allow", "Inbound", "VirtualNetwork", "VirtualNetwork"),
+            _rule("AllowAzureLoadBalancerInBound", 65001, "Allow", "Inbound", "AzureLoadBalancer"),
+            _rule("DenyAllInBound", 65500, "Deny", "Inbound"),
+        ],
+    },
+}
+
+
+def _flow(source_ip):
+    return {"source_ip": source_ip, "destination_ip": "10.0.2.5", "protocol": "tcp",
+            "source_port": 50000, "destination_port": 22, "direction": "inbound"}
+
+
+def test_deny_from_internet_does_not_match_traffic_inside_the_vnet():
+    compiled = compile_nsg(NSG, StaticResolver(tags={"VirtualNetwork": ["10.0.0.0/16"]}))
+    vnet_flow, internet_flow = compiled.evaluate([_flow("10.0.1.4"), _flow("203.0.113.7")])
+    assert (vnet_flow["decision"], vnet_flow["rule"]) == ("Allow", "AllowVnetInBound")
+    assert (internet_flow["decision"], internet_flow["rule"]) == ("Deny", "deny-internet")
+    assert not compiled.unresolved
+
+
+def test_internet_is_unresolved_without_the_vnet_address_space():
+    compiled = compile_nsg(NSG, StaticResolver())
+    assert "Internet" in compiled.unresolved